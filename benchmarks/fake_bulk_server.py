@@ -0,0 +1,240 @@
+import click
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Version reported to the client, which checks it together with the product header
+ES_VERSION = "8.17.2"
+
+
+class FakeBulkHandler(BaseHTTPRequestHandler):
+    """Answers the requests of the indexers like an empty Elasticsearch cluster that
+    accepts every bulk action. Documents are counted, not stored"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        """Keeps the benchmark output quiet"""
+
+    def respond(self, status: int, body: dict | None = None):
+        """Sends a JSON response with the header the client requires
+
+        Args:
+            status (int): HTTP status
+            body (dict | None): JSON body
+        """
+        payload = json.dumps(body or {}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("X-Elastic-Product", "Elasticsearch")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    def read_body(self) -> bytes:
+        """Reads the request body
+
+        Returns:
+            bytes: The body
+        """
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def bulk(self, path: str, body: bytes):
+        """Answers a _bulk request with a created item for every action
+
+        Args:
+            path (str): Request path, /_bulk or /<index>/_bulk
+            body (bytes): NDJSON body
+        """
+        default_index = path.strip("/").split("/")[0] if path != "/_bulk" else None
+        items = []
+        indices = []
+        lines = iter(body.splitlines())
+        for line in lines:
+            if not line.strip():
+                continue
+            op_type, params = next(iter(json.loads(line).items()))
+            if op_type != "delete":
+                next(lines, None)
+            if random.random() < self.server.reject_rate:
+                status = 429
+                self.server.record_rejection()
+            else:
+                status = 200 if op_type in ("update", "delete") else 201
+                indices.append(params.get("_index", default_index))
+            items.append({op_type: {"_id": params.get("_id"), "status": status}})
+        self.server.record_bulk(indices, len(body))
+        self.respond(
+            200, {"took": 0, "errors": len(indices) < len(items), "items": items}
+        )
+
+    def count(self, path: str):
+        """Answers a _count request with the number of actions sent to the index
+
+        Args:
+            path (str): /<index>/_count
+        """
+        index = path.strip("/").split("/")[0]
+        self.respond(200, {"count": self.server.index_documents.get(index, 0)})
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/":
+            self.respond(
+                200,
+                {
+                    "name": "fake-bulk",
+                    "cluster_name": "benchmark",
+                    "version": {"number": ES_VERSION, "build_flavor": "default"},
+                    "tagline": "You Know, for Search",
+                },
+            )
+        elif path.startswith("/_cluster/health"):
+            self.respond(200, {"status": "green", "timed_out": False})
+        elif path.endswith("/_count"):
+            self.count(path)
+        elif "/_alias" in path:
+            self.respond(404, {"error": "alias missing", "status": 404})
+        else:
+            self.respond(200, {})
+
+    def do_HEAD(self):
+        # no index exists, so that create succeeds
+        self.respond(404)
+
+    def do_POST(self):
+        body = self.read_body()
+        path = self.path.split("?")[0]
+        if path.endswith("/_bulk"):
+            self.bulk(path, body)
+        elif path.endswith("/_count"):
+            self.count(path)
+        else:
+            self.respond(200, {"acknowledged": True, "_shards": {"failed": 0}})
+
+    do_PUT = do_POST
+
+    def do_DELETE(self):
+        self.respond(200, {"acknowledged": True})
+
+
+class FakeBulkServer(ThreadingHTTPServer):
+    """Local stand-in for Elasticsearch, counting the bulk traffic"""
+
+    daemon_threads = True
+
+    def __init__(
+        self, host: str = "127.0.0.1", port: int = 0, reject_rate: float = 0.0
+    ):
+        """Initialization of the FakeBulkServer class
+
+        Args:
+            host (str): Interface to listen on
+            port (int): Port, 0 picks a free one
+            reject_rate (float): Fraction of the bulk actions rejected with 429, as
+                a busy cluster does
+        """
+        super().__init__((host, port), FakeBulkHandler)
+        self.reject_rate = reject_rate
+        self.rejected = 0
+        self.requests = 0
+        self.documents = 0
+        self.bytes = 0
+        self.index_documents = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Property function of url
+
+        Returns:
+            str: URL for the es_host option
+        """
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record_bulk(self, indices: list[str], size: int):
+        """Counts a bulk request
+
+        Args:
+            indices (list[str]): Target index of every action
+            size (int): Body size in bytes
+        """
+        with self._lock:
+            self.requests += 1
+            self.documents += len(indices)
+            self.bytes += size
+            for index in indices:
+                self.index_documents[index] = self.index_documents.get(index, 0) + 1
+
+    def record_rejection(self):
+        """Counts an action rejected with 429"""
+        with self._lock:
+            self.rejected += 1
+
+    def stats(self) -> dict[str, int]:
+        """Bulk traffic received so far
+
+        Returns:
+            dict[str, int]: Requests, documents, bytes and rejected actions
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "documents": self.documents,
+                "bytes": self.bytes,
+                "rejected": self.rejected,
+            }
+
+    def start(self) -> "FakeBulkServer":
+        """Serves on a background thread
+
+        Returns:
+            FakeBulkServer: self
+        """
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="fake-bulk", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops serving"""
+        self.shutdown()
+        self.server_close()
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", show_default=True, help="Interface to listen on")
+@click.option("--port", "-p", type=int, default=9200, show_default=True, help="Port to listen on")
+@click.option(
+    "--reject_rate",
+    type=float,
+    default=0.0,
+    show_default=True,
+    help="Fraction of the bulk actions rejected with 429",
+)
+def serve(host: str, port: int, reject_rate: float):
+    """Runs the fake _bulk endpoint until interrupted
+
+    Args:
+        host (str): Interface to listen on
+        port (int): Port to listen on
+        reject_rate (float): Fraction of the bulk actions rejected with 429
+    """
+    server = FakeBulkServer(host, port, reject_rate)
+    click.echo(f"Fake Elasticsearch listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        click.echo(json.dumps(server.stats()))
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,404 @@
+import click
+import random
+import time
+from typing import Iterator
+from index.config_read import read_from_config_file
+from index.db_connection import get_connection_provider
+
+INSERT_BATCH_SIZE = 10000
+
+# Subset of the IGSR schema read by the indexers, with the columns in the order
+# the fetchers expect from SELECT *
+SCHEMA_SQL = [
+    """CREATE TABLE superpopulation (
+        superpopulation_id INT UNSIGNED NOT NULL PRIMARY KEY,
+        code VARCHAR(50) NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        display_colour VARCHAR(10),
+        display_order TINYINT UNSIGNED,
+        elastic_id VARCHAR(255)
+    )""",
+    """CREATE TABLE population (
+        population_id INT UNSIGNED NOT NULL PRIMARY KEY,
+        superpopulation_id INT UNSIGNED NOT NULL,
+        code VARCHAR(50) NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        description VARCHAR(255),
+        latitude DECIMAL(10, 7),
+        longitude DECIMAL(10, 7),
+        elastic_id VARCHAR(255),
+        display_order TINYINT UNSIGNED
+    )""",
+    """CREATE TABLE data_type (
+        data_type_id INT UNSIGNED NOT NULL PRIMARY KEY,
+        code VARCHAR(50) NOT NULL
+    )""",
+    """CREATE TABLE analysis_group (
+        analysis_group_id INT UNSIGNED NOT NULL PRIMARY KEY,
+        code VARCHAR(50) NOT NULL,
+        description VARCHAR(255),
+        short_title VARCHAR(255),
+        display_order TINYINT UNSIGNED
+    )""",
+    """CREATE TABLE data_collection (
+        data_collection_id INT UNSIGNED NOT NULL PRIMARY KEY,
+        code VARCHAR(50) NOT NULL,
+        title VARCHAR(255) NOT NULL,
+        short_title VARCHAR(255),
+        reuse_policy_precedence TINYINT UNSIGNED,
+        reuse_policy VARCHAR(255),
+        description TEXT,
+        website VARCHAR(255)
+    )""",
+    """CREATE TABLE publications (
+        publication_id INT UNSIGNED NOT NULL PRIMARY KEY,
+        url VARCHAR(255),
+        display_order TINYINT UNSIGNED,
+        publication VARCHAR(255),
+        data_collection_id INT UNSIGNED NOT NULL
+    )""",
+    """CREATE TABLE sample_source (
+        sample_source_id INT UNSIGNED NOT NULL PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        description VARCHAR(255),
+        url VARCHAR(255)
+    )""",
+    """CREATE TABLE sample (
+        sample_id INT UNSIGNED NOT NULL PRIMARY KEY,
+        sample_source_id INT UNSIGNED,
+        name VARCHAR(255) NOT NULL,
+        biosample_id VARCHAR(50),
+        sex CHAR(1)
+    )""",
+    """CREATE TABLE sample_relationship (
+        subject_sample_id INT UNSIGNED NOT NULL,
+        relation_sample_id INT UNSIGNED NOT NULL,
+        type VARCHAR(50),
+        PRIMARY KEY (subject_sample_id, relation_sample_id)
+    )""",
+    """CREATE TABLE sample_synonym (
+        sample_id INT UNSIGNED NOT NULL,
+        synonym VARCHAR(255) NOT NULL,
+        PRIMARY KEY (sample_id, synonym)
+    )""",
+    """CREATE TABLE file (
+        file_id INT UNSIGNED NOT NULL PRIMARY KEY,
+        url VARCHAR(500) NOT NULL,
+        md5 CHAR(32),
+        data_type_id INT UNSIGNED,
+        analysis_group_id INT UNSIGNED,
+        foreign_file TINYINT(1) NOT NULL DEFAULT 0,
+        in_current_tree TINYINT(1) NOT NULL DEFAULT 1,
+        indexed_in_elasticsearch TINYINT(1) NOT NULL DEFAULT 0
+    )""",
+    """CREATE TABLE sample_file (
+        sample_id INT UNSIGNED NOT NULL,
+        file_id INT UNSIGNED NOT NULL,
+        PRIMARY KEY (sample_id, file_id),
+        KEY (file_id)
+    )""",
+    """CREATE TABLE file_data_collection (
+        file_id INT UNSIGNED NOT NULL,
+        data_collection_id INT UNSIGNED NOT NULL,
+        PRIMARY KEY (file_id, data_collection_id),
+        KEY (data_collection_id)
+    )""",
+    """CREATE TABLE dc_sample_pop_assign (
+        data_collection_id INT UNSIGNED NOT NULL,
+        sample_id INT UNSIGNED NOT NULL,
+        population_id INT UNSIGNED NOT NULL,
+        PRIMARY KEY (data_collection_id, sample_id, population_id),
+        KEY (sample_id),
+        KEY (population_id)
+    )""",
+]
+
+TABLES = [sql.split()[2] for sql in SCHEMA_SQL]
+
+
+class DataGenerator:
+    """Fills a MySQL or MariaDB database with synthetic data shaped like the 1000
+    Genomes tables read by the indexers"""
+
+    def __init__(
+        self,
+        db_config: dict,
+        files: int,
+        samples: int | None = None,
+        populations: int = 26,
+        superpopulations: int = 5,
+        data_collections: int = 12,
+        seed: int = 1000,
+    ):
+        """Initialization of the DataGenerator class
+
+        Args:
+            db_config (dict): DB configuration, the tables are dropped and created
+            files (int): Number of files
+            samples (int | None): Number of samples, one per 30 files when None
+            populations (int): Number of populations
+            superpopulations (int): Number of superpopulations
+            data_collections (int): Number of data collections
+            seed (int): Seed of the random generator, the same seed gives the same data
+        """
+        self.connection_provider = get_connection_provider(db_config)
+        self.files = files
+        self.samples = samples or max(100, files // 30)
+        self.populations = populations
+        self.superpopulations = superpopulations
+        self.data_collections = data_collections
+        self.random = random.Random(seed)
+        # every sample belongs to one population
+        self.sample_population = {
+            sample_id: self.random.randint(1, populations)
+            for sample_id in range(1, self.samples + 1)
+        }
+
+    def create_schema(self, cursor):
+        """Drops and creates the tables
+
+        Args:
+            cursor: Cursor of a checked out connection
+        """
+        for table in TABLES:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        for sql in SCHEMA_SQL:
+            cursor.execute(sql)
+
+    def reference_rows(self) -> dict[str, list[tuple]]:
+        """Rows of the small tables
+
+        Returns:
+            dict[str, list[tuple]]: Rows keyed by table
+        """
+        rng = self.random
+        return {
+            "superpopulation": [
+                (i, f"SP{i}", f"Superpopulation {i}", f"#{i:06x}", i, f"SP{i}")
+                for i in range(1, self.superpopulations + 1)
+            ],
+            "population": [
+                (
+                    i,
+                    rng.randint(1, self.superpopulations),
+                    f"P{i:03d}",
+                    f"Population {i}",
+                    f"Population {i} description",
+                    round(rng.uniform(-60, 70), 7),
+                    round(rng.uniform(-180, 180), 7),
+                    f"P{i:03d}",
+                    i,
+                )
+                for i in range(1, self.populations + 1)
+            ],
+            "data_type": [
+                (i, code)
+                for i, code in enumerate(
+                    ["alignment", "sequence", "variants", "annotation"], start=1
+                )
+            ],
+            "analysis_group": [
+                (i, f"AG{i}", f"Analysis group {i}", f"AG {i}", i) for i in range(1, 9)
+            ],
+            "data_collection": [
+                (
+                    i,
+                    f"DC{i}",
+                    f"Data collection {i}",
+                    f"DC {i}",
+                    i,
+                    f"Reuse policy {i % 3}",
+                    f"Data collection {i} description",
+                    f"https://example.org/dc{i}",
+                )
+                for i in range(1, self.data_collections + 1)
+            ],
+            "publications": [
+                (i, f"https://doi.org/10.0/{i}", 1, f"Publication {i}", i)
+                for i in range(1, self.data_collections + 1)
+            ],
+            "sample_source": [
+                (i, f"Source {i}", f"Source {i} description", f"https://example.org/s{i}")
+                for i in range(1, 4)
+            ],
+        }
+
+    def sample_rows(self) -> Iterator[tuple]:
+        """Rows of the sample table
+
+        Yields:
+            Iterator[tuple]: sample rows
+        """
+        for sample_id in range(1, self.samples + 1):
+            yield (
+                sample_id,
+                self.random.randint(1, 3),
+                f"HG{sample_id:07d}",
+                f"SAME{sample_id:08d}",
+                self.random.choice("mf"),
+            )
+
+    def assignment_rows(self) -> Iterator[tuple]:
+        """Rows of dc_sample_pop_assign, every sample is in every data collection
+
+        Yields:
+            Iterator[tuple]: dc_sample_pop_assign rows
+        """
+        for dc_id in range(1, self.data_collections + 1):
+            for sample_id, population_id in self.sample_population.items():
+                yield dc_id, sample_id, population_id
+
+    def file_rows(self) -> Iterator[tuple[tuple, list[tuple], list[tuple]]]:
+        """Rows of file with their sample_file and file_data_collection rows
+
+        Yields:
+            Iterator[tuple[tuple, list[tuple], list[tuple]]]: file row, sample_file
+            rows and file_data_collection rows
+        """
+        rng = self.random
+        for file_id in range(1, self.files + 1):
+            samples = rng.sample(range(1, self.samples + 1), rng.choice((1, 1, 1, 2)))
+            collections = rng.sample(
+                range(1, self.data_collections + 1), rng.choice((1, 1, 2))
+            )
+            file_row = (
+                file_id,
+                f"ftp://ftp.example.org/data/HG{samples[0]:07d}/{file_id}.cram",
+                f"{rng.getrandbits(128):032x}",
+                rng.randint(1, 4),
+                rng.randint(1, 8),
+                0,
+                int(rng.random() > 0.01),
+                0,
+            )
+            yield (
+                file_row,
+                [(sample_id, file_id) for sample_id in samples],
+                [(file_id, dc_id) for dc_id in collections],
+            )
+
+    @staticmethod
+    def insert(cursor, table: str, rows: list[tuple]):
+        """Inserts rows, mysql-connector turns executemany into multi row INSERTs
+
+        Args:
+            cursor: Cursor of a checked out connection
+            table (str): Table name
+            rows (list[tuple]): The rows
+        """
+        if rows:
+            placeholders = ",".join(["%s"] * len(rows[0]))
+            cursor.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+
+    def insert_batches(self, db, cursor, table: str, rows: Iterator[tuple]):
+        """Inserts rows in batches of INSERT_BATCH_SIZE, committing every batch
+
+        Args:
+            db: Checked out connection
+            cursor: Cursor of the connection
+            table (str): Table name
+            rows (Iterator[tuple]): The rows
+        """
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= INSERT_BATCH_SIZE:
+                self.insert(cursor, table, batch)
+                db.commit()
+                batch = []
+        self.insert(cursor, table, batch)
+        db.commit()
+
+    def generate(self) -> dict[str, int]:
+        """Creates the schema and inserts the data
+
+        Returns:
+            dict[str, int]: Number of rows per table
+        """
+        counts = {}
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            self.create_schema(cursor)
+            for table, rows in self.reference_rows().items():
+                self.insert(cursor, table, rows)
+                counts[table] = len(rows)
+            db.commit()
+
+            self.insert_batches(db, cursor, "sample", self.sample_rows())
+            self.insert_batches(db, cursor, "dc_sample_pop_assign", self.assignment_rows())
+            counts["sample"] = self.samples
+            counts["dc_sample_pop_assign"] = self.samples * self.data_collections
+
+            files, sample_files, file_collections = [], [], []
+            counts.update(file=0, sample_file=0, file_data_collection=0)
+            for file_row, sample_rows, collection_rows in self.file_rows():
+                files.append(file_row)
+                sample_files.extend(sample_rows)
+                file_collections.extend(collection_rows)
+                if len(files) >= INSERT_BATCH_SIZE:
+                    self.flush_files(db, cursor, files, sample_files, file_collections, counts)
+                    files, sample_files, file_collections = [], [], []
+            self.flush_files(db, cursor, files, sample_files, file_collections, counts)
+            cursor.close()
+
+        return counts
+
+    def flush_files(
+        self,
+        db,
+        cursor,
+        files: list[tuple],
+        sample_files: list[tuple],
+        file_collections: list[tuple],
+        counts: dict[str, int],
+    ):
+        """Inserts a batch of files with their links
+
+        Args:
+            db: Checked out connection
+            cursor: Cursor of the connection
+            files (list[tuple]): file rows
+            sample_files (list[tuple]): sample_file rows
+            file_collections (list[tuple]): file_data_collection rows
+            counts (dict[str, int]): Number of rows per table, updated
+        """
+        for table, rows in (
+            ("file", files),
+            ("sample_file", sample_files),
+            ("file_data_collection", file_collections),
+        ):
+            self.insert(cursor, table, rows)
+            counts[table] += len(rows)
+        db.commit()
+
+
+@click.command()
+@click.option(
+    "--config_file",
+    "-c",
+    type=click.Path(exists=True),
+    help="Configuration file of the benchmark database, its tables are replaced",
+    required=True,
+)
+@click.option("--files", "-f", type=int, default=10000, show_default=True, help="Number of files")
+@click.option("--samples", "-s", type=int, default=None, help="Number of samples, one per 30 files by default")
+@click.option("--seed", type=int, default=1000, show_default=True, help="Seed of the random data")
+def generate_data(config_file: str, files: int, samples: int | None, seed: int):
+    """Fills the benchmark database with synthetic 1000 Genomes shaped data
+
+    Args:
+        config_file (str): Configuration file
+        files (int): Number of files
+        samples (int | None): Number of samples
+        seed (int): Seed of the random data
+    """
+    start = time.perf_counter()
+    generator = DataGenerator(read_from_config_file(config_file), files, samples, seed=seed)
+    counts = generator.generate()
+    for table, count in counts.items():
+        click.echo(f"{table}: {count} rows")
+    click.echo(f"Generated in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    generate_data()
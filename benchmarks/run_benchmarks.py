@@ -0,0 +1,285 @@
+import click
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict
+from benchmarks.fake_bulk_server import FakeBulkServer
+from index.config_read import read_from_config_file
+from index.db_connection import get_connection_provider
+from index.elasticsearch_indexer import bulk_options
+from index.metrics import get_metrics
+from index.orchestrator import INDEX_MODULES, load_runner
+from index.pipeline import pipeline_options
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+SCALE_TABLES = ("file", "sample", "sample_file", "dc_sample_pop_assign", "population")
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the current process
+
+    Returns:
+        float: Peak RSS in MiB
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KiB on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def git_commit() -> str | None:
+    """Commit of the working tree the benchmark runs on
+
+    Returns:
+        str | None: Short hash, None outside a git checkout
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def indexer_metrics(result: Any, elapsed: float) -> Dict[str, Any]:
+    """Throughput and stage timings from the result of an indexer run()
+
+    Args:
+        result (Any): Bulk indexing summary with the pipeline statistics
+        elapsed (float): Wall time of the run in seconds
+
+    Returns:
+        Dict[str, Any]: docs/sec, DB, build and bulk time
+    """
+    result = result or {}
+    stages = result.get("pipeline", {}).get("stages", {})
+    docs = result.get("success", 0)
+    return {
+        "docs": docs,
+        "failed": result.get("failed", 0),
+        "elapsed": elapsed,
+        "docs_per_sec": docs / elapsed if elapsed else 0.0,
+        # the reader stage runs the queries, the sender stage the bulk requests
+        "db_time": stages.get("read", {}).get("busy", 0.0),
+        "build_time": stages.get("build", {}).get("busy", 0.0),
+        "bulk_time": stages.get("send", {}).get("busy", 0.0),
+    }
+
+
+def run_indexer(
+    index_type: str,
+    config_file: str,
+    es_host: str,
+    type_of: str,
+    options: Dict[str, Any],
+    connection,
+):
+    """Runs one indexer in a fresh process so that its peak RSS is its own, and
+    sends its metrics back, with the breakdown of index.metrics
+
+    Args:
+        index_type (str): One of INDEX_MODULES
+        config_file (str): Configuration file
+        es_host (str): ElasticSearch host
+        type_of (str): Type of: create, update or rebuild
+        options (Dict[str, Any]): Options forwarded to run()
+        connection: Pipe end receiving the metrics
+    """
+    get_metrics().enable()
+    start = time.perf_counter()
+    try:
+        result = load_runner(index_type)(config_file, es_host, type_of, **options)
+        metrics = indexer_metrics(result, time.perf_counter() - start)
+        metrics["status"] = "ok"
+    except Exception as e:
+        metrics = indexer_metrics(None, time.perf_counter() - start)
+        metrics.update(status="failed", error=repr(e))
+    metrics["peak_rss_mb"] = peak_rss_mb()
+    metrics["breakdown"] = get_metrics().summary()
+    connection.send(metrics)
+    connection.close()
+
+
+def database_scale(config_file: str) -> Dict[str, int]:
+    """Row counts of the main tables, to compare results at the same scale
+
+    Args:
+        config_file (str): Configuration file
+
+    Returns:
+        Dict[str, int]: Rows per table
+    """
+    provider = get_connection_provider(read_from_config_file(config_file))
+    scale = {}
+    with provider.connection() as db:
+        cursor = db.cursor()
+        for table in SCALE_TABLES:
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            scale[table] = cursor.fetchone()[0]
+        cursor.close()
+
+    return scale
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]):
+    """Echoes the docs/sec of every indexer against a previous result file
+
+    Args:
+        results (Dict[str, Any]): Results of this run
+        baseline (Dict[str, Any]): Results of a previous run
+    """
+    click.echo(f"Compared with {baseline.get('commit')} ({baseline.get('timestamp')})")
+    for index_type, metrics in results["indexers"].items():
+        previous = baseline.get("indexers", {}).get(index_type)
+        if not previous or not previous.get("docs_per_sec"):
+            continue
+        change = metrics["docs_per_sec"] / previous["docs_per_sec"] - 1
+        click.echo(
+            f"  {index_type}: {previous['docs_per_sec']:.0f} -> "
+            f"{metrics['docs_per_sec']:.0f} docs/s ({change:+.1%})"
+        )
+
+
+def run_benchmarks(
+    config_file: str,
+    es_host: str | None,
+    type_of: str,
+    index_types: list[str],
+    **options,
+) -> Dict[str, Any]:
+    """Runs the indexers one after the other, each in its own process
+
+    Args:
+        config_file (str): Configuration file of the benchmark database
+        es_host (str | None): ElasticSearch host, a FakeBulkServer when None
+        type_of (str): Type of: create, update or rebuild
+        index_types (list[str]): Indexers to run
+        **options: Options forwarded to every run(), e.g. bulk_mode
+
+    Returns:
+        Dict[str, Any]: The results
+    """
+    server = None if es_host else FakeBulkServer().start()
+    target = es_host or server.url
+    context = multiprocessing.get_context("spawn")
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "es_host": es_host or "fake",
+        "type_of": type_of,
+        "options": options,
+        "scale": database_scale(config_file),
+        "indexers": {},
+    }
+    try:
+        for index_type in index_types:
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(
+                target=run_indexer,
+                args=(index_type, config_file, target, type_of, options, sender),
+                name=f"benchmark-{index_type}",
+            )
+            process.start()
+            sender.close()
+            try:
+                metrics = receiver.recv()
+            except EOFError:
+                metrics = {"status": "crashed"}
+            process.join()
+            results["indexers"][index_type] = metrics
+            click.echo(f"{index_type}: {json.dumps(metrics)}")
+    finally:
+        if server:
+            results["fake_bulk"] = server.stats()
+            server.stop()
+
+    return results
+
+
+@click.command()
+@click.option(
+    "--config_file",
+    "-c",
+    type=click.Path(exists=True),
+    help="Configuration file of the benchmark database",
+    required=True,
+)
+@click.option(
+    "--es_host",
+    "-es",
+    type=str,
+    default=None,
+    help="ElasticSearch host, a local fake _bulk endpoint when omitted",
+)
+@click.option(
+    "--type_of", "-t", type=str, default="create", show_default=True, help="Create, update or rebuild"
+)
+@click.option(
+    "--index_type",
+    "-i",
+    type=click.Choice(list(INDEX_MODULES)),
+    multiple=True,
+    help="Indexer to run, every indexer when omitted",
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="JSON result file, under benchmarks/results by default",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Previous JSON result file to compare with",
+)
+@bulk_options
+@pipeline_options
+def benchmark(
+    config_file: str,
+    es_host: str | None,
+    type_of: str,
+    index_type: tuple,
+    output: str | None,
+    baseline: str | None,
+    **options,
+):
+    """Measures the indexers and writes the results as JSON
+
+    Args:
+        config_file (str): Configuration file of the benchmark database
+        es_host (str | None): ElasticSearch host
+        type_of (str): Type of: create, update or rebuild
+        index_type (tuple): Indexers to run
+        output (str | None): JSON result file
+        baseline (str | None): Previous JSON result file
+        **options: Options forwarded to every run()
+    """
+    results = run_benchmarks(
+        config_file, es_host, type_of, list(index_type or INDEX_MODULES), **options
+    )
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}_{results['commit'] or 'nogit'}.json")
+    with open(output, "w") as file:
+        json.dump(results, file, indent=2)
+    click.echo(f"Results written to {output}")
+
+    if baseline:
+        with open(baseline) as file:
+            compare(results, json.load(file))
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,5 +1,6 @@
-from mysql.connector import connect
 from typing import Any
+from index.db_connection import get_connection_provider
+from index.reference_cache import REFERENCE_TABLES, get_reference_data
 
 
 class FetchAGFromDB:
@@ -12,32 +13,29 @@ class FetchAGFromDB:
             data (dict[str, Any]): Configuration Data
         """
         self.data = data
+        self.connection_provider = get_connection_provider(data)
 
     def fetch_information_from_DB(self) -> list[tuple]:
-        """Fetch analysis group information from database
+        """Fetch the analysis groups of the files with samples, the rows are read
+        from the ReferenceData shared by the indexers of the run
 
         Returns:
             list[tuple]: Rows of information from the database
         """
 
-        fetch_ag_sql = """SELECT ag.* from file f INNER JOIN analysis_group ag ON f.analysis_group_id = ag.analysis_group_id INNER JOIN sample_file sf on sf.file_id = f.file_id GROUP BY ag.analysis_group_id"""
+        fetch_ag_ids_sql = """SELECT DISTINCT f.analysis_group_id from file f INNER JOIN sample_file sf on sf.file_id = f.file_id"""
 
-        host = self.data["host"]
-        port = self.data["port"]
-        database = self.data["database"]
-        password = self.data["password"]
-        user = self.data["user"]
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(fetch_ag_ids_sql)
+            used = {row[0] for row in cursor.fetchall()}
+            cursor.close()
 
-        db = connect(
-            host=host, port=port, database=database, password=password, user=user
+        reference = get_reference_data(self.data)
+        key = reference.columns["analysis_group"].index(
+            REFERENCE_TABLES["analysis_group"]
         )
-        cursor = db.cursor()
-        cursor.execute(fetch_ag_sql)
-        ag = cursor.fetchall()
-        cursor.close()
-        db.close()
-
-        return ag
+        return [row for row in reference.rows("analysis_group") if row[key] in used]
 
     def build_ag_info(self, row: tuple) -> dict[str, Any]:
         """Build analysis group information
@@ -1,9 +1,12 @@
 import click
 from typing import Any
 import json
-from index.elasticsearch_indexer import ElasticSearchIndexer
+from index.elasticsearch_indexer import bulk_options
+from index.bulk_export import create_indexer, export_options
+from index.metrics import metrics_options
 from .fetch_ag_from_db import FetchAGFromDB
 from index.config_read import read_from_config_file
+from index.pipeline import IndexingPipeline, DEFAULT_QUEUE_SIZE, pipeline_options
 
 
 json_file = "index/analysis_group_index/analysis_group.json"
@@ -12,19 +15,32 @@ json_file = "index/analysis_group_index/analysis_group.json"
 class AnalysisGroupIndexer:
     """Analysis group indexer class"""
 
-    def __init__(self, config_file: str, es_host: str, type_of: str):
+    def __init__(
+        self,
+        config_file: str,
+        es_host: str,
+        type_of: str,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        **indexer_options,
+    ):
         """Initiaization of the analysis group indexer class
 
         Args:
             config_file (str): Configuration file
             es_host (str): ElasticSearch Host
             type_of (str): Type of either create or update
+            queue_size (int): Maximum number of items waiting between two pipeline stages
+            **indexer_options: ElasticSearchIndexer options, e.g. bulk_mode, or the
+                export options of create_indexer
         """
 
         self.type_of = type_of
+        self.queue_size = queue_size
         self.data = read_from_config_file(config_file)
         self.fetcher = FetchAGFromDB(self.data)
-        self.indexer = ElasticSearchIndexer(es_host, "analysis_group")
+        self.indexer = create_indexer(
+            es_host, "analysis_group", **indexer_options
+        )
 
     def load_json_file(self) -> dict[str, Any]:
         """Loading Json file to get the settings and the mappings
@@ -50,25 +66,51 @@ class AnalysisGroupIndexer:
 
         return analysis_group
 
-    def build_and_index_analysisgroup(self):
-        """Build and index analysis group"""
+    def build_action(self, row: tuple) -> dict[str, Any]:
+        """Build the bulk action of an analysis group
+
+        Args:
+            row (tuple): A row from fetch_information_from_DB
+
+        Returns:
+            dict[str, Any]: Bulk action
+        """
+        code = row[1]
+        ag_data = self.fetcher.build_ag_info(row)
+        return self.indexer.index_data(ag_data, code, self.type_of)
 
-        actions = []
-        analysis_group = self.fetcher.fetch_information_from_DB()
-        for row in analysis_group:
-            code = row[1]
-            ag_data = self.fetcher.build_ag_info(row)
-            action = self.indexer.index_data(ag_data, code, self.type_of)
-            actions.append(action)
+    def build_and_index_analysisgroup(self):
+        """Build and index analysis group
 
+        Returns:
+            dict[str, Any] | None: Bulk indexing summary, None when the index was not created
+        """
+        pipeline = IndexingPipeline(
+            self.fetcher.fetch_information_from_DB,
+            self.build_action,
+            self.indexer.bulk_index,
+            self.queue_size,
+            name=self.indexer.alias,
+        )
+        result = None
         if self.type_of == "create":
             if self.create_analysis_group_index() is True:
-                self.indexer.bulk_index(actions)
+                result = self.indexer.load_index(pipeline.run)
                 click.echo(f"Bulk indexing successful")
+        elif self.type_of == "rebuild":
+            json_data = self.load_json_file()
+            result = self.indexer.rebuild_index(
+                json_data["settings"], json_data["mappings"], pipeline.run
+            )
         else:
-            self.indexer.bulk_index(actions)
+            result = pipeline.run()
             click.echo(f"Bulk indexing successful")
 
+        if result is not None:
+            pipeline.report()
+            result["pipeline"] = pipeline.stats()
+
+        return result
 
 @click.command()
 @click.option(
@@ -82,10 +124,20 @@ class AnalysisGroupIndexer:
 @click.option(
     "--type_of", "-t", type=str, help="Update or create an index", required=True
 )
-def create_data(config_file: str, es_host: str, type_of: str):
-    ag_indexer = AnalysisGroupIndexer(config_file, es_host, type_of)
+@bulk_options
+@export_options
+@pipeline_options
+@metrics_options
+def create_data(config_file: str, es_host: str, type_of: str, **indexer_options):
+    ag_indexer = AnalysisGroupIndexer(config_file, es_host, type_of, **indexer_options)
     ag_indexer.build_and_index_analysisgroup()
 
 
 if __name__ == "__main__":
     create_data()
+
+
+# Enables programmatic use (from main.py)
+def run(config_file, es_host, type_of, **indexer_options):
+    indexer = AnalysisGroupIndexer(config_file, es_host, type_of, **indexer_options)
+    return indexer.build_and_index_analysisgroup()
@@ -0,0 +1,263 @@
+import asyncio
+import click
+import elasticsearch
+from elasticsearch import AsyncElasticsearch
+from elasticsearch.helpers import async_streaming_bulk
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict
+from index.elasticsearch_indexer import (
+    ElasticSearchIndexer,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_INITIAL_BACKOFF,
+    DEFAULT_MAX_BACKOFF,
+    DEFAULT_MAX_CHUNK_BYTES,
+    DEFAULT_KEEP_GENERATIONS,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_RETRY_BUDGET,
+    DEFAULT_THREAD_COUNT,
+    HEALTH_TIMEOUT,
+)
+from index.metrics import client_serializer
+from index.pipeline import DEFAULT_QUEUE_SIZE
+
+_DONE = object()
+
+
+class AsyncElasticSearchIndexer(ElasticSearchIndexer):
+    """Configuration for the ElasticSearch Index build on an asyncio event loop"""
+
+    def __init__(
+        self,
+        es_host: str,
+        index_name: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_chunk_bytes: int = DEFAULT_MAX_CHUNK_BYTES,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        hash_store: str | None = None,
+        ingest_profile: bool = True,
+        force_merge: int | None = None,
+        wait_for_status: str = "green",
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        initial_backoff: float = DEFAULT_INITIAL_BACKOFF,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+        bulk_mode: str = "streaming",
+        thread_count: int = DEFAULT_THREAD_COUNT,
+        keep_generations: int = DEFAULT_KEEP_GENERATIONS,
+        retry_budget: int | None = DEFAULT_RETRY_BUDGET,
+        dead_letter_dir: str | None = None,
+    ):
+        """Initialization of the AsyncElasticSearchIndexer Class
+
+        Args:
+            es_host (str): Host of the ElasticSearch
+            index_name (str): name of the index
+            chunk_size (int): Number of actions per bulk request
+            max_chunk_bytes (int): Maximum size of a bulk request in bytes
+            queue_size (int): Maximum number of actions extracted ahead of the bulk
+                requests
+            hash_store (str | None): SQLite file of the document hashes, updates of
+                unchanged documents are skipped when set
+            ingest_profile (bool): Create new indices with INGEST_PROFILE and restore
+                the JSON settings once load_index is done
+            force_merge (int | None): Force merge a new index down to this number of
+                segments after the load, None skips the force merge
+            wait_for_status (str): Cluster health awaited after the load, none skips
+            max_retries (int): Retries of the items rejected with 429, done by
+                async_streaming_bulk
+            initial_backoff (float): Seconds before the first retry, doubled for
+                every following retry
+            max_backoff (float): Maximum seconds between two retries
+            bulk_mode (str): Only the default, the requests are sent from the
+                event loop
+            thread_count (int): Only the default, there are no sender threads
+            keep_generations (int): Not used, rebuilds run on the sync engine
+            retry_budget (int | None): Only the default, async_streaming_bulk
+                retries without a budget
+            dead_letter_dir (str | None): Not supported, must be None
+
+        Raises:
+            ValueError: Raised when an option of the threaded indexer is changed,
+            it would be dropped on the event loop
+        """
+        unsupported = [
+            name
+            for name, value, default in (
+                ("bulk_mode", bulk_mode, "streaming"),
+                ("thread_count", thread_count, DEFAULT_THREAD_COUNT),
+                ("retry_budget", retry_budget, DEFAULT_RETRY_BUDGET),
+                ("dead_letter_dir", dead_letter_dir, None),
+            )
+            if value != default
+        ]
+        if unsupported:
+            raise ValueError(
+                f"Not supported by the async engine: {', '.join(unsupported)}"
+            )
+
+        self.client = AsyncElasticsearch(
+            es_host, serializer=client_serializer(index_name)
+        )
+        self.index_name = index_name
+        self.alias = index_name
+        self.bulk_mode = "async"
+        self.chunk_size = chunk_size
+        self.max_chunk_bytes = max_chunk_bytes
+        self.queue_size = queue_size
+        self.ingest_profile = ingest_profile
+        self.force_merge = force_merge
+        self.wait_for_status = wait_for_status
+        self.pending_restore = None
+        self.chunk_remaining = 0
+        self.retry = None
+        self.dead_letters = None
+        self.checkpoint = None
+        self.acknowledged = None
+        self.overwrite = False
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.open_hash_store(hash_store)
+
+    async def create_index(
+        self, settings: dict[str, Any], mappings: dict[str, Any]
+    ) -> bool:
+        """Creates an ElasticSearch Index with the settings and mappings
+
+        Args:
+            settings (dict[str, Any]): settings for the index
+            mappings (dict[str, Any]): mappings for the index
+
+        Returns:
+            bool: True or False
+        """
+        if await self.client.indices.exists(index=self.index_name):
+            click.echo(
+                f"Index '{self.index_name}' already exists., Change --type_of to update"
+            )
+            return False
+        try:
+            await self.client.indices.create(
+                index=self.index_name,
+                body={"settings": self.load_settings(settings), "mappings": mappings},
+            )
+            click.echo(f"Index '{self.index_name}' created successfully.")
+            if self.hash_store:
+                self.hash_store.clear(self.alias)
+            return True
+        except elasticsearch.ApiError as e:
+            self.pending_restore = None
+            click.echo(f"Failed to create index: {e}")
+            return False
+
+    async def finish_load(self):
+        """Restores the settings replaced by the ingest profile, refreshes and
+        optionally force merges the index, then waits for the cluster health"""
+        if self.pending_restore is None:
+            return
+
+        restore, self.pending_restore = self.pending_restore, None
+        await self.client.indices.put_settings(index=self.index_name, settings=restore)
+        await self.client.indices.refresh(index=self.index_name)
+        if self.force_merge:
+            await self.client.indices.forcemerge(
+                index=self.index_name, max_num_segments=self.force_merge
+            )
+        if self.wait_for_status != "none":
+            try:
+                await self.client.cluster.health(
+                    index=self.index_name,
+                    wait_for_status=self.wait_for_status,
+                    timeout=HEALTH_TIMEOUT,
+                )
+            except elasticsearch.ApiError as e:
+                click.echo(
+                    f"Index '{self.index_name}' is not {self.wait_for_status} yet: {e}"
+                )
+        click.echo(f"Index '{self.index_name}' settings restored after the load.")
+
+    async def load_index(
+        self, load: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Runs the whole load of the current index, then finish_load restores the
+        settings of the ingest profile, also when the load failed
+
+        Args:
+            load (Callable[[], Awaitable[Dict[str, Any]]]): Sends every action of
+                the run and returns its summary
+
+        Returns:
+            Dict[str, Any]: The summary of the load
+        """
+        try:
+            return await load()
+        finally:
+            await self.finish_load()
+
+    async def _queued(
+        self, actions: AsyncIterable[Dict[str, Any]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Extracts the actions in a separate task so that the DB reads of the next
+        chunk overlap with the bulk request in flight
+
+        Args:
+            actions (AsyncIterable[Dict[str, Any]]): Actions to be indexed
+
+        Yields:
+            AsyncIterator[Dict[str, Any]]: The actions, in order
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async def produce():
+            try:
+                async for action in actions:
+                    await queue.put(action)
+            finally:
+                await queue.put(_DONE)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while (action := await queue.get()) is not _DONE:
+                yield action
+            # re-raises an extraction error
+            await producer
+        finally:
+            if not producer.done():
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
+
+    async def bulk_index(self, actions: AsyncIterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Perform a bulk indexing operation.
+
+        Args:
+            actions (AsyncIterable[Dict[str, Any]]): Actions to be indexed
+
+        Raises:
+            Exception: Raised when Elasticsearch rejects a whole bulk request
+
+        Returns:
+            Dict[str, Any]: success and failed counts, the failed items and the
+            counts of every chunk of chunk_size actions
+        """
+        summary = {"success": 0, "failed": 0, "errors": [], "chunks": []}
+        try:
+            async for ok, item in async_streaming_bulk(
+                self.client,
+                self._queued(actions),
+                chunk_size=self.chunk_size,
+                max_chunk_bytes=self.max_chunk_bytes,
+                raise_on_error=False,
+                max_retries=self.max_retries,
+                initial_backoff=self.initial_backoff,
+                max_backoff=self.max_backoff,
+            ):
+                self.add_result(summary, ok, item)
+        except elasticsearch.BadRequestError as e:
+            raise Exception(f"Error during bulk indexing: {str(e)}") from e
+        finally:
+            self.save_hashes()
+
+        return self.finish_summary(summary)
+
+    async def close(self):
+        """Closes the client connections"""
+        await self.client.close()
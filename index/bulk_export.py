@@ -0,0 +1,345 @@
+import click
+import glob
+import gzip
+import json
+import os
+from elasticsearch import JsonSerializer
+from elasticsearch.helpers.actions import expand_action
+from typing import Any, BinaryIO, Callable, Dict, Iterable
+
+from index.elasticsearch_indexer import DEFAULT_CHUNK_SIZE, ElasticSearchIndexer
+
+try:
+    import zstandard
+except ImportError:  # optional, only needed for zstd exports
+    zstandard = None
+
+COMPRESSIONS = ("gzip", "zstd")
+FILE_EXTENSIONS = {"gzip": ".ndjson.gz", "zstd": ".ndjson.zst"}
+DEFAULT_MAX_FILE_BYTES = 256 * 1024 * 1024
+MANIFEST_FILE = "index.json"
+PART_PREFIX = "part-"
+
+_serializer = JsonSerializer()
+
+
+def open_bulk_file(path: str, mode: str = "rb") -> BinaryIO:
+    """Opens a compressed NDJSON file, the compression comes from the extension
+
+    Args:
+        path (str): File written by BulkFileWriter
+        mode (str): rb or wb
+
+    Returns:
+        BinaryIO: File object reading or writing uncompressed bytes
+    """
+    if path.endswith(FILE_EXTENSIONS["zstd"]):
+        if zstandard is None:
+            raise ValueError("zstd files need the zstandard package")
+        raw = open(path, mode)
+        if mode == "rb":
+            return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+
+    return gzip.open(path, mode, compresslevel=6)
+
+
+def action_lines(action: Dict[str, Any]) -> bytes:
+    """Serializes a bulk action to its _bulk NDJSON lines. The _index is left out so
+    that the loader chooses the target index
+
+    Args:
+        action (Dict[str, Any]): Action from index_data or delete_data
+
+    Returns:
+        bytes: The action line, followed by the source line unless it is a delete
+    """
+    metadata, data = expand_action(action)
+    for params in metadata.values():
+        params.pop("_index", None)
+    lines = _serializer.dumps(metadata) + b"\n"
+    if data is not None:
+        lines += _serializer.dumps(data) + b"\n"
+
+    return lines
+
+
+class BulkFileWriter:
+    """Writes bulk actions to compressed NDJSON part files of an index directory,
+    a new part starts once max_file_bytes of NDJSON went into the current one"""
+
+    def __init__(
+        self,
+        directory: str,
+        compression: str = "gzip",
+        max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+    ):
+        """Initialization of the BulkFileWriter class
+
+        Args:
+            directory (str): Directory of the part files, created when missing
+            compression (str): One of COMPRESSIONS
+            max_file_bytes (int): Uncompressed size after which a new part starts
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unsupported compression: {compression}")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("zstd compression needs the zstandard package")
+
+        self.directory = directory
+        self.compression = compression
+        self.max_file_bytes = max_file_bytes
+        self.files = []
+        self._file = None
+        self._written = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, action: Dict[str, Any]):
+        """Appends an action, the lines of an action never span two parts
+
+        Args:
+            action (Dict[str, Any]): Action from index_data or delete_data
+        """
+        if self._file is None or self._written >= self.max_file_bytes:
+            self.rotate()
+        lines = action_lines(action)
+        self._file.write(lines)
+        self._written += len(lines)
+
+    def rotate(self):
+        """Closes the current part and opens the next one"""
+        self.close()
+        name = f"{PART_PREFIX}{len(self.files):05d}{FILE_EXTENSIONS[self.compression]}"
+        path = os.path.join(self.directory, name)
+        self._file = open_bulk_file(path, "wb")
+        self._written = 0
+        self.files.append(path)
+
+    def close(self):
+        """Closes the current part"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class BulkExportIndexer(ElasticSearchIndexer):
+    """Output sink with the interface of ElasticSearchIndexer which writes the bulk
+    actions to files of export_dir/index_name instead of sending them, so that
+    bulk_loader can load them into any cluster later"""
+
+    def __init__(
+        self,
+        export_dir: str,
+        index_name: str,
+        compression: str = "gzip",
+        max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        hash_store: str | None = None,
+        **unused_options,
+    ):
+        """Initialization of the BulkExportIndexer class
+
+        Args:
+            export_dir (str): Directory of the exports, one sub directory per index
+            index_name (str): name of the index
+            compression (str): One of COMPRESSIONS
+            max_file_bytes (int): Uncompressed size of NDJSON per part file
+            chunk_size (int): Number of actions per chunk of the summary
+            hash_store (str | None): Not supported, the hashes describe the content
+                of one cluster
+            **unused_options: Options of the cluster indexer (bulk_mode,
+                thread_count, ...) which do not apply to files
+        """
+        if hash_store:
+            raise ValueError("Change detection is not available for exports")
+
+        self.client = None
+        self.index_name = index_name
+        self.alias = index_name
+        self.bulk_mode = "export"
+        self.chunk_size = chunk_size
+        self.chunk_remaining = 0
+        self.pending_restore = None
+        self.retry = None
+        self.dead_letters = None
+        self.checkpoint = None
+        self.acknowledged = None
+        self.overwrite = False
+        self.directory = os.path.join(export_dir, index_name)
+        self.compression = compression
+        self.max_file_bytes = max_file_bytes
+        self.writer = None
+        self.type_of = None
+        self.open_hash_store(None)
+
+    def start(self):
+        """Removes the parts and the manifest of a previous export of the index, once
+        per run"""
+        if self.writer is None:
+            for path in glob.glob(os.path.join(self.directory, f"{PART_PREFIX}*")):
+                os.remove(path)
+            manifest = os.path.join(self.directory, MANIFEST_FILE)
+            if os.path.exists(manifest):
+                os.remove(manifest)
+            self.writer = BulkFileWriter(
+                self.directory, self.compression, self.max_file_bytes
+            )
+
+    def write_manifest(
+        self,
+        type_of: str,
+        settings: dict[str, Any] | None = None,
+        mappings: dict[str, Any] | None = None,
+    ):
+        """Writes the type of the export next to the part files, with the settings
+        and mappings the loader creates the index from. The op types of the actions
+        depend on it, the loader only accepts the same type
+
+        Args:
+            type_of (str): Type of: create, update or rebuild
+            settings (dict[str, Any] | None): settings for the index
+            mappings (dict[str, Any] | None): mappings for the index
+        """
+        self.start()
+        self.type_of = type_of
+        manifest = {"type_of": type_of}
+        if settings is not None:
+            manifest.update(settings=settings, mappings=mappings)
+        with open(os.path.join(self.directory, MANIFEST_FILE), "w") as file:
+            json.dump(manifest, file, indent=2)
+
+    def create_index(self, settings: dict[str, Any], mappings: dict[str, Any]) -> bool:
+        """Writes the settings and mappings next to the part files, the loader creates
+        the index from them
+
+        Args:
+            settings (dict[str, Any]): settings for the index
+            mappings (dict[str, Any]): mappings for the index
+
+        Returns:
+            bool: True
+        """
+        self.write_manifest("create", settings, mappings)
+        click.echo(f"Index '{self.index_name}' exported to {self.directory}")
+
+        return True
+
+    def rebuild_index(
+        self,
+        settings: dict[str, Any],
+        mappings: dict[str, Any],
+        load: Callable[[], Dict[str, Any] | None],
+    ) -> Dict[str, Any] | None:
+        """An export is a full copy of the index, the loader runs the rebuild
+
+        Args:
+            settings (dict[str, Any]): settings for the index
+            mappings (dict[str, Any]): mappings for the index
+            load (Callable[[], Dict[str, Any] | None]): Exports the documents
+
+        Returns:
+            Dict[str, Any] | None: Export summary
+        """
+        self.write_manifest("rebuild", settings, mappings)
+        click.echo(f"Index '{self.index_name}' exported to {self.directory}")
+
+        return load()
+
+    def bulk_index(self, actions: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Writes the actions to the part files
+
+        Args:
+            actions (Iterable[Dict[str, Any]]): Actions to be exported
+
+        Returns:
+            Dict[str, Any]: success count, every written action counts as a success,
+            and the part files
+        """
+        if self.type_of is None:
+            # neither created nor rebuilt, the actions update an existing index
+            self.write_manifest("update")
+        summary = {"success": 0, "failed": 0, "errors": [], "chunks": []}
+        try:
+            for action in actions:
+                self.writer.write(action)
+                self.add_result(summary, True, {})
+        finally:
+            self.writer.close()
+        summary["files"] = list(self.writer.files)
+        click.echo(
+            f"{summary['success']} actions written to {len(summary['files'])} files"
+        )
+
+        return summary
+
+
+def create_indexer(
+    es_host: str,
+    index_name: str,
+    export_dir: str | None = None,
+    export_compression: str = "gzip",
+    export_max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+    **indexer_options,
+) -> ElasticSearchIndexer:
+    """Indexer of an indexing module, a BulkExportIndexer when export_dir is set
+
+    Args:
+        es_host (str): Host of the ElasticSearch
+        index_name (str): name of the index
+        export_dir (str | None): Write the actions to files of this directory
+            instead of sending them
+        export_compression (str): One of COMPRESSIONS
+        export_max_file_bytes (int): Uncompressed size of NDJSON per part file
+        **indexer_options: ElasticSearchIndexer options, e.g. bulk_mode
+
+    Returns:
+        ElasticSearchIndexer: The indexer
+    """
+    if export_dir:
+        return BulkExportIndexer(
+            export_dir,
+            index_name,
+            export_compression,
+            export_max_file_bytes,
+            **indexer_options,
+        )
+
+    return ElasticSearchIndexer(es_host, index_name, **indexer_options)
+
+
+def export_options(command):
+    """Adds the export options to an indexer click command, they reach the command
+    as keyword arguments
+
+    Args:
+        command: click command function
+
+    Returns:
+        The decorated command
+    """
+    options = [
+        click.option(
+            "--export_dir",
+            type=click.Path(file_okay=False),
+            default=None,
+            help="Write the bulk actions to NDJSON files instead of sending them",
+        ),
+        click.option(
+            "--export_compression",
+            type=click.Choice(COMPRESSIONS),
+            default="gzip",
+            show_default=True,
+            help="Compression of the exported files",
+        ),
+        click.option(
+            "--export_max_file_bytes",
+            type=int,
+            default=DEFAULT_MAX_FILE_BYTES,
+            show_default=True,
+            help="Uncompressed NDJSON bytes per exported file",
+        ),
+    ]
+    for option in reversed(options):
+        command = option(command)
+
+    return command
@@ -0,0 +1,264 @@
+import click
+import glob
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, Tuple
+from index.bulk_export import MANIFEST_FILE, PART_PREFIX, open_bulk_file
+from index.metrics import metrics_options
+from index.elasticsearch_indexer import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_MAX_CHUNK_BYTES,
+    ElasticSearchIndexer,
+    bulk_options,
+)
+
+DEFAULT_LOAD_WORKERS = 4
+READ_BUFFER_SIZE = 1024 * 1024
+
+
+class BulkFileLoader:
+    """Loads the NDJSON files of a BulkExportIndexer into a cluster. The files are
+    sent as they are, without decoding the documents, one file per worker"""
+
+    def __init__(
+        self,
+        es_host: str,
+        export_dir: str,
+        index_name: str,
+        workers: int = DEFAULT_LOAD_WORKERS,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_chunk_bytes: int = DEFAULT_MAX_CHUNK_BYTES,
+        **indexer_options,
+    ):
+        """Initialization of the BulkFileLoader class
+
+        Args:
+            es_host (str): Host of the ElasticSearch
+            export_dir (str): Directory given to the export
+            index_name (str): name of the index, also the sub directory of its files
+            workers (int): Number of files loaded at the same time
+            chunk_size (int): Number of actions per bulk request
+            max_chunk_bytes (int): Maximum size of a bulk request in bytes
+            **indexer_options: ElasticSearchIndexer options, e.g. keep_generations
+        """
+        self.directory = os.path.join(export_dir, index_name)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.max_chunk_bytes = max_chunk_bytes
+        self.indexer = ElasticSearchIndexer(
+            es_host,
+            index_name,
+            chunk_size=chunk_size,
+            max_chunk_bytes=max_chunk_bytes,
+            **indexer_options,
+        )
+        self._lock = threading.Lock()
+
+    def manifest(self) -> Dict[str, Any]:
+        """Type, settings and mappings written by the export
+
+        Returns:
+            Dict[str, Any]: The manifest
+        """
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        if not os.path.exists(path):
+            raise ValueError(f"{path} is missing, export the index again")
+        with open(path) as file:
+            return json.load(file)
+
+    def files(self) -> list[str]:
+        """Part files of the index, in order
+
+        Returns:
+            list[str]: Paths of the part files
+        """
+        return sorted(glob.glob(os.path.join(self.directory, f"{PART_PREFIX}*")))
+
+    def read_chunks(self, path: str) -> Iterator[Tuple[bytes, int]]:
+        """Reads a part file through a buffered reader and groups its lines into bulk
+        request bodies of at most chunk_size actions and max_chunk_bytes
+
+        Args:
+            path (str): Part file
+
+        Yields:
+            Iterator[Tuple[bytes, int]]: The body and its number of actions
+        """
+        with io.BufferedReader(open_bulk_file(path), READ_BUFFER_SIZE) as file:
+            body = bytearray()
+            count = 0
+            for line in file:
+                # a delete has no source line
+                if not line.startswith(b'{"delete"'):
+                    line += file.readline()
+                if count and (
+                    count >= self.chunk_size
+                    or len(body) + len(line) > self.max_chunk_bytes
+                ):
+                    yield bytes(body), count
+                    body = bytearray()
+                    count = 0
+                body += line
+                count += 1
+            if count:
+                yield bytes(body), count
+
+    def load_file(self, path: str, summary: Dict[str, Any]):
+        """Sends the bulk requests of a part file
+
+        Args:
+            path (str): Part file
+            summary (Dict[str, Any]): Summary shared by the workers
+
+        Raises:
+            Exception: Raised when Elasticsearch rejects a whole bulk request
+        """
+        for body, _ in self.read_chunks(path):
+            # the client of the indexer retries the items rejected by a busy cluster
+            # and records the ones which still fail in the dead letter file
+            response = self.indexer.client.bulk(
+                index=self.indexer.index_name, operations=body
+            )
+            with self._lock:
+                for item in response["items"]:
+                    status = next(iter(item.values())).get("status", 500)
+                    self.indexer.add_result(summary, 200 <= status < 300, item)
+
+    def load(self) -> Dict[str, Any]:
+        """Loads every part file into the current index of the indexer
+
+        Returns:
+            Dict[str, Any]: Bulk indexing summary, with the number of files
+        """
+        files = self.files()
+        summary = {"success": 0, "failed": 0, "errors": [], "chunks": []}
+        try:
+            with ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="loader"
+            ) as executor:
+                for future in [
+                    executor.submit(self.load_file, path, summary) for path in files
+                ]:
+                    future.result()
+        finally:
+            self.indexer.finish_load()
+        summary["files"] = len(files)
+
+        return self.indexer.finish_summary(summary)
+
+    def run(self, type_of: str) -> Dict[str, Any] | None:
+        """Loads the export with the same index lifecycle as the indexers
+
+        Args:
+            type_of (str): Type of: create, update or rebuild
+
+        Returns:
+            Dict[str, Any] | None: Bulk indexing summary, None when the index was not
+            created
+
+        Raises:
+            ValueError: Raised when the export was written with another type_of, its
+            actions would fail, e.g. create actions against existing documents
+        """
+        manifest = self.manifest()
+        if manifest.get("type_of") != type_of:
+            raise ValueError(
+                f"{self.directory} was exported with --type_of "
+                f"{manifest.get('type_of')}, load it with the same --type_of"
+            )
+        if type_of == "create":
+            if not self.indexer.create_index(manifest["settings"], manifest["mappings"]):
+                return None
+            return self.load()
+        if type_of == "rebuild":
+            return self.indexer.rebuild_index(
+                manifest["settings"], manifest["mappings"], self.load
+            )
+
+        return self.load()
+
+
+def exported_indices(export_dir: str) -> list[str]:
+    """Names of the indices exported to a directory
+
+    Args:
+        export_dir (str): Directory given to the export
+
+    Returns:
+        list[str]: Index names
+    """
+    return sorted(
+        name
+        for name in os.listdir(export_dir)
+        if glob.glob(os.path.join(export_dir, name, f"{PART_PREFIX}*"))
+    )
+
+
+@click.command()
+@click.option(
+    "--export_dir",
+    "-d",
+    type=click.Path(exists=True, file_okay=False),
+    help="Directory given to the export",
+    required=True,
+)
+@click.option("--es_host", "-es", type=str, help="ElasticSearch host", required=True)
+@click.option(
+    "--type_of", "-t", type=str, help="Update, create or rebuild an index", required=True
+)
+@click.option(
+    "--index_name",
+    "-i",
+    multiple=True,
+    help="Index to load, every exported index when omitted",
+)
+@click.option(
+    "--workers",
+    "-w",
+    type=int,
+    default=DEFAULT_LOAD_WORKERS,
+    show_default=True,
+    help="Number of files loaded at the same time",
+)
+@bulk_options
+@metrics_options
+def load_data(
+    export_dir: str,
+    es_host: str,
+    type_of: str,
+    index_name: tuple,
+    workers: int,
+    **indexer_options,
+):
+    """Loads exported NDJSON files into a cluster
+
+    Args:
+        export_dir (str): Directory given to the export
+        es_host (str): ElasticSearch host
+        type_of (str): Type of: create, update or rebuild
+        index_name (tuple): Indices to load
+        workers (int): Number of files loaded at the same time
+        **indexer_options: ElasticSearchIndexer options, e.g. keep_generations
+    """
+    run(export_dir, es_host, type_of, list(index_name), workers, **indexer_options)
+
+
+# Enables programmatic use (from main.py)
+def run(
+    export_dir, es_host, type_of, index_names=None, workers=DEFAULT_LOAD_WORKERS,
+    **indexer_options,
+):
+    results = {}
+    for name in index_names or exported_indices(export_dir):
+        loader = BulkFileLoader(es_host, export_dir, name, workers, **indexer_options)
+        results[name] = loader.run(type_of)
+        click.echo(f"Index '{name}' loaded from {loader.directory}")
+
+    return results
+
+
+if __name__ == "__main__":
+    load_data()
@@ -0,0 +1,187 @@
+import click
+import json
+import os
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict
+
+
+class Checkpoint:
+    """Progress of a file or sample run in a local JSON state file. The readers go
+    through the rows in key order and Elasticsearch acknowledges the actions in the
+    order they were sent, so every key up to the one of the last acknowledged action
+    is done. A rejected action stops the window before its key, a resumed run sends
+    it again. The state is written whenever a bulk chunk is confirmed, and a resumed
+    run only reads the rows after it"""
+
+    def __init__(self, path: str, params: Dict[str, Any], resume: bool = False):
+        """Initialization of the Checkpoint class
+
+        Args:
+            path (str): State file, written atomically
+            params (Dict[str, Any]): Parameters of the run, a resumed run must use
+                the same ones
+            resume (bool): Continue from the state file of an interrupted run
+
+        Raises:
+            FileNotFoundError: Resuming without a state file
+            ValueError: Resuming with other parameters than the interrupted run
+        """
+        self.path = path
+        self.params = params
+        self.state = self.load() if resume else None
+        state = self.state or {}
+        if self.state is not None and state["params"] != params:
+            changed = sorted(
+                key
+                for key in set(params) | set(state["params"])
+                if params.get(key) != state["params"].get(key)
+            )
+            raise ValueError(
+                f"Checkpoint {path} was written with other parameters: "
+                f"{', '.join(changed)}"
+            )
+        self.last_key = state.get("last_key")
+        self.index_name = state.get("index_name")
+        self.pending_restore = state.get("pending_restore")
+        self.previous = {
+            "success": state.get("success", 0),
+            "failed": state.get("failed", 0),
+        }
+        self.success = self.previous["success"]
+        self.failed = self.previous["failed"]
+        # keys of the built actions waiting for their acknowledgement, in send order
+        self._pending = deque()
+        # the first action Elasticsearch rejected in this run closes the window
+        self.rejected = False
+
+    @property
+    def resumed(self) -> bool:
+        """Whether the run continues an interrupted one
+
+        Returns:
+            bool: True when the state file was loaded
+        """
+        return self.state is not None
+
+    def load(self) -> Dict[str, Any]:
+        """Reads the state file
+
+        Returns:
+            Dict[str, Any]: The state
+        """
+        with open(self.path) as file:
+            return json.load(file)
+
+    def save(self):
+        """Writes the state file through a temporary file, so that a crash never
+        leaves a truncated one"""
+        state = {
+            "params": self.params,
+            "index_name": self.index_name,
+            "pending_restore": self.pending_restore,
+            "last_key": self.last_key,
+            "success": self.success,
+            "failed": self.failed,
+            "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as file:
+            json.dump(state, file, indent=2)
+        os.replace(temporary, self.path)
+
+    def built(self, key: Any):
+        """Registers the key of an action handed to the sender
+
+        Args:
+            key (Any): Key of the row in reader order, e.g. the file_id
+        """
+        self._pending.append(key)
+
+    def acknowledge(self, ok: bool):
+        """Registers the response of the oldest action waiting for it. The window
+        and its counts only move while no action of the run was rejected
+
+        Args:
+            ok (bool): Whether Elasticsearch accepted the action
+        """
+        key = self._pending.popleft()
+        if not ok:
+            self.rejected = True
+        if not self.rejected:
+            self.last_key = key
+            self.success += 1
+
+    def add_previous(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Adds the counts of the interrupted run to the summary of a resumed one, so
+        that the summary covers the whole index
+
+        Args:
+            result (Dict[str, Any]): Bulk indexing summary of this run
+
+        Returns:
+            Dict[str, Any]: The summary, with the key and the counts it resumed from
+            under "resumed"
+        """
+        if self.resumed:
+            result["resumed"] = {"last_key": self.state.get("last_key"), **self.previous}
+            result["success"] += self.previous["success"]
+            result["failed"] += self.previous["failed"]
+
+        return result
+
+    def run(self, indexer, load: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Runs the load of an indexer with checkpoints, and removes the state file
+        once it completed
+
+        Args:
+            indexer: ElasticSearchIndexer, loading into its current index_name
+            load (Callable[[], Dict[str, Any]]): Sends the actions and returns the
+                bulk_index summary, e.g. IndexingPipeline.run
+
+        Returns:
+            Dict[str, Any]: The summary, with the counts of the interrupted run
+        """
+        if self.resumed and indexer.pending_restore is None:
+            indexer.pending_restore = self.pending_restore
+        self.index_name = indexer.index_name
+        self.pending_restore = indexer.pending_restore
+        self.save()
+        indexer.checkpoint = self
+        try:
+            result = load()
+        finally:
+            indexer.checkpoint = None
+        os.remove(self.path)
+
+        return self.add_previous(result)
+
+
+def checkpoint_options(command):
+    """Adds the checkpoint options to an indexer click command, they reach the
+    command as keyword arguments
+
+    Args:
+        command: click command function
+
+    Returns:
+        The decorated command
+    """
+    options = [
+        click.option(
+            "--checkpoint_file",
+            type=click.Path(dir_okay=False),
+            default=None,
+            help="State file of the progress, written as bulk chunks are confirmed",
+        ),
+        click.option(
+            "--resume/--no-resume",
+            default=False,
+            help="Continue an interrupted run from its --checkpoint_file",
+        ),
+    ]
+    for option in reversed(options):
+        command = option(command)
+
+    return command
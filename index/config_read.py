@@ -1,4 +1,5 @@
 from configparser import ConfigParser
+from index.db_connection import DEFAULT_POOL_SIZE
 
 
 def read_from_config_file(config_file: str) -> dict[str, any]:
@@ -18,5 +19,7 @@ def read_from_config_file(config_file: str) -> dict[str, any]:
     data["user"] = config["database"]["user"]
     data["database"] = config["database"]["name"]
     data["password"] = config["database"]["password"]
+    data["pool_size"] = config["database"].getint("pool_size", fallback=DEFAULT_POOL_SIZE)
+    data["reference_snapshot"] = config["database"].get("reference_snapshot", fallback=None)
 
     return data
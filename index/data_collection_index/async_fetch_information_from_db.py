@@ -0,0 +1,137 @@
+import asyncio
+from collections import defaultdict
+from index.db_connection import AsyncConnectionProvider
+from typing import Any
+from .fetch_information_from_db import (
+    DCDetailsFetcher,
+    SELECT_ALL_DC_SQL,
+    SELECT_SAMPLES_COUNT_SQL,
+    SELECT_POPULATION_COUNT_SQL,
+    PUBLICATION_INFO_SQL,
+    ANALYSIS_INFO_SQL,
+    PRELOAD_SAMPLES_COUNT_SQL,
+    PRELOAD_POPULATION_COUNT_SQL,
+    PRELOAD_PUBLICATION_SQL,
+    PRELOAD_ANALYSIS_SQL,
+)
+
+
+class AsyncDCDetailsFetcher(DCDetailsFetcher):
+    """DataCollectionDetails Fetcher running its queries on an asyncio event loop"""
+
+    def __init__(self, db_config: dict):
+        """Initialization of the AsyncDCDetailsFetcher class
+
+        Args:
+            db_config (dict): DB configuration
+        """
+        super().__init__(db_config)
+        self.async_provider = AsyncConnectionProvider(db_config)
+
+    async def fetch_datacollections(self) -> list[tuple]:
+        """Fetch dataCollections from the database
+
+        Returns:
+            list[tuple]: List of rows from the database
+        """
+        return await self.async_provider.fetchall(SELECT_ALL_DC_SQL)
+
+    async def fetch_samples_count(self, dc_id: int) -> int:
+        """Fetching samples count from the database
+
+        Args:
+            dc_id (int): Datacollection id
+
+        Returns:
+            int: The sample count
+        """
+        rows = await self.async_provider.fetchall(SELECT_SAMPLES_COUNT_SQL, (dc_id,))
+        return rows[0][0]
+
+    async def fetch_population_count(self, dc_id: int) -> int:
+        """Fetch population count from the database
+
+        Args:
+            dc_id (int): Datacollection id
+
+        Returns:
+            int: The population count
+        """
+        rows = await self.async_provider.fetchall(
+            SELECT_POPULATION_COUNT_SQL, (dc_id,)
+        )
+        return rows[0][0]
+
+    async def fetch_publication_info(self, dc_id: int) -> list[tuple]:
+        """Fetches publication from the database for each datacollection id
+
+        Args:
+            dc_id (int): Datacollection id
+
+        Returns:
+            list[tuple]: List of rows of information from the database
+        """
+        return await self.async_provider.fetchall(PUBLICATION_INFO_SQL, (dc_id,))
+
+    async def fetch_analysis_information(self, dc_id: int) -> list[tuple]:
+        """Fetches Analysis group information from the database
+
+        Args:
+            dc_id (int): Data collection id
+
+        Returns:
+            list[tuple]: List of rows of information from the database
+        """
+        return await self.async_provider.fetchall(ANALYSIS_INFO_SQL, (dc_id,))
+
+    async def preload_data(self) -> tuple[dict, dict, defaultdict, defaultdict]:
+        """Preload the counts, publications and analysis information of every data
+        collection with one grouped query each, the four queries run concurrently
+
+        Returns:
+            tuple[dict, dict, defaultdict, defaultdict]: Sample counts, population counts,
+            publication rows and analysis rows, keyed by data_collection_id
+        """
+        samples, populations, publications, analysis = await asyncio.gather(
+            self.async_provider.fetchall(PRELOAD_SAMPLES_COUNT_SQL),
+            self.async_provider.fetchall(PRELOAD_POPULATION_COUNT_SQL),
+            self.async_provider.fetchall(PRELOAD_PUBLICATION_SQL),
+            self.async_provider.fetchall(PRELOAD_ANALYSIS_SQL),
+        )
+        publication_map = defaultdict(list)
+        for row in publications:
+            publication_map[row[0]].append(row[1:])
+        analysis_map = defaultdict(list)
+        for row in analysis:
+            analysis_map[row[0]].append(row[1:])
+
+        return dict(samples), dict(populations), publication_map, analysis_map
+
+    async def populate_the_dictionary_structure(
+        self, row: tuple, preloaded: tuple | None = None
+    ) -> dict[str, Any]:
+        """Populating the dataCollection dictionary, the four queries of a collection
+        run concurrently when nothing was preloaded
+
+        Args:
+            row (tuple): The row containing info from the fetch_datacollections
+            preloaded (tuple | None): Maps from preload_data, the collection is queried
+                on its own when None
+
+        Returns:
+            dict[str, Any]: Updated dictionary
+        """
+        if preloaded is not None:
+            return super().populate_the_dictionary_structure(row, preloaded)
+
+        results = await asyncio.gather(
+            self.fetch_samples_count(row[0]),
+            self.fetch_population_count(row[0]),
+            self.fetch_publication_info(row[0]),
+            self.fetch_analysis_information(row[0]),
+        )
+        return self.build_the_dictionary_structure(row, *results)
+
+    async def close(self):
+        """Closes the idle connections"""
+        await self.async_provider.close()
@@ -0,0 +1,107 @@
+import asyncio
+import click
+from typing import Any, AsyncIterator
+from index.async_elasticsearch_indexer import AsyncElasticSearchIndexer
+from index.config_read import read_from_config_file
+from index.pipeline import DEFAULT_QUEUE_SIZE
+from .async_fetch_information_from_db import AsyncDCDetailsFetcher
+from .indexing import DataCollectionsIndexer
+
+
+class AsyncDataCollectionsIndexer(DataCollectionsIndexer):
+    """DataCollectionsIndexer running on an asyncio event loop"""
+
+    def __init__(
+        self,
+        config_file: str,
+        es_host: str,
+        type_of: str,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        **indexer_options,
+    ):
+        """Initialization of the AsyncDataCollectionsIndexer
+
+        Args:
+            config_file (str): Configuration file
+            es_host (str): ElasticSearch Host
+            type_of (str): Type of: create or update
+            queue_size (int): Maximum number of actions extracted ahead of the bulk
+                requests
+            **indexer_options: AsyncElasticSearchIndexer options, e.g. chunk_size
+        """
+        if type_of == "rebuild":
+            raise ValueError("Rebuilds are only supported by the sync engine")
+
+        self.type_of = type_of
+        self.queue_size = queue_size
+        self.data = read_from_config_file(config_file)
+        self.fetcher = AsyncDCDetailsFetcher(self.data)
+        self.indexer = AsyncElasticSearchIndexer(
+            es_host, "data_collections", queue_size=queue_size, **indexer_options
+        )
+
+    async def create_data_collections_index(self) -> bool:
+        """Create data collections index
+
+        Returns:
+            bool: True or False if index is created
+        """
+        json_data = self.load_json_file()
+        return await self.indexer.create_index(
+            json_data["settings"], json_data["mappings"]
+        )
+
+    async def build_action(self, row: tuple, preloaded: tuple) -> dict[str, Any]:
+        """Build the bulk action of a data collection
+
+        Args:
+            row (tuple): A row from fetch_datacollections
+            preloaded (tuple): Maps from preload_data
+
+        Returns:
+            dict[str, Any]: Bulk action
+        """
+        dc_data = await self.fetcher.populate_the_dictionary_structure(row, preloaded)
+        return self.indexer.index_data(dc_data, row[1], self.type_of)
+
+    async def generate_actions(self) -> AsyncIterator[dict[str, Any]]:
+        """Generate actions that will be used for bulk index, from the data
+        collections and the maps preloaded at the same time
+
+        Yields:
+            AsyncIterator[dict[str, Any]]: Bulk actions, in the order of the table
+        """
+        rows, preloaded = await asyncio.gather(
+            self.fetcher.fetch_datacollections(), self.fetcher.preload_data()
+        )
+        for row in rows:
+            action = await self.build_action(row, preloaded)
+            if action is not None:
+                yield action
+
+    async def build_and_index_datacollections(self):
+        """Build and index dataCollections
+
+        Returns:
+            dict[str, Any] | None: Bulk indexing summary, None when the index was not created
+        """
+        result = None
+        try:
+            if self.type_of != "create" or await self.create_data_collections_index():
+                result = await self.indexer.load_index(
+                    lambda: self.indexer.bulk_index(self.generate_actions())
+                )
+                click.echo("Bulk indexing successful")
+        finally:
+            await self.fetcher.close()
+            await self.indexer.close()
+
+        return result
+
+
+# Enables programmatic use (from main.py)
+def run(config_file, es_host, type_of, **indexer_options):
+    indexer = AsyncDataCollectionsIndexer(
+        config_file, es_host, type_of, **indexer_options
+    )
+    return asyncio.run(indexer.build_and_index_datacollections())
@@ -1,22 +1,98 @@
-from mysql.connector import connect
+from index.db_connection import get_connection_provider
+from index.join_staging import get_join_staging
+from index.reference_cache import get_reference_data
+from collections import defaultdict
 from typing import Any
 from .utils import create_the_dictionary_structure
 
+SELECT_ALL_DC_SQL = "SELECT * from data_collection"
+
+SELECT_SAMPLES_COUNT_SQL = """ SELECT count(samples.sample_id) AS num_samples
+                        FROM (
+                        SELECT DISTINCT sf.sample_id
+                        FROM sample_file sf, file_data_collection fdc
+                        WHERE sf.file_id = fdc.file_id AND fdc.data_collection_id = %s
+                    ) AS samples """
+
+SELECT_POPULATION_COUNT_SQL = """ SELECT count(*) AS num_populations
+                                FROM (
+                            SELECT DISTINCT dcsp.population_id
+                            FROM sample_file sf,
+                                file_data_collection fdc,
+                                sample s,
+                                dc_sample_pop_assign dcsp
+                            WHERE dcsp.data_collection_id = fdc.data_collection_id
+                            AND dcsp.sample_id = s.sample_id
+                            AND s.sample_id = sf.sample_id
+                            AND sf.file_id = fdc.file_id
+                            AND fdc.data_collection_id = %s
+                        ) AS populations """
+
+PUBLICATION_INFO_SQL = """Select * from publications where data_collection_id=%s and publication is NOT NULL"""
+
+ANALYSIS_INFO_SQL = """SELECT dt.code data_type, ag.description analysis_group
+            FROM file f LEFT JOIN data_type dt ON f.data_type_id = dt.data_type_id
+            LEFT JOIN analysis_group ag ON f.analysis_group_id = ag.analysis_group_id
+            INNER JOIN file_data_collection fdc ON f.file_id=fdc.file_id
+            WHERE fdc.data_collection_id= %s
+            GROUP BY dt.data_type_id, ag.analysis_group_id """
+
+PRELOAD_SAMPLES_COUNT_SQL = """SELECT fdc.data_collection_id, count(DISTINCT sf.sample_id) AS num_samples
+                        FROM sample_file sf, file_data_collection fdc
+                        WHERE sf.file_id = fdc.file_id
+                        GROUP BY fdc.data_collection_id"""
+
+PRELOAD_POPULATION_COUNT_SQL = """SELECT fdc.data_collection_id, count(DISTINCT dcsp.population_id) AS num_populations
+                            FROM sample_file sf,
+                                file_data_collection fdc,
+                                sample s,
+                                dc_sample_pop_assign dcsp
+                            WHERE dcsp.data_collection_id = fdc.data_collection_id
+                            AND dcsp.sample_id = s.sample_id
+                            AND s.sample_id = sf.sample_id
+                            AND sf.file_id = fdc.file_id
+                            GROUP BY fdc.data_collection_id"""
+
+PRELOAD_PUBLICATION_SQL = """Select data_collection_id, publications.* from publications where publication is NOT NULL"""
+
+PRELOAD_ANALYSIS_SQL = """SELECT fdc.data_collection_id, dt.code data_type, ag.description analysis_group
+            FROM file f LEFT JOIN data_type dt ON f.data_type_id = dt.data_type_id
+            LEFT JOIN analysis_group ag ON f.analysis_group_id = ag.analysis_group_id
+            INNER JOIN file_data_collection fdc ON f.file_id=fdc.file_id
+            GROUP BY fdc.data_collection_id, dt.data_type_id, ag.analysis_group_id """
+
+PRELOAD_ANALYSIS_IDS_SQL = """SELECT fdc.data_collection_id, f.data_type_id, f.analysis_group_id
+            FROM file f INNER JOIN file_data_collection fdc ON f.file_id=fdc.file_id
+            GROUP BY fdc.data_collection_id, f.data_type_id, f.analysis_group_id """
+
 
 class DCDetailsFetcher:
     """DataCollectionDetails Fetcher class"""
 
-    def __init__(self, db_config: dict):
+    def __init__(
+        self, db_config: dict, join_reference: bool = False, stage_joins: bool = False
+    ):
         """Initialization of the DCDetailsFetcher clasd
 
         Args:
             db_config (dict): DB configuration
+            join_reference (bool): Read the data collections, data types and analysis
+                groups from ReferenceData instead of joining them in SQL
+            stage_joins (bool): Read the sample counts and the analysis information
+                from the JoinStaging of the run, needs join_reference
         """
+        if stage_joins and not join_reference:
+            raise ValueError("stage_joins needs join_reference")
         self.host = db_config["host"]
         self.port = db_config["port"]
         self.user = db_config["user"]
         self.password = db_config["password"]
         self.database = db_config["database"]
+        self.connection_provider = get_connection_provider(db_config)
+        self.db_config = db_config
+        self.join_reference = join_reference
+        self.reference = get_reference_data(db_config) if join_reference else None
+        self.staging = get_join_staging(db_config) if stage_joins else None
 
     def fetch_datacollections(self) -> list[tuple]:
         """Fetch dataCollections from the database
@@ -24,23 +100,16 @@ class DCDetailsFetcher:
         Returns:
             list[tuple]: List of rows from the database
         """
+        if self.join_reference:
+            return self.reference.rows("data_collection")
 
-        select_all_dc_sql = "SELECT * from data_collection"
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(SELECT_ALL_DC_SQL)
+            data_collections = cursor.fetchall()
+            cursor.close()
 
-        db = connect(
-            host=self.host,
-            port=self.port,
-            user=self.user,
-            database=self.database,
-            password=self.password,
-        )
-
-        cursor = db.cursor()
-        cursor.execute(select_all_dc_sql)
-        data_collection = cursor.fetchall()
-        cursor.close()
-
-        return data_collection
+        return data_collections
 
     def fetch_samples_count(self, dc_id: int) -> int:
         """Fetching samples count from the database
@@ -51,26 +120,14 @@ class DCDetailsFetcher:
         Returns:
             int: The sample count
         """
+        if self.staging is not None:
+            return self.staging.samples_count(dc_id)
 
-        select_samples_count = """ SELECT count(samples.sample_id) AS num_samples
-                        FROM (
-                        SELECT DISTINCT sf.sample_id
-                        FROM sample_file sf, file_data_collection fdc
-                        WHERE sf.file_id = fdc.file_id AND fdc.data_collection_id = %s
-                    ) AS samples """
-
-        db = connect(
-            host=self.host,
-            port=self.port,
-            user=self.user,
-            database=self.database,
-            password=self.password,
-        )
-        cursor = db.cursor()
-        cursor.execute(select_samples_count, (dc_id,))
-        samples_count = cursor.fetchone()[0]
-        cursor.close()
-        db.close()
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(SELECT_SAMPLES_COUNT_SQL, (dc_id,))
+            samples_count = cursor.fetchone()[0]
+            cursor.close()
 
         return samples_count
 
@@ -84,32 +141,11 @@ class DCDetailsFetcher:
             int: The population count
         """
 
-        select_population_count = """ SELECT count(*) AS num_populations
-                                FROM (
-                            SELECT DISTINCT dcsp.population_id
-                            FROM sample_file sf,
-                                file_data_collection fdc,
-                                sample s,
-                                dc_sample_pop_assign dcsp
-                            WHERE dcsp.data_collection_id = fdc.data_collection_id
-                            AND dcsp.sample_id = s.sample_id
-                            AND s.sample_id = sf.sample_id
-                            AND sf.file_id = fdc.file_id
-                            AND fdc.data_collection_id = %s
-                        ) AS populations """
-
-        db = connect(
-            host=self.host,
-            port=self.port,
-            user=self.user,
-            database=self.database,
-            password=self.password,
-        )
-        cursor = db.cursor()
-        cursor.execute(select_population_count, (dc_id,))
-        population_count = cursor.fetchone()[0]
-        cursor.close()
-        db.close()
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(SELECT_POPULATION_COUNT_SQL, (dc_id,))
+            population_count = cursor.fetchone()[0]
+            cursor.close()
 
         return population_count
 
@@ -123,21 +159,11 @@ class DCDetailsFetcher:
             list[tuple]: List of rows of information from the database
         """
 
-        publication_info_sql = """Select * from publications where data_collection_id=%s and publication is NOT NULL"""
-
-        db = connect(
-            host=self.host,
-            port=self.port,
-            user=self.user,
-            database=self.database,
-            password=self.password,
-        )
-
-        cursor = db.cursor()
-        cursor.execute(publication_info_sql, (dc_id,))
-        publication_info = cursor.fetchall()
-        cursor.close()
-        db.close()
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(PUBLICATION_INFO_SQL, (dc_id,))
+            publication_info = cursor.fetchall()
+            cursor.close()
 
         return publication_info
 
@@ -150,34 +176,136 @@ class DCDetailsFetcher:
         Returns:
             list[tuple]: List of rows of information from the database
         """
-        analysis_info_sql = """SELECT dt.code data_type, ag.description analysis_group
-            FROM file f LEFT JOIN data_type dt ON f.data_type_id = dt.data_type_id
-            LEFT JOIN analysis_group ag ON f.analysis_group_id = ag.analysis_group_id
-            INNER JOIN file_data_collection fdc ON f.file_id=fdc.file_id
-            WHERE fdc.data_collection_id= %s
-            GROUP BY dt.data_type_id, ag.analysis_group_id """
-
-        db = connect(
-            host=self.host,
-            port=self.port,
-            user=self.user,
-            database=self.database,
-            password=self.password,
-        )
+        if self.staging is not None:
+            return self.resolve_analysis_rows(self.staging.collection_analysis(dc_id))
 
-        cursor = db.cursor()
-        cursor.execute(analysis_info_sql, (dc_id,))
-        analysis_info = cursor.fetchall()
-        cursor.close()
-        db.close()
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(ANALYSIS_INFO_SQL, (dc_id,))
+            analysis_info = cursor.fetchall()
+            cursor.close()
 
         return analysis_info
 
-    def populate_the_dictionary_structure(self, row: tuple) -> dict[str, Any]:
+    def resolve_analysis_rows(self, rows: list[tuple]) -> list[tuple]:
+        """Joins (data_type_id, analysis_group_id) rows with ReferenceData, like the
+        left joins of the analysis queries
+
+        Args:
+            rows (list[tuple]): Rows of the ids query or of the staged join
+
+        Returns:
+            list[tuple]: Rows with the shape of fetch_analysis_information
+        """
+        reference = self.reference
+        return [
+            (
+                reference.value("data_type", data_type_id, "code"),
+                reference.value("analysis_group", analysis_group_id, "description"),
+            )
+            for data_type_id, analysis_group_id in rows
+        ]
+
+    def preload_data(self) -> tuple[dict, dict, defaultdict, defaultdict]:
+        """Preload the counts, publications and analysis information of every data
+        collection with one grouped query each, instead of four queries per collection
+
+        Returns:
+            tuple[dict, dict, defaultdict, defaultdict]: Sample counts, population counts,
+            publication rows and analysis rows, keyed by data_collection_id
+        """
+        samples_count_map = {}
+        population_count_map = {}
+        publication_map = defaultdict(list)
+        analysis_map = defaultdict(list)
+        staging = self.staging
+        if staging is not None:
+            samples_count_map.update(staging.samples_counts)
+            for dc_id in staging.analysis_rows:
+                analysis_map[dc_id] = self.resolve_analysis_rows(
+                    staging.collection_analysis(dc_id)
+                )
+
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+
+            if staging is None:
+                cursor.execute(PRELOAD_SAMPLES_COUNT_SQL)
+                for dc_id, samples_count in cursor.fetchall():
+                    samples_count_map[dc_id] = samples_count
+
+            cursor.execute(PRELOAD_POPULATION_COUNT_SQL)
+            for dc_id, population_count in cursor.fetchall():
+                population_count_map[dc_id] = population_count
+
+            # rows keep the shape of fetch_publication_info and fetch_analysis_information
+            cursor.execute(PRELOAD_PUBLICATION_SQL)
+            for row in cursor.fetchall():
+                publication_map[row[0]].append(row[1:])
+
+            # the staged join already gave the analysis rows
+            if self.join_reference and staging is None:
+                cursor.execute(PRELOAD_ANALYSIS_IDS_SQL)
+                for dc_id, *ids in cursor.fetchall():
+                    analysis_map[dc_id].extend(self.resolve_analysis_rows([ids]))
+            elif not self.join_reference:
+                cursor.execute(PRELOAD_ANALYSIS_SQL)
+                for row in cursor.fetchall():
+                    analysis_map[row[0]].append(row[1:])
+
+            cursor.close()
+
+        return samples_count_map, population_count_map, publication_map, analysis_map
+
+    def populate_the_dictionary_structure(
+        self, row: tuple, preloaded: tuple | None = None
+    ) -> dict[str, Any]:
         """Populating the dataCollection dictionary
 
         Args:
             row (tuple): The row containing info from the fetch_datacollections
+            preloaded (tuple | None): Maps from preload_data, the collection is queried
+                on its own when None
+
+        Returns:
+            dict[str, Any]: Updated dictionary
+        """
+        if preloaded is not None:
+            samples_count_map, population_count_map, publication_map, analysis_map = (
+                preloaded
+            )
+            return self.build_the_dictionary_structure(
+                row,
+                samples_count_map.get(row[0], 0),
+                population_count_map.get(row[0], 0),
+                publication_map.get(row[0], []),
+                analysis_map.get(row[0], []),
+            )
+
+        return self.build_the_dictionary_structure(
+            row,
+            self.fetch_samples_count(row[0]),
+            self.fetch_population_count(row[0]),
+            self.fetch_publication_info(row[0]),
+            self.fetch_analysis_information(row[0]),
+        )
+
+    def build_the_dictionary_structure(
+        self,
+        row: tuple,
+        samples_count: int,
+        population_count: int,
+        publications: list[tuple],
+        analysis_info: list[tuple],
+    ) -> dict[str, Any]:
+        """Building the dataCollection dictionary from the fetched information
+
+        Args:
+            row (tuple): The row containing info from the fetch_datacollections
+            samples_count (int): The sample count
+            population_count (int): The population count
+            publications (list[tuple]): Rows from fetch_publication_info
+            analysis_info (list[tuple]): Rows from fetch_analysis_information
 
         Returns:
             dict[str, Any]: Updated dictionary
@@ -190,18 +318,16 @@ class DCDetailsFetcher:
                 "shortTitle": row[3],
                 "dataReusePolicy": row[5],
                 "website": row[7],
-                "samples": {"count": self.fetch_samples_count(row[0])},
-                "populations": {"count": self.fetch_population_count(row[0])},
+                "samples": {"count": samples_count},
+                "populations": {"count": population_count},
             }
         )
 
-        publications = self.fetch_publication_info(row[0])
         for pub in publications:
             dc_data["publications"].append(
                 {"displayOrder": pub[2], "name": pub[3], "url": pub[1]}
             )
 
-        analysis_info = self.fetch_analysis_information(row[0])
         for category, data in analysis_info:
             if category not in dc_data:
                 dc_data[category] = []
@@ -1,10 +1,13 @@
 import click
 from typing import Any
 import json
-from index.elasticsearch_indexer import ElasticSearchIndexer
+from index.elasticsearch_indexer import bulk_options
+from index.bulk_export import create_indexer, export_options
+from index.metrics import metrics_options
 from .fetch_information_from_db import DCDetailsFetcher
 from index.config_read import read_from_config_file
-from elasticsearch.helpers import BulkIndexError
+from index.join_staging import staging_options
+from index.pipeline import IndexingPipeline, DEFAULT_QUEUE_SIZE, pipeline_options
 
 
 json_file = "index/data_collection_index/data_collections.json"
@@ -13,19 +16,37 @@ json_file = "index/data_collection_index/data_collections.json"
 class DataCollectionsIndexer:
     """DataCollectionsIndexer class"""
 
-    def __init__(self, config_file: str, es_host: str, type_of: str):
+    def __init__(
+        self,
+        config_file: str,
+        es_host: str,
+        type_of: str,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        stage_joins: bool = False,
+        **indexer_options,
+    ):
         """Initialization of the DataCollectionsIndexer
 
         Args:
             config_file (str): Configuration file
             es_host (str): ElasticSearch Host
             type_of (str): Type of: create or update
+            queue_size (int): Maximum number of items waiting between two pipeline stages
+            stage_joins (bool): Read the sample counts and the analysis information
+                from the JoinStaging shared by the indexers of the run
+            **indexer_options: ElasticSearchIndexer options, e.g. bulk_mode, or the
+                export options of create_indexer
         """
 
         self.type_of = type_of
+        self.queue_size = queue_size
         self.data = read_from_config_file(config_file)
-        self.fetcher = DCDetailsFetcher(self.data)
-        self.indexer = ElasticSearchIndexer(es_host, "data_collections")
+        self.fetcher = DCDetailsFetcher(
+            self.data, join_reference=True, stage_joins=stage_joins
+        )
+        self.indexer = create_indexer(
+            es_host, "data_collections", **indexer_options
+        )
 
     def load_json_file(self) -> dict[str, Any]:
         """Loading Json file to get the settings and the mappings
@@ -51,29 +72,65 @@ class DataCollectionsIndexer:
 
         return data_collection
 
+    def read_datacollections(self):
+        """Read data collections from the DB, together with the preloaded maps
+
+        Yields:
+            tuple: (row, preloaded) for every data collection
+        """
+        preloaded = self.fetcher.preload_data()
+        for row in self.fetcher.fetch_datacollections():
+            yield row, preloaded
+
+    def build_action(self, item: tuple) -> dict[str, Any]:
+        """Build the bulk action of a data collection
+
+        Args:
+            item (tuple): An item from read_datacollections
+
+        Returns:
+            dict[str, Any]: Bulk action
+        """
+        row, preloaded = item
+        code = row[1]
+        dc_data = self.fetcher.populate_the_dictionary_structure(row, preloaded)
+        return self.indexer.index_data(dc_data, code, self.type_of)
+
     def build_and_index_datacollections(self):
-        """Build and index dataCollections"""
-        actions = []
-        data_collection = self.fetcher.fetch_datacollections()
-        for row in data_collection:
-            code = row[1]
-            dc_data = self.fetcher.populate_the_dictionary_structure(row)
-            action = self.indexer.index_data(dc_data, code, self.type_of)
-            actions.append(action)
-
-        try:
-            if self.type_of == "create":
-                if self.create_data_collections_index() is True:
-                    self.indexer.bulk_index(actions)
-                    click.echo(f"Bulk indexing successful")
+        """Build and index dataCollections
+
+        Returns:
+            dict[str, Any] | None: Bulk indexing summary, None when the index was not created
+        """
+        pipeline = IndexingPipeline(
+            self.read_datacollections,
+            self.build_action,
+            self.indexer.bulk_index,
+            self.queue_size,
+            name=self.indexer.alias,
+        )
+        result = None
+        if self.type_of == "create":
+            if self.create_data_collections_index() is True:
+                result = self.indexer.load_index(pipeline.run)
+        elif self.type_of == "rebuild":
+            json_data = self.load_json_file()
+            result = self.indexer.rebuild_index(
+                json_data["settings"], json_data["mappings"], pipeline.run
+            )
+        else:
+            result = pipeline.run()
+
+        if result is not None:
+            # the failed items were echoed with the summary
+            if result["failed"]:
+                click.echo(f"Bulk indexing failed for {result['failed']} actions")
             else:
-                self.indexer.bulk_index(actions)
-                click.echo(f"Bulk indexing successful")
-        except BulkIndexError as e:
-            click.echo("Bulk indexing failed")
-            for error in e.errors:
-                click.echo(error)
+                click.echo("Bulk indexing successful")
+            pipeline.report()
+            result["pipeline"] = pipeline.stats()
 
+        return result
 
 @click.command()
 @click.option(
@@ -87,8 +144,15 @@ class DataCollectionsIndexer:
 @click.option(
     "--type_of", "-t", type=str, help="Update or create an index", required=True
 )
-def create_data(config_file: str, es_host: str, type_of: str):
-    dc_indexer = DataCollectionsIndexer(config_file, es_host, type_of)
+@staging_options
+@bulk_options
+@export_options
+@pipeline_options
+@metrics_options
+def create_data(config_file: str, es_host: str, type_of: str, **indexer_options):
+    dc_indexer = DataCollectionsIndexer(
+        config_file, es_host, type_of, **indexer_options
+    )
     dc_indexer.build_and_index_datacollections()
 
 
@@ -97,6 +161,6 @@ if __name__ == "__main__":
 
 
 # Enables programmatic use (from main.py)
-def run(config_file, es_host, type_of):
-    indexer = DataCollectionsIndexer(config_file, es_host, type_of)
-    result = indexer.build_and_index_datacollections()
+def run(config_file, es_host, type_of, **indexer_options):
+    indexer = DataCollectionsIndexer(config_file, es_host, type_of, **indexer_options)
+    return indexer.build_and_index_datacollections()
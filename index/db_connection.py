@@ -0,0 +1,249 @@
+import asyncio
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Hashable, Iterator
+from mysql.connector import pooling
+from mysql.connector import aio
+from index.metrics import get_metrics, metered_connection
+
+DEFAULT_POOL_SIZE = 5
+
+_pool_counter = itertools.count()
+_providers: dict[tuple, "ConnectionProvider"] = {}
+_providers_lock = threading.Lock()
+
+
+class ConnectionProvider:
+    """Shared MySQL connection pool used by the fetchers"""
+
+    def __init__(
+        self,
+        db_config: dict[str, Any],
+        pool_size: int | None = None,
+        health_check: bool = True,
+    ):
+        """Initialization of the ConnectionProvider class
+
+        Args:
+            db_config (dict[str, Any]): DB configuration from read_from_config_file
+            pool_size (int | None): Number of pooled connections, taken from the
+                configuration (or DEFAULT_POOL_SIZE) when None
+            health_check (bool): Ping (and reconnect) every connection on checkout
+        """
+        self.db_config = db_config
+        self.pool_size = int(
+            pool_size or db_config.get("pool_size") or DEFAULT_POOL_SIZE
+        )
+        self.health_check = health_check
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # the mysql pool raises when exhausted, so callers wait on a free slot instead
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+
+    @property
+    def pool(self) -> pooling.MySQLConnectionPool:
+        """Property function of the pool, created on the first checkout
+
+        Returns:
+            pooling.MySQLConnectionPool: The connection pool
+        """
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = pooling.MySQLConnectionPool(
+                        pool_name=f"es_py_{next(_pool_counter)}",
+                        pool_size=self.pool_size,
+                        pool_reset_session=True,
+                        host=self.db_config["host"],
+                        port=self.db_config["port"],
+                        user=self.db_config["user"],
+                        database=self.db_config["database"],
+                        password=self.db_config["password"],
+                    )
+        return self._pool
+
+    def get_connection(self) -> pooling.PooledMySQLConnection:
+        """Checks out a connection from the pool
+
+        Returns:
+            pooling.PooledMySQLConnection: A pooled connection
+        """
+        return self.pool.get_connection()
+
+    def check_health(self, db: pooling.PooledMySQLConnection):
+        """Pings the connection, reconnecting it if the server dropped it
+
+        Args:
+            db (pooling.PooledMySQLConnection): A pooled connection
+        """
+        db.ping(reconnect=True, attempts=3, delay=1)
+
+    @contextmanager
+    def connection(self) -> Iterator[pooling.PooledMySQLConnection]:
+        """Context managed checkout, the connection goes back to the pool on exit
+
+        Yields:
+            pooling.PooledMySQLConnection: A healthy pooled connection, whose
+            cursors are timed when metrics are enabled
+        """
+        with self._slots:
+            db = self.get_connection()
+            try:
+                if self.health_check:
+                    self.check_health(db)
+                yield metered_connection(db)
+            finally:
+                db.close()
+
+    def fetchall(self, sql: str, params: tuple | list = ()) -> list[tuple]:
+        """Runs a query on a connection of its own, so that independent queries can
+        run at the same time from several threads
+
+        Args:
+            sql (str): The query
+            params (tuple | list): Its parameters
+
+        Returns:
+            list[tuple]: The rows
+        """
+        with self.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+            cursor.close()
+
+        return rows
+
+
+def run_concurrently(
+    calls: dict[Hashable, Callable[[], Any]], concurrency: int | None = None
+) -> dict[Hashable, Any]:
+    """Runs independent calls, e.g. queries each checking out its own connection,
+    from a thread pool. The wall time is the one of the slowest call instead of the
+    sum, the connection pool bounds the queries running at the same time
+
+    Args:
+        calls (dict[Hashable, Callable[[], Any]]): Calls without arguments, by key
+        concurrency (int | None): Maximum number of calls running at the same time,
+            None for all of them, 1 runs them one after the other on the calling
+            thread
+
+    Returns:
+        dict[Hashable, Any]: The results, by key. The first error is raised once
+        every call finished
+    """
+    if concurrency == 1 or len(calls) < 2:
+        return {key: call() for key, call in calls.items()}
+
+    workers = min(concurrency or len(calls), len(calls))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as executor:
+        futures = {key: executor.submit(call) for key, call in calls.items()}
+
+    return {key: future.result() for key, future in futures.items()}
+
+
+def get_connection_provider(db_config: dict[str, Any]) -> ConnectionProvider:
+    """Returns the connection provider shared by every fetcher using the same database
+
+    Args:
+        db_config (dict[str, Any]): DB configuration from read_from_config_file
+
+    Returns:
+        ConnectionProvider: The shared connection provider
+    """
+    key = (
+        db_config["host"],
+        db_config["port"],
+        db_config["user"],
+        db_config["database"],
+    )
+    with _providers_lock:
+        if key not in _providers:
+            _providers[key] = ConnectionProvider(db_config)
+        return _providers[key]
+
+
+class AsyncConnectionProvider:
+    """Connection pool for the mysql.connector.aio API, used by the async fetchers"""
+
+    def __init__(self, db_config: dict[str, Any], pool_size: int | None = None):
+        """Initialization of the AsyncConnectionProvider class
+
+        Args:
+            db_config (dict[str, Any]): DB configuration from read_from_config_file
+            pool_size (int | None): Maximum number of open connections, taken from the
+                configuration (or DEFAULT_POOL_SIZE) when None
+        """
+        self.db_config = db_config
+        self.pool_size = int(
+            pool_size or db_config.get("pool_size") or DEFAULT_POOL_SIZE
+        )
+        self._idle = []
+        self._slots = None
+
+    async def get_connection(self) -> aio.MySQLConnectionAbstract:
+        """Opens a new connection
+
+        Returns:
+            aio.MySQLConnectionAbstract: An async connection
+        """
+        return await aio.connect(
+            host=self.db_config["host"],
+            port=int(self.db_config["port"]),
+            user=self.db_config["user"],
+            database=self.db_config["database"],
+            password=self.db_config["password"],
+        )
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aio.MySQLConnectionAbstract]:
+        """Context managed checkout, the connection is kept for reuse on exit unless
+        the query failed
+
+        Yields:
+            aio.MySQLConnectionAbstract: A healthy async connection
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+
+        async with self._slots:
+            if self._idle:
+                db = self._idle.pop()
+                await db.ping(reconnect=True, attempts=3, delay=1)
+            else:
+                db = await self.get_connection()
+            try:
+                yield db
+            except BaseException:
+                await db.close()
+                raise
+            self._idle.append(db)
+
+    async def fetchall(self, sql: str, params: tuple | list = ()) -> list[tuple]:
+        """Runs a query on a pooled connection and returns all its rows
+
+        Args:
+            sql (str): The query
+            params (tuple | list): Parameters of the query
+
+        Returns:
+            list[tuple]: Rows from the DB
+        """
+        async with self.connection() as db:
+            cursor = await db.cursor()
+            metrics = get_metrics()
+            with metrics.timer("es_py_sql_execute_seconds"):
+                await cursor.execute(sql, params)
+            with metrics.timer("es_py_sql_fetch_seconds"):
+                rows = await cursor.fetchall()
+            metrics.inc("es_py_sql_rows_total", len(rows))
+            await cursor.close()
+
+        return rows
+
+    async def close(self):
+        """Closes the idle connections"""
+        while self._idle:
+            await self._idle.pop().close()
@@ -0,0 +1,184 @@
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Tuple
+
+
+def is_accepted(item: Dict[str, Any]) -> bool:
+    """Whether Elasticsearch accepted the action of a bulk response item. Deleting a
+    document which is already gone counts as accepted
+
+    Args:
+        item (Dict[str, Any]): Response item, {op_type: result}
+
+    Returns:
+        bool: True when the action needs no replay
+    """
+    op_type, result = next(iter(item.items()))
+    # no status when the whole request failed
+    status = result.get("status") or 500
+    return 200 <= status < 300 or (op_type == "delete" and status == 404)
+
+
+def parse_line(line: Any) -> Dict[str, Any]:
+    """A line of a bulk request as a dict
+
+    Args:
+        line (Any): Serialized line, or the dict itself
+
+    Returns:
+        Dict[str, Any]: The line
+    """
+    return line if isinstance(line, dict) else json.loads(line)
+
+
+def split_operations(operations: Any) -> list[Tuple[Tuple[str, Dict[str, Any]], Any]]:
+    """Actions of a bulk request body
+
+    Args:
+        operations (Any): NDJSON body, or its lines
+
+    Returns:
+        list[Tuple[Tuple[str, Dict[str, Any]], Any]]: ((op_type, metadata), source)
+        for every action, the source is None for a delete
+    """
+    if isinstance(operations, (bytes, str)):
+        lines = [line for line in operations.splitlines() if line.strip()]
+    else:
+        lines = list(operations)
+    actions = []
+    position = 0
+    while position < len(lines):
+        op_type, metadata = next(iter(parse_line(lines[position]).items()))
+        source = None
+        if op_type != "delete":
+            position += 1
+            source = parse_line(lines[position])
+        actions.append(((op_type, metadata), source))
+        position += 1
+
+    return actions
+
+
+class DeadLetterQueue:
+    """Append-only JSON lines file of the bulk actions Elasticsearch did not accept,
+    with their source, so that they can be replayed once the cause is fixed. The file
+    is only created with the first failed action"""
+
+    def __init__(self, directory: str, index: str):
+        """Initialization of the DeadLetterQueue class
+
+        Args:
+            directory (str): Directory of the dead letter files, created when missing
+            index (str): Alias of the index, part of the file name
+        """
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+        self.index = index
+        # the process id keeps the files of partition workers apart
+        self.path = os.path.join(directory, f"{index}_{stamp}_{os.getpid()}.jsonl")
+        self.count = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    def write(self, entry: Dict[str, Any]):
+        """Appends an entry and flushes it, a crash loses no written entry
+
+        Args:
+            entry (Dict[str, Any]): The entry
+        """
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, "a")
+            self._file.write(line)
+            self._file.flush()
+            self.count += 1
+
+    def record(
+        self,
+        operations: Any,
+        items: list[Dict[str, Any]] | None = None,
+        error: BaseException | None = None,
+    ):
+        """Writes the actions of a bulk request which failed, either item by item or
+        as a whole
+
+        Args:
+            operations (Any): NDJSON body of the request, or its lines
+            items (list[Dict[str, Any]] | None): Response items, the accepted ones
+                are skipped
+            error (BaseException | None): Error of a request which failed as a
+                whole, every action is written
+        """
+        actions = split_operations(operations)
+        if items is None:
+            status = getattr(error, "status_code", None)
+            reason = {"type": type(error).__name__, "reason": str(error)}
+            items = [
+                {op_type: {"status": status, "error": reason}}
+                for (op_type, _), _ in actions
+            ]
+        failed_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        for ((op_type, metadata), source), item in zip(actions, items, strict=True):
+            if is_accepted(item):
+                continue
+            result = next(iter(item.values()))
+            error_info = result.get("error") or {}
+            if not isinstance(error_info, dict):
+                error_info = {"reason": str(error_info)}
+            self.write(
+                {
+                    "index": self.index,
+                    "op_type": op_type,
+                    "_id": metadata.get("_id"),
+                    "status": result.get("status"),
+                    "error_type": error_info.get("type"),
+                    "error_reason": error_info.get("reason"),
+                    "failed_at": failed_at,
+                    "action": {op_type: metadata},
+                    "source": source,
+                }
+            )
+
+    def close(self):
+        """Closes the file"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_dead_letters(path: str) -> Iterator[Dict[str, Any]]:
+    """Entries of a dead letter file
+
+    Args:
+        path (str): File written by a DeadLetterQueue
+
+    Yields:
+        Iterator[Dict[str, Any]]: The entries, in the order they failed
+    """
+    with open(path) as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def replay_action(entry: Dict[str, Any], index: str) -> Tuple[Dict[str, Any], Any]:
+    """Bulk action lines of a dead letter entry. A create becomes an index, so that
+    documents written since the failure are overwritten instead of conflicting
+
+    Args:
+        entry (Dict[str, Any]): Dead letter entry
+        index (str): Target index
+
+    Returns:
+        Tuple[Dict[str, Any], Any]: The action line and the source line, None for a
+        delete
+    """
+    op_type, metadata = next(iter(entry["action"].items()))
+    if op_type == "create":
+        op_type = "index"
+
+    return {op_type: {**metadata, "_index": index}}, entry.get("source")
@@ -1,22 +1,413 @@
 import elasticsearch
 import click
-from elasticsearch import Elasticsearch, exceptions
-from elasticsearch.helpers import bulk, BulkIndexError
-from typing import Any, Dict, List
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from elasticsearch import Elasticsearch
+from elasticsearch.helpers import streaming_bulk, parallel_bulk
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple
+from index.dead_letter import DeadLetterQueue
+from index.hash_store import HashStore, document_hash
+from index.metrics import client_serializer, get_metrics
+
+BULK_MODES = ("streaming", "parallel")
+DEFAULT_THREAD_COUNT = 4
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_MAX_CHUNK_BYTES = 100 * 1024 * 1024
+DEFAULT_KEEP_GENERATIONS = 2
+HEALTH_STATUSES = ("green", "yellow", "none")
+HEALTH_TIMEOUT = "10m"
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_INITIAL_BACKOFF = 1.0
+DEFAULT_MAX_BACKOFF = 60.0
+DEFAULT_RETRY_BUDGET = 1000
+# statuses of the items (or whole requests) rejected by a busy cluster
+RETRY_STATUSES = (429, 502, 503, 504)
+# key of the first item of a bulk response holding the number of items of the
+# response, so that the chunks of a summary follow the requests actually sent
+CHUNK_ITEMS = "_chunk_items"
+# applied while the documents of a new index are bulk loaded
+INGEST_PROFILE = {
+    "refresh_interval": "-1",
+    "number_of_replicas": 0,
+    "translog.durability": "async",
+}
+
+
+_bulk_slots = None
+
+
+def set_bulk_concurrency(limit: int | None):
+    """Caps the number of bulk requests in flight across every indexer of the process
+
+    Args:
+        limit (int | None): Maximum number of concurrent bulk requests, None removes
+            the cap
+    """
+    global _bulk_slots
+    _bulk_slots = threading.BoundedSemaphore(limit) if limit else None
+
+
+class BulkRetry:
+    """Retries the actions of a bulk request rejected by a busy cluster, with
+    exponential backoff and jitter. Only the rejected items are sent again, and the
+    retries of an indexer are capped by a budget of bulk requests"""
+
+    def __init__(
+        self,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        initial_backoff: float = DEFAULT_INITIAL_BACKOFF,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+        budget: int | None = DEFAULT_RETRY_BUDGET,
+    ):
+        """Initialization of the BulkRetry class
+
+        Args:
+            max_retries (int): Retries of a bulk request
+            initial_backoff (float): Seconds before the first retry, doubled for
+                every following retry
+            max_backoff (float): Maximum seconds between two retries
+            budget (int | None): Retry requests allowed in total, None for no limit
+        """
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.budget = budget
+        self.requests = 0
+        self.actions = 0
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    def allow(self, attempt: int) -> bool:
+        """Whether a request may be retried, and takes a retry from the budget
+
+        Args:
+            attempt (int): Retries of the request so far
+
+        Returns:
+            bool: True when the request may be retried
+        """
+        if attempt >= self.max_retries:
+            return False
+        with self._lock:
+            if self.budget is not None and self.requests >= self.budget:
+                if not self.exhausted:
+                    self.exhausted = True
+                    click.echo(f"Retry budget of {self.budget} requests exhausted")
+                return False
+            self.requests += 1
+        return True
+
+    def wait(self, attempt: int):
+        """Sleeps before a retry, between half and all of the exponential backoff
+
+        Args:
+            attempt (int): Retries of the request so far
+        """
+        backoff = min(self.max_backoff, self.initial_backoff * 2**attempt)
+        time.sleep(backoff / 2 + random.uniform(0, backoff / 2))
+
+    def send(self, send: Callable[..., Any], operations: Any, **kwargs) -> Any:
+        """Sends a bulk request, then again the items rejected with RETRY_STATUSES
+        until they are accepted or the retries run out. Connection errors and
+        requests rejected as a whole are retried the same way
+
+        Args:
+            send (Callable[..., Any]): Sends one bulk request
+            operations (Any): NDJSON body, or its lines
+            **kwargs: Other arguments of the request
+
+        Returns:
+            Any: The response of the first request, with the items of the retries
+        """
+        response = None
+        positions = offsets = lines = items = None
+        attempt = 0
+        while True:
+            try:
+                result = send(operations=operations, **kwargs)
+            except (
+                elasticsearch.ConnectionError,
+                elasticsearch.ConnectionTimeout,
+                elasticsearch.ApiError,
+            ) as e:
+                retriable = not isinstance(e, elasticsearch.ApiError) or (
+                    e.status_code in RETRY_STATUSES
+                )
+                if not retriable or not self.allow(attempt):
+                    if response is None:
+                        raise
+                    break
+                self.wait(attempt)
+                attempt += 1
+                continue
+
+            if response is None:
+                response = result
+                # an ObjectApiResponse is read-only, its body is not
+                items = getattr(response, "body", response)["items"]
+                positions = range(len(items))
+                offsets = []
+                line = 0
+                for item in items:
+                    offsets.append(line)
+                    line += 1 if "delete" in item else 2
+            else:
+                for position, item in zip(positions, result["items"], strict=True):
+                    items[position] = item
+
+            positions = [
+                position
+                for position in positions
+                if next(iter(items[position].values())).get("status") in RETRY_STATUSES
+            ]
+            if not positions or not self.allow(attempt):
+                break
+
+            if lines is None:
+                lines = (
+                    operations.splitlines()
+                    if isinstance(operations, (bytes, str))
+                    else list(operations)
+                )
+            operations = []
+            for position in positions:
+                start = offsets[position]
+                end = start + (1 if "delete" in items[position] else 2)
+                operations.extend(lines[start:end])
+            with self._lock:
+                self.actions += len(positions)
+            self.wait(attempt)
+            attempt += 1
+
+        if attempt:
+            getattr(response, "body", response)["errors"] = any(
+                not 200 <= next(iter(item.values())).get("status", 500) < 300
+                for item in items
+            )
+        return response
+
+
+class BoundedElasticsearch(Elasticsearch):
+    """Elasticsearch client whose bulk requests wait for a slot of
+    set_bulk_concurrency, are retried by a BulkRetry and are timed when metrics are
+    enabled. The actions which still fail go to a DeadLetterQueue"""
+
+    def __init__(
+        self,
+        *args,
+        index_label: str | None = None,
+        retry: BulkRetry | None = None,
+        dead_letters: DeadLetterQueue | None = None,
+        **kwargs,
+    ):
+        """Initialization of the BoundedElasticsearch class
+
+        Args:
+            *args: Elasticsearch arguments, e.g. the host
+            index_label (str | None): Index label of the bulk request metrics
+            retry (BulkRetry | None): Retries of the rejected bulk items, None
+                disables them
+            dead_letters (DeadLetterQueue | None): Keeps the failed actions, None
+                drops them
+            **kwargs: Elasticsearch keyword arguments
+        """
+        super().__init__(*args, **kwargs)
+        self.index_label = index_label
+        self.retry = retry
+        self.dead_letters = dead_letters
+
+    def options(self, **kwargs) -> "BoundedElasticsearch":
+        # the helpers send their requests from a copy of the client
+        client = super().options(**kwargs)
+        client.index_label = self.index_label
+        client.retry = self.retry
+        client.dead_letters = self.dead_letters
+        return client
+
+    def bulk(self, *args, **kwargs):
+        try:
+            if self.retry is None or args:
+                response = self._send(*args, **kwargs)
+            else:
+                response = self.retry.send(self._send, **kwargs)
+        except (
+            elasticsearch.ConnectionError,
+            elasticsearch.ConnectionTimeout,
+            elasticsearch.ApiError,
+        ) as e:
+            if self.dead_letters is not None and "operations" in kwargs:
+                self.dead_letters.record(kwargs["operations"], error=e)
+            raise
+        if self.dead_letters is not None and response["errors"]:
+            self.dead_letters.record(kwargs.get("operations"), response["items"])
+        mark_chunk(response)
+        return response
+
+    def _send(self, *args, **kwargs):
+        """Sends one bulk request once a slot is free, timed when metrics are
+        enabled"""
+        metrics = get_metrics()
+        if not metrics.enabled:
+            return self._bulk(*args, **kwargs)
+
+        operations = kwargs.get("operations", b"")
+        if isinstance(operations, (bytes, str)):
+            size = len(operations)
+        else:
+            size = sum(len(line) + 1 for line in operations)
+        labels = {"index": self.index_label or kwargs.get("index") or "unknown"}
+        metrics.inc("es_py_bulk_request_bytes_total", size, **labels)
+        with metrics.timer("es_py_bulk_request_seconds", **labels):
+            return self._bulk(*args, **kwargs)
+
+    def _bulk(self, *args, **kwargs):
+        """Sends a bulk request once a slot is free"""
+        slots = _bulk_slots
+        if slots is None:
+            return super().bulk(*args, **kwargs)
+        with slots:
+            return super().bulk(*args, **kwargs)
+
+
+def mark_chunk(response: Any):
+    """Stores the number of items of a bulk response in its first item, under
+    CHUNK_ITEMS. add_result removes it again
+
+    Args:
+        response (Any): Bulk response
+    """
+    items = response["items"]
+    if items:
+        next(iter(items[0].values()))[CHUNK_ITEMS] = len(items)
+
+
+def restored_settings(settings: dict[str, Any]) -> dict[str, Any]:
+    """Values of the INGEST_PROFILE settings once the load is over, taken from the
+    mapping JSON. None resets a setting the JSON does not define to its default
+
+    Args:
+        settings (dict[str, Any]): settings for the index
+
+    Returns:
+        dict[str, Any]: Settings for put_settings
+    """
+    restored = {}
+    for key in INGEST_PROFILE:
+        value = settings
+        for part in key.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        restored[key] = settings.get(key, value)
+
+    return restored
 
 
 class ElasticSearchIndexer:
     """Configuration for the ElasticSearch Index build"""
 
-    def __init__(self, es_host: str, index_name: str):
+    def __init__(
+        self,
+        es_host: str,
+        index_name: str,
+        bulk_mode: str = "streaming",
+        thread_count: int = DEFAULT_THREAD_COUNT,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_chunk_bytes: int = DEFAULT_MAX_CHUNK_BYTES,
+        hash_store: str | None = None,
+        keep_generations: int = DEFAULT_KEEP_GENERATIONS,
+        ingest_profile: bool = True,
+        force_merge: int | None = None,
+        wait_for_status: str = "green",
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        initial_backoff: float = DEFAULT_INITIAL_BACKOFF,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+        retry_budget: int | None = DEFAULT_RETRY_BUDGET,
+        dead_letter_dir: str | None = None,
+    ):
         """Initialization of the ElasticSearchIndexer Class
 
         Args:
             es_host (str): Host of the ElasticSearch
             index_name (str): name of the index
+            bulk_mode (str): streaming sends chunks one after the other on the calling
+                thread, parallel sends them from a pool of thread_count threads
+            thread_count (int): Number of sender threads in parallel mode
+            chunk_size (int): Number of actions per bulk request
+            max_chunk_bytes (int): Maximum size of a bulk request in bytes
+            hash_store (str | None): SQLite file of the document hashes, updates of
+                unchanged documents are skipped when set
+            keep_generations (int): Number of previous physical indices kept for
+                rollback by rebuild_index
+            ingest_profile (bool): Create new indices with INGEST_PROFILE and restore
+                the JSON settings once load_index is done
+            force_merge (int | None): Force merge a new index down to this number of
+                segments after the load, None skips the force merge
+            wait_for_status (str): Cluster health awaited after the load, none skips
+            max_retries (int): Retries of the items rejected by a busy cluster, 0
+                disables the retries
+            initial_backoff (float): Seconds before the first retry, doubled for
+                every following retry
+            max_backoff (float): Maximum seconds between two retries
+            retry_budget (int | None): Retry requests allowed for the whole run,
+                None for no limit
+            dead_letter_dir (str | None): Directory of the dead letter file of the
+                run, which keeps the failed actions for replay_dead_letters
         """
-        self.client = Elasticsearch(es_host)
+        if bulk_mode not in BULK_MODES:
+            raise ValueError(f"Unsupported bulk_mode: {bulk_mode}")
+
+        self.retry = (
+            BulkRetry(max_retries, initial_backoff, max_backoff, retry_budget)
+            if max_retries
+            else None
+        )
+        self.dead_letters = (
+            DeadLetterQueue(dead_letter_dir, index_name) if dead_letter_dir else None
+        )
+        self.client = BoundedElasticsearch(
+            es_host,
+            index_label=index_name,
+            retry=self.retry,
+            dead_letters=self.dead_letters,
+            serializer=client_serializer(index_name),
+        )
         self.index_name = index_name
+        self.alias = index_name
+        self.keep_generations = keep_generations
+        self.ingest_profile = ingest_profile
+        self.force_merge = force_merge
+        self.wait_for_status = wait_for_status
+        self.pending_restore = None
+        # set by Checkpoint.run, which registers the acknowledged actions
+        self.checkpoint = None
+        # a resumed run sends again the documents acknowledged after the last
+        # checkpoint, create actions become index actions to overwrite them
+        self.overwrite = False
+        # doc ids of the accepted actions, collected while it is a list
+        self.acknowledged = None
+        self.bulk_mode = bulk_mode
+        self.thread_count = thread_count
+        self.chunk_size = chunk_size
+        self.max_chunk_bytes = max_chunk_bytes
+        # actions of the current bulk request not acknowledged yet
+        self.chunk_remaining = 0
+        self.open_hash_store(hash_store)
+
+    def open_hash_store(self, path: str | None):
+        """Opens the store of the document hashes
+
+        Args:
+            path (str | None): SQLite file, None disables change detection
+        """
+        self.hash_store = HashStore(path) if path else None
+        # the hashes of a rebuild are kept apart until its alias is swapped
+        self.hash_index = None
+        self.known_hashes = None
+        self.pending_hashes = {}
+        self.accepted_hashes = {}
+        self.skipped = 0
 
     def create_index(self, settings: dict[str, Any], mappings: dict[str, Any]) -> bool:
         """Creates an ElasticSearch Index with the settings and mappings
@@ -35,28 +426,221 @@ class ElasticSearchIndexer:
             return False
         try:
             self.client.indices.create(
-                index=self.index_name, body={"settings": settings, "mappings": mappings}
+                index=self.index_name,
+                body={"settings": self.load_settings(settings), "mappings": mappings},
             )
             click.echo(f"Index '{self.index_name}' created successfully.")
+            if self.hash_store:
+                self.hash_store.clear(self.alias)
             return True
-        except exceptions as e:
+        except elasticsearch.ApiError as e:
+            self.pending_restore = None
             click.echo(f"Failed to create index: {e}")
             return False
 
+    def load_settings(self, settings: dict[str, Any]) -> dict[str, Any]:
+        """Settings a new index is created with. With ingest_profile, the profile
+        overrides the JSON settings until finish_load restores them
+
+        Args:
+            settings (dict[str, Any]): settings for the index
+
+        Returns:
+            dict[str, Any]: settings for indices.create
+        """
+        if not self.ingest_profile:
+            return settings
+
+        self.pending_restore = restored_settings(settings)
+        return {**settings, **INGEST_PROFILE}
+
+    def finish_load(self):
+        """Restores the settings replaced by the ingest profile, refreshes and
+        optionally force merges the index, then waits for the cluster health"""
+        if self.pending_restore is None:
+            return
+
+        restore, self.pending_restore = self.pending_restore, None
+        self.client.indices.put_settings(index=self.index_name, settings=restore)
+        self.client.indices.refresh(index=self.index_name)
+        if self.force_merge:
+            self.client.indices.forcemerge(
+                index=self.index_name, max_num_segments=self.force_merge
+            )
+        if self.wait_for_status != "none":
+            try:
+                self.client.cluster.health(
+                    index=self.index_name,
+                    wait_for_status=self.wait_for_status,
+                    timeout=HEALTH_TIMEOUT,
+                )
+            except elasticsearch.ApiError as e:
+                click.echo(
+                    f"Index '{self.index_name}' is not {self.wait_for_status} yet: {e}"
+                )
+        click.echo(f"Index '{self.index_name}' settings restored after the load.")
+
+    def load_index(self, load: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Runs the whole load of the current index, then finish_load restores the
+        settings of the ingest profile, also when the load failed. A load may call
+        bulk_index several times, e.g. the index and delete actions of a run
+
+        Args:
+            load (Callable[[], Dict[str, Any]]): Sends every action of the run and
+                returns its summary, e.g. IndexingPipeline.run
+
+        Returns:
+            Dict[str, Any]: The summary of the load
+        """
+        try:
+            return load()
+        finally:
+            self.finish_load()
+
+    def generation_name(self) -> str:
+        """Name of a new physical index behind the alias
+
+        Returns:
+            str: alias_YYYYmmddHHMMSS, in UTC
+        """
+        return f"{self.alias}_{datetime.now(timezone.utc):%Y%m%d%H%M%S}"
+
+    def rebuild_index(
+        self,
+        settings: dict[str, Any],
+        mappings: dict[str, Any],
+        load: Callable[[], Dict[str, Any]],
+        physical: str | None = None,
+    ) -> Dict[str, Any]:
+        """Loads every document into a new timestamped index, then moves the alias to
+        it once the document count is validated. The live index keeps serving
+        searches until the alias is swapped
+
+        Args:
+            settings (dict[str, Any]): settings for the index
+            mappings (dict[str, Any]): mappings for the index
+            load (Callable[[], Dict[str, Any]]): Sends the actions of the indexer and
+                returns the bulk_index summary, e.g. IndexingPipeline.run
+            physical (str | None): Existing physical index of an interrupted rebuild
+                to continue loading, a new one is created when None
+
+        Returns:
+            Dict[str, Any]: The bulk_index summary, with the new index, its count and
+            whether the alias was moved under "rebuild"
+        """
+        if physical is None:
+            physical = self.generation_name()
+            self.client.indices.create(
+                index=physical,
+                body={"settings": self.load_settings(settings), "mappings": mappings},
+            )
+            click.echo(f"Index '{physical}' created for alias '{self.alias}'.")
+            if self.hash_store:
+                self.hash_store.clear(physical)
+        else:
+            click.echo(f"Loading of '{physical}' resumed for alias '{self.alias}'.")
+
+        self.index_name = physical
+        self.hash_index = physical
+        self.known_hashes = None
+        try:
+            result = self.load_index(load)
+        finally:
+            self.index_name = self.alias
+            self.hash_index = None
+            self.known_hashes = None
+
+        self.client.indices.refresh(index=physical)
+        count = self.client.count(index=physical)["count"]
+        result["rebuild"] = {"index": physical, "count": count, "swapped": False}
+        if result["failed"] or count != result["success"]:
+            click.echo(
+                f"Validation of '{physical}' failed: {count} documents for "
+                f"{result['success']} indexed and {result['failed']} failed, "
+                f"alias '{self.alias}' was not moved"
+            )
+            if self.hash_store:
+                self.hash_store.clear(physical)
+            return result
+
+        self.swap_alias(physical)
+        if self.hash_store:
+            self.hash_store.rename(physical, self.alias)
+        result["rebuild"]["swapped"] = True
+        result["rebuild"]["deleted"] = self.prune_generations(physical)
+        click.echo(f"Alias '{self.alias}' now points to '{physical}' ({count} documents)")
+
+        return result
+
+    def swap_alias(self, physical: str):
+        """Atomically points the alias to the physical index. An index created before
+        aliases were used, with the alias name, is dropped in the same request
+
+        Args:
+            physical (str): name of the new physical index
+        """
+        actions = []
+        if self.client.indices.exists_alias(name=self.alias):
+            for index in self.client.indices.get_alias(name=self.alias):
+                actions.append({"remove": {"index": index, "alias": self.alias}})
+        elif self.client.indices.exists(index=self.alias):
+            actions.append({"remove_index": {"index": self.alias}})
+        actions.append({"add": {"index": physical, "alias": self.alias}})
+
+        self.client.indices.update_aliases(actions=actions)
+
+    def prune_generations(self, current: str) -> list[str]:
+        """Deletes the physical indices older than the keep_generations previous ones
+
+        Args:
+            current (str): name of the physical index behind the alias
+
+        Returns:
+            list[str]: The deleted indices
+        """
+        pattern = re.compile(rf"^{re.escape(self.alias)}_\d{{14}}$")
+        generations = sorted(
+            index
+            for index in self.client.indices.get(index=f"{self.alias}_*")
+            if pattern.match(index) and index != current
+        )
+        deleted = generations[: max(len(generations) - self.keep_generations, 0)]
+        for index in deleted:
+            self.client.indices.delete(index=index)
+            click.echo(f"Deleted previous generation '{index}'")
+
+        return deleted
+
     def index_data(
         self, data: dict[str, Any], doc_id: str, action_type: str
-    ) -> dict[str, Any]:
+    ) -> dict[str, Any] | None:
         """Creation of the index (required for the action for bulk action)
 
         Args:
             data (dict): The data to index
             doc_id (str): Document ID
-            action_type (str): Action type: create or update
+            action_type (str): Action type: create, update or rebuild (a create in
+                the new physical index). A create is an index with overwrite
 
         Returns:
-            dict[str, Any]: Bulk indexing action dict
+            dict[str, Any] | None: Bulk indexing action dict, None when the document
+            did not change since it was last indexed
         """
-        if action_type == "create":
+        if self.hash_store and action_type in ("create", "update", "rebuild"):
+            if self.known_hashes is None:
+                self.known_hashes = self.hash_store.load(self.hash_index or self.alias)
+            digest = document_hash(data)
+            if action_type == "update" and self.known_hashes.get(str(doc_id)) == digest:
+                self.skipped += 1
+                return None
+            self.pending_hashes[str(doc_id)] = digest
+
+        if action_type == "rebuild":
+            action_type = "create"
+        if action_type == "create" and self.overwrite:
+            action_type = "index"
+
+        if action_type in ("create", "index"):
             return {
                 "_op_type": action_type,
                 "_index": self.index_name,
@@ -74,21 +658,284 @@ class ElasticSearchIndexer:
         else:
             raise ValueError(f"Unsupported action_type: {action_type}")
 
-    def bulk_index(self, actions: List[Dict[str, Any]]):
+    def delete_data(self, doc_id: str) -> dict[str, Any]:
+        """Delete action for the bulk action
+
+        Args:
+            doc_id (str): Document ID
+
+        Returns:
+            dict[str, Any]: Bulk delete action dict
+        """
+        return {"_op_type": "delete", "_index": self.index_name, "_id": doc_id}
+
+    def bulk_results(
+        self, actions: Iterable[Dict[str, Any]]
+    ) -> Iterator[Tuple[bool, Dict[str, Any]]]:
+        """Sends the actions with the configured bulk mode
+
+        Args:
+            actions (Iterable[Dict[str, Any]]): Actions to be indexed
+
+        Returns:
+            Iterator[Tuple[bool, Dict[str, Any]]]: (ok, item) for every action, in order
+        """
+        if self.bulk_mode == "parallel":
+            return parallel_bulk(
+                self.client,
+                actions,
+                thread_count=self.thread_count,
+                chunk_size=self.chunk_size,
+                max_chunk_bytes=self.max_chunk_bytes,
+                raise_on_error=False,
+            )
+        return streaming_bulk(
+            self.client,
+            actions,
+            chunk_size=self.chunk_size,
+            max_chunk_bytes=self.max_chunk_bytes,
+            raise_on_error=False,
+        )
+
+    def add_result(self, summary: Dict[str, Any], ok: bool, item: Dict[str, Any]):
+        """Adds the result of one action to a bulk_index summary. Deleting a document
+        which is already gone counts as a success. A chunk is one bulk request,
+        whose size is marked by mark_chunk in its first item, chunk_size when the
+        response was not marked
+
+        Args:
+            summary (Dict[str, Any]): The summary being built
+            ok (bool): Whether Elasticsearch accepted the action
+            item (Dict[str, Any]): The response item of the action
+        """
+        size = next(iter(item.values())).pop(CHUNK_ITEMS, None) if item else None
+        if size is not None or self.chunk_remaining <= 0:
+            summary["chunks"].append({"success": 0, "failed": 0})
+            self.chunk_remaining = size or self.chunk_size
+        self.chunk_remaining -= 1
+        if not ok and item.get("delete", {}).get("status") == 404:
+            ok = True
+        if ok and self.acknowledged is not None:
+            self.acknowledged.append(next(iter(item.values())).get("_id"))
+        if ok and self.hash_store:
+            op_type, result = next(iter(item.items()))
+            doc_id = str(result.get("_id"))
+            if op_type == "delete":
+                self.accepted_hashes[doc_id] = None
+            elif doc_id in self.pending_hashes:
+                self.accepted_hashes[doc_id] = self.pending_hashes.pop(doc_id)
+        outcome = "success" if ok else "failed"
+        summary[outcome] += 1
+        summary["chunks"][-1][outcome] += 1
+        if not ok:
+            summary["errors"].append(item)
+        if self.checkpoint:
+            self.checkpoint.acknowledge(ok)
+            # every confirmed chunk moves the checkpoint
+            if self.chunk_remaining == 0:
+                self.checkpoint.save()
+
+    def bulk_index(self, actions: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Perform a bulk indexing operation.
 
         Args:
-            actions (List[Dict[str, Any]]): List of actions to be indexed
+            actions (Iterable[Dict[str, Any]]): Actions to be indexed
 
         Raises:
-            Exception: Raised on any bulk indexing failure
+            Exception: Raised when Elasticsearch rejects a whole bulk request
+
+        Returns:
+            Dict[str, Any]: success and failed counts, the failed items and the
+            counts of every bulk request
         """
+        summary = {"success": 0, "failed": 0, "errors": [], "chunks": []}
+        self.chunk_remaining = 0
         try:
-            bulk(self.client, actions)
+            for ok, item in self.bulk_results(actions):
+                self.add_result(summary, ok, item)
         except elasticsearch.BadRequestError as e:
-            raise Exception(f"Error during bulk indexing: {str(e)}")
-        except BulkIndexError as e:
+            raise Exception(f"Error during bulk indexing: {str(e)}") from e
+        finally:
+            self.save_hashes()
+            if self.checkpoint:
+                self.checkpoint.save()
+
+        return self.finish_summary(summary)
+
+    def save_hashes(self):
+        """Stores the hashes of the documents Elasticsearch accepted so far"""
+        if self.hash_store and self.accepted_hashes:
+            self.hash_store.save(self.hash_index or self.alias, self.accepted_hashes)
+            if self.known_hashes is not None:
+                self.known_hashes.update(
+                    (doc_id, h) for doc_id, h in self.accepted_hashes.items() if h
+                )
+            self.accepted_hashes = {}
+
+    def finish_summary(self, summary: Dict[str, Any]) -> Dict[str, Any]:
+        """Echoes the failed items, the retries and the change detection counts of a
+        summary
+
+        Args:
+            summary (Dict[str, Any]): Summary built by add_result
+
+        Returns:
+            Dict[str, Any]: The summary, with the retried actions and requests when
+            retries were needed, the dead letter file when actions failed, and with
+            skipped and changed counts when change detection is enabled
+        """
+        metrics = get_metrics()
+        if self.retry and self.retry.requests:
+            summary["retried"] = {
+                "actions": self.retry.actions,
+                "requests": self.retry.requests,
+            }
+            metrics.inc("es_py_bulk_retried_total", self.retry.actions, index=self.alias)
+            click.echo(
+                f"{self.retry.actions} rejected actions retried in "
+                f"{self.retry.requests} requests, {summary['failed']} failed for good"
+            )
+        for outcome in ("success", "failed"):
+            metrics.inc(
+                "es_py_documents_total",
+                summary[outcome],
+                index=self.alias,
+                outcome=outcome,
+            )
+        if summary["errors"]:
             click.echo("Bulk indexing failed")
-            for error in e.errors:
+            for error in summary["errors"]:
                 click.echo(error)
+        if self.dead_letters and self.dead_letters.count:
+            self.dead_letters.close()
+            summary["dead_letters"] = {
+                "file": self.dead_letters.path,
+                "count": self.dead_letters.count,
+            }
+            click.echo(
+                f"{self.dead_letters.count} failed actions written to "
+                f"{self.dead_letters.path}"
+            )
+
+        if self.hash_store:
+            summary["skipped"] = self.skipped
+            summary["changed"] = summary["success"] + summary["failed"]
+            click.echo(
+                f"{summary['skipped']} unchanged documents skipped, "
+                f"{summary['changed']} sent"
+            )
+
+        return summary
+
+
+def bulk_options(command):
+    """Adds the ElasticSearchIndexer bulk options to an indexer click command,
+    they reach the command as keyword arguments
+
+    Args:
+        command: click command function
+
+    Returns:
+        The decorated command
+    """
+    options = [
+        click.option(
+            "--bulk_mode",
+            type=click.Choice(BULK_MODES),
+            default="streaming",
+            show_default=True,
+            help="Send bulk chunks sequentially or from a thread pool",
+        ),
+        click.option(
+            "--thread_count",
+            type=int,
+            default=DEFAULT_THREAD_COUNT,
+            show_default=True,
+            help="Number of sender threads in parallel mode",
+        ),
+        click.option(
+            "--chunk_size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            show_default=True,
+            help="Number of actions per bulk request",
+        ),
+        click.option(
+            "--max_chunk_bytes",
+            type=int,
+            default=DEFAULT_MAX_CHUNK_BYTES,
+            show_default=True,
+            help="Maximum size of a bulk request in bytes",
+        ),
+        click.option(
+            "--keep_generations",
+            type=int,
+            default=DEFAULT_KEEP_GENERATIONS,
+            show_default=True,
+            help="Previous physical indices kept for rollback by --type_of rebuild",
+        ),
+        click.option(
+            "--ingest_profile/--no-ingest_profile",
+            default=True,
+            show_default=True,
+            help="Create new indices without refresh and replicas during the load",
+        ),
+        click.option(
+            "--force_merge",
+            type=int,
+            default=None,
+            help="Force merge a new index to this number of segments after the load",
+        ),
+        click.option(
+            "--wait_for_status",
+            type=click.Choice(HEALTH_STATUSES),
+            default="green",
+            show_default=True,
+            help="Cluster health awaited after loading a new index",
+        ),
+        click.option(
+            "--max_retries",
+            type=int,
+            default=DEFAULT_MAX_RETRIES,
+            show_default=True,
+            help="Retries of the bulk items rejected by a busy cluster, 0 disables them",
+        ),
+        click.option(
+            "--initial_backoff",
+            type=float,
+            default=DEFAULT_INITIAL_BACKOFF,
+            show_default=True,
+            help="Seconds before the first retry, doubled for every following retry",
+        ),
+        click.option(
+            "--max_backoff",
+            type=float,
+            default=DEFAULT_MAX_BACKOFF,
+            show_default=True,
+            help="Maximum seconds between two retries",
+        ),
+        click.option(
+            "--retry_budget",
+            type=int,
+            default=DEFAULT_RETRY_BUDGET,
+            show_default=True,
+            help="Retry requests allowed for the whole run",
+        ),
+        click.option(
+            "--dead_letter_dir",
+            type=click.Path(file_okay=False),
+            default=None,
+            help="Directory of the dead letter file keeping the failed actions",
+        ),
+        click.option(
+            "--hash_store",
+            type=click.Path(dir_okay=False),
+            default=None,
+            help="SQLite file of document hashes, unchanged documents are not updated",
+        ),
+    ]
+    for option in reversed(options):
+        command = option(command)
+
+    return command
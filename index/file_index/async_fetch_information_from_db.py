@@ -0,0 +1,146 @@
+import asyncio
+from typing import AsyncIterator
+from index.db_connection import AsyncConnectionProvider
+from .fetch_information_from_db import (
+    FetchFileFromDB,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_RANGE_SIZE,
+)
+from .preload_map import PreloadMap
+
+ASYNC_PRELOAD_STRATEGIES = ("in", "range")
+
+
+class AsyncFetchFileFromDB(FetchFileFromDB):
+    """File fetcher running its queries on an asyncio event loop"""
+
+    def __init__(self, db_config: dict, join_reference: bool = False):
+        """Initialization of the AsyncFetchFileFromDB class
+
+        Args:
+            db_config (dict): DB configuration
+            join_reference (bool): Resolve the reference ids against ReferenceData
+                instead of in SQL
+        """
+        super().__init__(db_config, join_reference)
+        self.async_provider = AsyncConnectionProvider(db_config)
+
+    async def fetch_file_from_db(self) -> list[tuple]:
+        """Fetches file from DB
+
+        Returns:
+            list[tuple]: A list of rows from the db
+        """
+        return self.resolve_file_rows(
+            await self.async_provider.fetchall(self.files_sql())
+        )
+
+    async def stream_files_from_db(
+        self, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> AsyncIterator[list[tuple]]:
+        """Streams files from the DB through an unbuffered cursor, in file_id order.
+        The preload queries of each window need two more connections
+
+        Args:
+            batch_size (int): Number of rows fetched per window
+
+        Yields:
+            AsyncIterator[list[tuple]]: Windows of rows, same shape as fetch_file_from_db
+        """
+        if self.async_provider.pool_size < 3:
+            raise ValueError("Streaming files needs a pool_size of at least 3")
+
+        async with self.async_provider.connection() as db:
+            cursor = await db.cursor(buffered=False)
+            await cursor.execute(self.files_sql())
+            exhausted = False
+            try:
+                while True:
+                    files = await cursor.fetchmany(batch_size)
+                    if not files:
+                        exhausted = True
+                        break
+                    yield self.resolve_file_rows(files)
+            finally:
+                if not exhausted:
+                    # the consumer stopped early, drain the result before the
+                    # connection is reused
+                    await db.consume_results()
+                await cursor.close()
+
+    async def fetch_preload_rows(
+        self,
+        predicate: str,
+        params: list | tuple,
+        dc_map: PreloadMap,
+        sp_map: PreloadMap,
+        wanted: set | None = None,
+    ):
+        """Runs the data collection and the sample/population preload queries
+        concurrently, on two connections, and adds the rows to dc_map and sp_map
+
+        Args:
+            predicate (str): SQL condition on fdc.file_id
+            params (list | tuple): Parameters of the predicate
+            dc_map (PreloadMap): Data collection rows keyed by file_id
+            sp_map (PreloadMap): Sample and population rows keyed by file_id
+            wanted (set | None): Only keep rows for these file ids when the predicate is wider
+        """
+        fetch_datacollections_sql, fetch_sample_sql = self.preload_sql(predicate)
+        dc_rows, sp_rows = await asyncio.gather(
+            self.async_provider.fetchall(fetch_datacollections_sql, params),
+            self.async_provider.fetchall(fetch_sample_sql, params),
+        )
+
+        self.add_preload_rows(dc_rows, sp_rows, dc_map, sp_map, wanted)
+
+    async def preload_data(
+        self,
+        file_ids: list[int],
+        strategy: str = "in",
+        range_size: int = DEFAULT_RANGE_SIZE,
+    ) -> tuple[PreloadMap, PreloadMap]:
+        """Preload data to reduce the number of queries on the database. The
+        temp_table strategy needs both queries on the session holding the table,
+        so only in and range are supported
+
+        Args:
+            file_ids (list[int]): List of file_id
+            strategy (str): One of ASYNC_PRELOAD_STRATEGIES
+            range_size (int): Width of the windows of the range strategy
+
+        Returns:
+            tuple[PreloadMap, PreloadMap]: Data collection rows and sample and
+            population rows, keyed by file_id
+        """
+        if strategy not in ASYNC_PRELOAD_STRATEGIES:
+            raise ValueError(f"Unsupported preload strategy: {strategy}")
+
+        dc_map = PreloadMap(2)
+        sp_map = PreloadMap(2)
+        if not file_ids:
+            return dc_map, sp_map
+
+        if strategy == "in":
+            format_strings = ",".join(["%s"] * len(file_ids))
+            await self.fetch_preload_rows(
+                f"fdc.file_id IN ({format_strings})", file_ids, dc_map, sp_map
+            )
+        else:
+            wanted = set(file_ids)
+            for start, end in self.file_id_ranges(file_ids, range_size):
+                await self.fetch_preload_rows(
+                    "fdc.file_id BETWEEN %s AND %s",
+                    (start, end),
+                    dc_map,
+                    sp_map,
+                    wanted=wanted,
+                )
+        dc_map.seal()
+        sp_map.seal()
+
+        return dc_map, sp_map
+
+    async def close(self):
+        """Closes the idle connections"""
+        await self.async_provider.close()
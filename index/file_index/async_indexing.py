@@ -0,0 +1,137 @@
+import asyncio
+import click
+from typing import Any, AsyncIterator
+from index.async_elasticsearch_indexer import AsyncElasticSearchIndexer
+from index.pipeline import DEFAULT_QUEUE_SIZE
+from .async_fetch_information_from_db import AsyncFetchFileFromDB
+from .fetch_information_from_db import DEFAULT_BATCH_SIZE
+from .indexing import FileIndexer
+
+
+class AsyncFileIndexer(FileIndexer):
+    """FileIndexer running on an asyncio event loop"""
+
+    def __init__(
+        self,
+        config_file: str,
+        es_host: str,
+        type_of: str,
+        stream: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        preload_strategy: str = "in",
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        **indexer_options,
+    ):
+        """Initializing of the AsyncFileIndexer class
+
+        Args:
+            config_file (str): Configuration file
+            es_host (str): Elasticsearch host
+            type_of (str): Type of whether create or update
+            stream (bool): Stream files from the DB in windows instead of loading the whole table
+            batch_size (int): Number of files per window in stream mode
+            preload_strategy (str): How preload_data selects the file ids: in or range
+            queue_size (int): Maximum number of actions extracted ahead of the bulk
+                requests
+            **indexer_options: AsyncElasticSearchIndexer options, e.g. chunk_size
+        """
+        if type_of == "rebuild":
+            raise ValueError("Rebuilds are only supported by the sync engine")
+
+        super().__init__(
+            config_file,
+            es_host,
+            type_of,
+            stream=stream,
+            batch_size=batch_size,
+            preload_strategy=preload_strategy,
+            queue_size=queue_size,
+            **indexer_options,
+        )
+
+    @property
+    def fetcher(self):
+        """Property function of fetcher
+
+        Returns:
+            AsyncFetchFileFromDB: self.fetcher
+        """
+        if self._fetcher is None:
+            self._fetcher = AsyncFetchFileFromDB(self.data, join_reference=True)
+        return self._fetcher
+
+    @property
+    def indexer(self):
+        """Property function of indexer
+
+        Returns:
+            AsyncElasticSearchIndexer: self.indexer
+        """
+        if self._indexer is None:
+            self._indexer = AsyncElasticSearchIndexer(
+                self.es_host, "file", queue_size=self.queue_size, **self.indexer_options
+            )
+        return self._indexer
+
+    async def create_file_index(self) -> bool:
+        """Create file index
+
+        Returns:
+            bool: True or False if index is created
+        """
+        json_data = self.load_json_file()
+        return await self.indexer.create_index(
+            json_data["settings"], json_data["mappings"]
+        )
+
+    async def windows(self) -> AsyncIterator[list[tuple]]:
+        """Windows of files read from the DB
+
+        Yields:
+            AsyncIterator[list[tuple]]: Rows from fetch_file_from_db
+        """
+        if self.stream:
+            async for files_info in self.fetcher.stream_files_from_db(self.batch_size):
+                yield files_info
+        else:
+            yield await self.fetcher.fetch_file_from_db()
+
+    async def generate_actions(self) -> AsyncIterator[dict[str, Any]]:
+        """Generate actions that will be used for bulk index
+
+        Yields:
+            AsyncIterator[dict[str, Any]]: Bulk actions, in file_id order
+        """
+        async for files_info in self.windows():
+            dc_data, sp_data = await self.fetcher.preload_data(
+                [row[0] for row in files_info], self.preload_strategy
+            )
+            for row in files_info:
+                action = self.build_action((row, dc_data, sp_data))
+                if action is not None:
+                    yield action
+
+    async def build_and_index_file_info(self):
+        """Bulk index for the file
+
+        Returns:
+            dict[str, Any] | None: Bulk indexing summary, None when the index was not created
+        """
+        result = None
+        try:
+            if self.type_of != "create" or await self.create_file_index():
+                result = await self.indexer.load_index(
+                    lambda: self.indexer.bulk_index(self.generate_actions())
+                )
+                click.echo("Bulk indexing successful")
+        finally:
+            await self.fetcher.close()
+            await self.indexer.close()
+
+        return result
+
+
+# Enables programmatic use (from main.py)
+def run(config_file, es_host, type_of, **indexer_options):
+    indexer = AsyncFileIndexer(config_file, es_host, type_of, **indexer_options)
+    return asyncio.run(indexer.build_and_index_file_info())
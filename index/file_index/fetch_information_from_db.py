@@ -1,39 +1,175 @@
-import mysql.connector
-from typing import Any
+from typing import Any, Iterator
 from .utils import create_the_dictionary_structure
-from collections import defaultdict
+from .preload_map import PreloadMap, extend_map
+from functools import partial
+from index.db_connection import get_connection_provider, run_concurrently
+from index.reference_cache import get_reference_data
+
+DEFAULT_BATCH_SIZE = 10000
+DEFAULT_RANGE_SIZE = 50000
+TEMP_TABLE_INSERT_SIZE = 10000
+PRELOAD_STRATEGIES = ("in", "range", "temp_table")
+PRELOAD_TEMP_TABLE = "preload_file_ids"
+
+FETCH_FILES_SQL = """SELECT f.file_id, f.url, f.md5, dt.code, ag.description
+    FROM file f LEFT JOIN data_type dt ON f.data_type_id = dt.data_type_id
+    LEFT JOIN analysis_group ag ON f.analysis_group_id = ag.analysis_group_id
+    ORDER BY file_id"""
+
+FETCH_NEW_FILES_SQL = """SELECT f.file_id, f.url, f.md5, dt.code, ag.description
+    FROM file f LEFT JOIN data_type dt ON f.data_type_id = dt.data_type_id
+    LEFT JOIN analysis_group ag ON f.analysis_group_id = ag.analysis_group_id
+    WHERE (f.foreign_file IS TRUE OR f.in_current_tree IS TRUE)
+    AND f.indexed_in_elasticsearch IS NOT TRUE
+    ORDER BY file_id"""
+
+# Same rows with the reference ids, resolved against ReferenceData
+FETCH_FILE_IDS_SQL = """SELECT f.file_id, f.url, f.md5, f.data_type_id, f.analysis_group_id
+    FROM file f ORDER BY file_id"""
+
+FETCH_NEW_FILE_IDS_SQL = """SELECT f.file_id, f.url, f.md5, f.data_type_id, f.analysis_group_id
+    FROM file f
+    WHERE (f.foreign_file IS TRUE OR f.in_current_tree IS TRUE)
+    AND f.indexed_in_elasticsearch IS NOT TRUE
+    ORDER BY file_id"""
 
 class FetchFileFromDB:
-    def __init__(self, db_config: dict):
+    def __init__(self, db_config: dict, join_reference: bool = False):
+        """Initialization of the FetchFileFromDB class
+
+        Args:
+            db_config (dict): DB configuration
+            join_reference (bool): Resolve data types, analysis groups, data
+                collections and populations against ReferenceData instead of in SQL
+        """
         self.db_config = db_config
+        self.connection_provider = get_connection_provider(db_config)
+        self.join_reference = join_reference
+        self.reference = get_reference_data(db_config) if join_reference else None
 
-    def fetch_file_from_db(self) -> list[tuple]:
+    def files_sql(
+        self, new: bool = False, id_range: tuple[int, int] | None = None
+    ) -> str:
+        """Query of the file rows
+
+        Args:
+            new (bool): Only the files not yet flagged indexed_in_elasticsearch
+            id_range (tuple[int, int] | None): Only the files of this inclusive
+                file_id range, passed as the two parameters of the query
+
+        Returns:
+            str: The query
+        """
+        if self.join_reference:
+            sql = FETCH_NEW_FILE_IDS_SQL if new else FETCH_FILE_IDS_SQL
+        else:
+            sql = FETCH_NEW_FILES_SQL if new else FETCH_FILES_SQL
+        if id_range is None:
+            return sql
+
+        head, order = sql.rsplit("ORDER BY", 1)
+        keyword = "AND" if "WHERE" in head else "WHERE"
+        return f"{head}{keyword} f.file_id BETWEEN %s AND %s\n    ORDER BY{order}"
+
+    def resolve_file_rows(self, files: list[tuple]) -> list[tuple]:
+        """Replaces the data type and analysis group ids of file rows by their code
+        and description, like the LEFT JOINs of FETCH_FILES_SQL
+
+        Args:
+            files (list[tuple]): Rows from one of the FETCH_*_IDS_SQL queries
+
+        Returns:
+            list[tuple]: Rows with the shape of fetch_file_from_db
+        """
+        if not self.join_reference:
+            return files
+
+        reference = self.reference
+        return [
+            (
+                file_id,
+                url,
+                md5,
+                reference.value("data_type", data_type_id, "code"),
+                reference.value("analysis_group", analysis_group_id, "description"),
+            )
+            for file_id, url, md5, data_type_id, analysis_group_id in files
+        ]
+
+    def fetch_file_from_db(
+        self, id_range: tuple[int, int] | None = None
+    ) -> list[tuple]:
         """Fetches file from DB
 
+        Args:
+            id_range (tuple[int, int] | None): Only the files of this inclusive
+                file_id range
+
         Returns:
             list[tuple]: A list of rows from the db
         """
 
-        fetch_files_sql = """SELECT f.file_id, f.url, f.md5, dt.code, ag.description
-    FROM file f LEFT JOIN data_type dt ON f.data_type_id = dt.data_type_id
-    LEFT JOIN analysis_group ag ON f.analysis_group_id = ag.analysis_group_id
-    ORDER BY file_id"""
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(self.files_sql(id_range=id_range), id_range or ())
+            files = cursor.fetchall()
+            cursor.close()
 
-        db = mysql.connector.connect(
-            host=self.db_config["host"],
-            port=self.db_config["port"],
-            user=self.db_config["user"],
-            database=self.db_config["database"],
-            password=self.db_config["password"],
-        )
+        return self.resolve_file_rows(files)
 
-        cursor = db.cursor()
-        cursor.execute(fetch_files_sql)
-        files = cursor.fetchall()
-        cursor.close()
-        db.close()
+    def fetch_new_files_from_db(self) -> list[tuple]:
+        """Fetches the files which are in the current tree (or foreign) but not yet
+        flagged as indexed_in_elasticsearch, i.e. new since the last incremental run
 
-        return files
+        Returns:
+            list[tuple]: A list of rows from the db, same shape as fetch_file_from_db
+        """
+
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(self.files_sql(new=True))
+            files = cursor.fetchall()
+            cursor.close()
+
+        return self.resolve_file_rows(files)
+
+    def stream_files_from_db(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        id_range: tuple[int, int] | None = None,
+    ) -> Iterator[list[tuple]]:
+        """Streams files from the DB through an unbuffered cursor, in file_id order.
+        The connection stays checked out while the generator runs, so the pool needs
+        a second connection for the preload queries of each window
+
+        Args:
+            batch_size (int): Number of rows fetched per window
+            id_range (tuple[int, int] | None): Only the files of this inclusive
+                file_id range
+
+        Yields:
+            Iterator[list[tuple]]: Windows of rows, same shape as fetch_file_from_db
+        """
+        if self.connection_provider.pool_size < 2:
+            raise ValueError("Streaming files needs a pool_size of at least 2")
+
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor(buffered=False)
+            cursor.execute(self.files_sql(id_range=id_range), id_range or ())
+            exhausted = False
+            try:
+                while True:
+                    files = cursor.fetchmany(batch_size)
+                    if not files:
+                        exhausted = True
+                        break
+                    yield self.resolve_file_rows(files)
+            finally:
+                if not exhausted:
+                    # the consumer stopped early, drain the result before the
+                    # connection goes back to the pool
+                    db.consume_results()
+                cursor.close()
 
     def fetch_file_id_from_db(self)-> list:
         """_summary_
@@ -43,19 +179,11 @@ class FetchFileFromDB:
         """        
         fetch_file_id_sql = """SELECT file_id FROM file"""
 
-        db = mysql.connector.connect(
-            host=self.db_config["host"],
-            port=self.db_config["port"],
-            user=self.db_config["user"],
-            database=self.db_config["database"],
-            password=self.db_config["password"],
-        )
-
-        cursor = db.cursor()
-        cursor.execute(fetch_file_id_sql)
-        file_ids = [row[0] for row in cursor.fetchall()] 
-        cursor.close()
-        db.close()
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(fetch_file_id_sql)
+            file_ids = [row[0] for row in cursor.fetchall()] 
+            cursor.close()
 
         return file_ids
 
@@ -70,102 +198,366 @@ class FetchFileFromDB:
                         WHERE f.foreign_file IS NOT TRUE AND f.in_current_tree IS NOT TRUE AND f.indexed_in_elasticsearch IS TRUE
                         ORDER BY file_id"""
 
-        db = mysql.connector.connect(
-            host=self.db_config["host"],
-            port=self.db_config["port"],
-            user=self.db_config["user"],
-            database=self.db_config["database"],
-            password=self.db_config["password"],
-        )
-
-        cursor = db.cursor()
-        cursor.execute(fetch_old_files_sql)
-        old_files = cursor.fetchall()
-        cursor.close()
-        db.close()
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(fetch_old_files_sql)
+            old_files = cursor.fetchall()
+            cursor.close()
 
         return old_files
 
 
-    def update_elasticsearch_file(self) -> list[tuple]:
-        """Update the column set indexed_in_elasticsearch = 1 based on if foreign file/ in_current_tree is true
+    def update_elasticsearch_file(
+        self, file_ids: list[int], batch_size: int = DEFAULT_BATCH_SIZE
+    ):
+        """Update the column set indexed_in_elasticsearch = 1 based on if foreign file/ in_current_tree is true,
+        only for the files Elasticsearch acknowledged, so that the files added or reset
+        during the run are picked up by the next one
 
-        Returns:
-            list[tuple]: A list of rows from the db
+        Args:
+            file_ids (list[int]): Files indexed or deleted by the run
+            batch_size (int): Number of file ids per UPDATE
         """
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            for start in range(0, len(file_ids), batch_size):
+                batch = file_ids[start : start + batch_size]
+                placeholders = ",".join(["%s"] * len(batch))
+                cursor.execute(
+                    f"""UPDATE file SET indexed_in_elasticsearch = (foreign_file IS TRUE OR in_current_tree IS TRUE)
+                    WHERE file_id IN ({placeholders})""",
+                    batch,
+                )
+            db.commit()
+            cursor.close()
+    
 
-        update_elasticsearch_sql = """UPDATE file SET indexed_in_elasticsearch = (foreign_file IS TRUE OR in_current_tree IS TRUE)"""
-
-        db = mysql.connector.connect(
-            host=self.db_config["host"],
-            port=self.db_config["port"],
-            user=self.db_config["user"],
-            database=self.db_config["database"],
-            password=self.db_config["password"],
-        )
+    @staticmethod
+    def file_id_ranges(
+        file_ids: list[int], range_size: int = DEFAULT_RANGE_SIZE
+    ) -> list[tuple[int, int]]:
+        """Splits file ids into contiguous (start, end) windows no wider than range_size,
+        gaps between windows are skipped
 
-        cursor = db.cursor()
-        cursor.execute(update_elasticsearch_sql)
-        db.commit()
-        cursor.close()
-        db.close()
-    
+        Args:
+            file_ids (list[int]): List of file_id
+            range_size (int): Maximum width of a window
 
-    def preload_data(self, file_ids: list[int]) -> tuple[defaultdict, defaultdict] :
-        """Preload data to reduce the number of queries on the database
+        Returns:
+            list[tuple[int, int]]: Inclusive file_id windows
+        """
+        ranges = []
+        sorted_ids = sorted(file_ids)
+        if not sorted_ids:
+            return ranges
+
+        start = end = sorted_ids[0]
+        for file_id in sorted_ids[1:]:
+            if file_id - start >= range_size:
+                ranges.append((start, end))
+                start = file_id
+            end = file_id
+        ranges.append((start, end))
+
+        return ranges
+
+    @staticmethod
+    def partition_file_ids(
+        file_ids: list[int], partitions: int
+    ) -> list[tuple[int, int]]:
+        """Splits file ids into contiguous (start, end) ranges holding the same
+        number of files, whatever the gaps in the id space
 
         Args:
             file_ids (list[int]): List of file_id
+            partitions (int): Number of ranges
 
         Returns:
-            tuple[defaultdict, defaultdict]: Default dict
-        """              
-        format_strings = ",".join(['%s'] * len(file_ids))
+            list[tuple[int, int]]: Inclusive file_id ranges, fewer than partitions
+            when there are fewer files
+        """
+        sorted_ids = sorted(file_ids)
+        size, extra = divmod(len(sorted_ids), max(partitions, 1))
+        ranges = []
+        start = 0
+        for partition in range(max(partitions, 1)):
+            end = start + size + (partition < extra)
+            if end > start:
+                ranges.append((sorted_ids[start], sorted_ids[end - 1]))
+            start = end
+
+        return ranges
+
+    def preload_sql(self, predicate: str, tables: str = "") -> tuple[str, str]:
+        """Builds the data collection and the sample/population preload queries. When
+        joining against ReferenceData, they return data_collection_id and
+        population_id instead of the joined columns
+
+        Args:
+            predicate (str): SQL condition on fdc.file_id
+            tables (str): Extra tables joined by the predicate, e.g. a temporary table
+
+        Returns:
+            tuple[str, str]: The data collection query and the sample/population query
+        """
+        if self.join_reference:
+            fetch_datacollections_sql = f"""SELECT fdc.file_id, fdc.data_collection_id from file_data_collection fdc{tables}
+                                            WHERE {predicate}"""
+
+            fetch_sample_sql = f"""SELECT distinct fdc.file_id, sample.name, dc_sample_pop_assign.population_id
+                                from file_data_collection fdc, sample_file, sample, dc_sample_pop_assign{tables}
+                                where {predicate} and sample_file.file_id = fdc.file_id
+                                and sample_file.sample_id = sample.sample_id and sample.sample_id=dc_sample_pop_assign.sample_id and
+                                fdc.data_collection_id = dc_sample_pop_assign.data_collection_id"""
+
+            return fetch_datacollections_sql, fetch_sample_sql
 
-        fetch_datacollections_sql = f"""SELECT fdc.file_id, dc.title, dc.reuse_policy from data_collection dc, file_data_collection fdc
-                                        WHERE fdc.data_collection_id=dc.data_collection_id AND fdc.file_id IN ({format_strings})
+        fetch_datacollections_sql = f"""SELECT fdc.file_id, dc.title, dc.reuse_policy from data_collection dc, file_data_collection fdc{tables}
+                                        WHERE fdc.data_collection_id=dc.data_collection_id AND {predicate}
                                         ORDER BY dc.reuse_policy_precedence"""
-        
 
-        db = mysql.connector.connect(
-            host=self.db_config["host"],
-            port=self.db_config["port"],
-            user=self.db_config["user"],
-            database=self.db_config["database"],
-            password=self.db_config["password"],
+        fetch_sample_sql =  f"""SELECT  distinct fdc.file_id, sample.name, population.description AS pop_description 
+                            from file_data_collection fdc, sample_file, sample, dc_sample_pop_assign, 
+                            population{tables} where {predicate} and sample_file.file_id = fdc.file_id  
+                            and sample_file.sample_id = sample.sample_id and sample.sample_id=dc_sample_pop_assign.sample_id and 
+                            fdc.data_collection_id = dc_sample_pop_assign.data_collection_id and dc_sample_pop_assign.population_id =population.population_id"""
+
+        return fetch_datacollections_sql, fetch_sample_sql
+
+    def add_preload_rows(
+        self,
+        dc_rows: list[tuple],
+        sp_rows: list[tuple],
+        dc_map: PreloadMap,
+        sp_map: PreloadMap,
+        wanted: set | None = None,
+    ):
+        """Adds the rows of the preload queries to dc_map and sp_map, resolving the
+        data collection and population ids when joining against ReferenceData
+
+        Args:
+            dc_rows (list[tuple]): Rows of the data collection query
+            sp_rows (list[tuple]): Rows of the sample/population query
+            dc_map (PreloadMap): Data collection rows keyed by file_id, or a
+                defaultdict(list)
+            sp_map (PreloadMap): Sample and population rows keyed by file_id, or a
+                defaultdict(list)
+            wanted (set | None): Only keep rows for these file ids when the predicate is wider
+        """
+        if self.join_reference:
+            reference = self.reference
+            collections = [
+                (file_id, reference.get("data_collection", dc_id))
+                for file_id, dc_id in dc_rows
+            ]
+            # inner join and ORDER BY dc.reuse_policy_precedence, NULL first
+            collections = sorted(
+                (row for row in collections if row[1] is not None),
+                key=lambda row: (
+                    row[1]["reuse_policy_precedence"] is not None,
+                    row[1]["reuse_policy_precedence"] or 0,
+                ),
+            )
+            dc_rows = [
+                (file_id, dc["title"], dc["reuse_policy"]) for file_id, dc in collections
+            ]
+
+            samples = {}
+            for file_id, sample, population_id in sp_rows:
+                population = reference.get("population", population_id)
+                if population is not None:
+                    samples[(file_id, sample, population["description"])] = None
+            sp_rows = list(samples)
+
+        if wanted is not None:
+            dc_rows = [row for row in dc_rows if row[0] in wanted]
+            sp_rows = [row for row in sp_rows if row[0] in wanted]
+        extend_map(dc_map, dc_rows)
+        extend_map(sp_map, sp_rows)
+
+    def fetch_preload_rows(
+        self,
+        cursor,
+        predicate: str,
+        params: list | tuple,
+        dc_map: PreloadMap,
+        sp_map: PreloadMap,
+        tables: str = "",
+        wanted: set | None = None,
+    ):
+        """Runs the data collection and the sample/population preload queries for the
+        files matching predicate and adds the rows to dc_map and sp_map
+
+        Args:
+            cursor: Cursor of a checked out connection
+            predicate (str): SQL condition on fdc.file_id
+            params (list | tuple): Parameters of the predicate
+            dc_map (PreloadMap): Data collection rows keyed by file_id
+            sp_map (PreloadMap): Sample and population rows keyed by file_id
+            tables (str): Extra tables joined by the predicate, e.g. a temporary table
+            wanted (set | None): Only keep rows for these file ids when the predicate is wider
+        """
+        fetch_datacollections_sql, fetch_sample_sql = self.preload_sql(predicate, tables)
+
+        cursor.execute(fetch_datacollections_sql, params)
+        dc_rows = cursor.fetchall()
+
+        cursor.execute(fetch_sample_sql, params)
+        sp_rows = cursor.fetchall()
+
+        self.add_preload_rows(dc_rows, sp_rows, dc_map, sp_map, wanted)
+
+    def preload_windows(
+        self, file_ids: list[int], strategy: str, range_size: int
+    ) -> list[tuple[str, list | tuple, set | None]]:
+        """Predicates of the preload queries of the in and range strategies
+
+        Args:
+            file_ids (list[int]): List of file_id
+            strategy (str): in or range
+            range_size (int): Width of the windows of the range strategy
+
+        Returns:
+            list[tuple[str, list | tuple, set | None]]: (predicate, params, wanted)
+            for every pair of queries, see fetch_preload_rows
+        """
+        if strategy == "in":
+            format_strings = ",".join(["%s"] * len(file_ids))
+            return [(f"fdc.file_id IN ({format_strings})", file_ids, None)]
+
+        wanted = set(file_ids)
+        return [
+            ("fdc.file_id BETWEEN %s AND %s", (start, end), wanted)
+            for start, end in self.file_id_ranges(file_ids, range_size)
+        ]
+
+    def fetch_preload_rows_concurrently(
+        self,
+        windows: list[tuple[str, list | tuple, set | None]],
+        dc_map: PreloadMap,
+        sp_map: PreloadMap,
+        concurrency: int | None = None,
+    ):
+        """Runs the preload queries of every window at the same time, each on a
+        connection of its own, and adds the rows to dc_map and sp_map in window order
+
+        Args:
+            windows (list[tuple[str, list | tuple, set | None]]): From preload_windows
+            dc_map (PreloadMap): Data collection rows keyed by file_id
+            sp_map (PreloadMap): Sample and population rows keyed by file_id
+            concurrency (int | None): Maximum number of queries running at the same
+                time, the pool size when None
+        """
+        fetchall = self.connection_provider.fetchall
+        calls = {}
+        for index, (predicate, params, _) in enumerate(windows):
+            fetch_datacollections_sql, fetch_sample_sql = self.preload_sql(predicate)
+            calls[index, "dc"] = partial(fetchall, fetch_datacollections_sql, params)
+            calls[index, "sp"] = partial(fetchall, fetch_sample_sql, params)
+        rows = run_concurrently(
+            calls, concurrency or self.connection_provider.pool_size
         )
 
-        cursor = db.cursor()
-        cursor.execute(fetch_datacollections_sql, file_ids)
-        dc_map = defaultdict(list)
-        for file_id, collection, resuse_policy in cursor.fetchall():
-            dc_map[file_id].append((collection, resuse_policy))
-        
+        for index, (_, _, wanted) in enumerate(windows):
+            self.add_preload_rows(
+                rows[index, "dc"], rows[index, "sp"], dc_map, sp_map, wanted
+            )
+
+    def preload_data(
+        self,
+        file_ids: list[int],
+        strategy: str = "in",
+        range_size: int = DEFAULT_RANGE_SIZE,
+        concurrency: int | None = 1,
+    ) -> tuple[PreloadMap, PreloadMap]:
+        """Preload data to reduce the number of queries on the database. The rows
+        are kept in columnar PreloadMaps, a few bytes per row instead of a tuple
+
+        Strategies:
+            in: one IN (...) list with every file_id, fine for small windows
+            range: contiguous file_id BETWEEN windows of at most range_size ids
+            temp_table: the ids are loaded into a session temporary table joined
+                server side, needs the CREATE TEMPORARY TABLES privilege
 
-        fetch_sample_sql =  f"""SELECT  distinct file_data_collection.file_id, sample.name, population.description AS pop_description 
-                            from file_data_collection, sample_file, sample, dc_sample_pop_assign, 
-                            population where file_data_collection.file_id IN ({format_strings}) and sample_file.file_id = file_data_collection.file_id  
-                            and sample_file.sample_id = sample.sample_id and sample.sample_id=dc_sample_pop_assign.sample_id and 
-                            file_data_collection.data_collection_id = dc_sample_pop_assign.data_collection_id and dc_sample_pop_assign.population_id =population.population_id"""
+        Args:
+            file_ids (list[int]): List of file_id
+            strategy (str): One of PRELOAD_STRATEGIES
+            range_size (int): Width of the windows of the range strategy
+            concurrency (int | None): Maximum number of preload queries running at
+                the same time on their own connections, None for the pool size. 1
+                runs them one after the other on one connection, as temp_table
+                always does since its table belongs to one session
 
-        cursor.execute(fetch_sample_sql, file_ids)
-        sp_map = defaultdict(list)
-        for file_id, sample, population in cursor.fetchall():
-            sp_map[file_id].append((sample, population))
+        Returns:
+            tuple[PreloadMap, PreloadMap]: (title, reuse policy) rows and (sample
+            name, population description) rows, keyed by file_id
+        """
+        if strategy not in PRELOAD_STRATEGIES:
+            raise ValueError(f"Unsupported preload strategy: {strategy}")
+
+        dc_map = PreloadMap(2)
+        sp_map = PreloadMap(2)
+        if not file_ids:
+            return dc_map, sp_map
+
+        if strategy != "temp_table" and concurrency != 1:
+            self.fetch_preload_rows_concurrently(
+                self.preload_windows(file_ids, strategy, range_size),
+                dc_map,
+                sp_map,
+                concurrency,
+            )
+        else:
+            with self.connection_provider.connection() as db:
+                cursor = db.cursor()
+                if strategy == "temp_table":
+                    self.load_file_id_temp_table(cursor, file_ids)
+                    try:
+                        self.fetch_preload_rows(
+                            cursor, f"fdc.file_id = {PRELOAD_TEMP_TABLE}.file_id", (),
+                            dc_map, sp_map, tables=f", {PRELOAD_TEMP_TABLE}",
+                        )
+                    finally:
+                        cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {PRELOAD_TEMP_TABLE}")
+                else:
+                    for predicate, params, wanted in self.preload_windows(
+                        file_ids, strategy, range_size
+                    ):
+                        self.fetch_preload_rows(
+                            cursor, predicate, params, dc_map, sp_map, wanted=wanted
+                        )
+                cursor.close()
+        dc_map.seal()
+        sp_map.seal()
 
-        
-        cursor.close()
-        db.close()
         return dc_map, sp_map
+
+    def load_file_id_temp_table(self, cursor, file_ids: list[int]):
+        """Loads file ids into the session temporary table used by the temp_table strategy
+
+        Args:
+            cursor: Cursor of a checked out connection
+            file_ids (list[int]): List of file_id
+        """
+        cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {PRELOAD_TEMP_TABLE}")
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {PRELOAD_TEMP_TABLE} (file_id INT UNSIGNED NOT NULL PRIMARY KEY)"
+        )
+        insert_sql = f"INSERT IGNORE INTO {PRELOAD_TEMP_TABLE} (file_id) VALUES (%s)"
+        for start in range(0, len(file_ids), TEMP_TABLE_INSERT_SIZE):
+            cursor.executemany(
+                insert_sql,
+                [(file_id,) for file_id in file_ids[start : start + TEMP_TABLE_INSERT_SIZE]],
+            )
         
  
-    def populate_the_dictionary(self, row: tuple, dc_map: defaultdict, sp_map: defaultdict) -> dict[str, Any]:
+    def populate_the_dictionary(self, row: tuple, dc_map: PreloadMap, sp_map: PreloadMap) -> dict[str, Any]:
         """Populate the file dictionary 
 
         Args:
             row (tuple): The row from the function fetch_file_from_db
-            dc_map (defaultdict): Containing data collection data with file id as the key
-            sp_map (defaultdict): Containing samples and population data with file as the key
+            dc_map (PreloadMap): Containing data collection data with file id as the key
+            sp_map (PreloadMap): Containing samples and population data with file as the key
 
         Returns:
             dict[str, Any]: Built file dictionary
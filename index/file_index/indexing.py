@@ -1,29 +1,170 @@
 import click
 import sys
 import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from typing import Any
-from index.elasticsearch_indexer import ElasticSearchIndexer
-from .fetch_information_from_db import FetchFileFromDB
+from index.elasticsearch_indexer import bulk_options
+from index.bulk_export import create_indexer, export_options
+from index.checkpoint import Checkpoint, checkpoint_options
+from index.metrics import get_metrics, metrics_options
+from .fetch_information_from_db import (
+    FetchFileFromDB,
+    DEFAULT_BATCH_SIZE,
+    PRELOAD_STRATEGIES,
+)
 from index.config_read import read_from_config_file
+from index.pipeline import IndexingPipeline, DEFAULT_QUEUE_SIZE, pipeline_options
 
 json_file = "index/file_index/file.json"
+
+DEFAULT_PARTITIONS = 1
+
+
+def index_partition(
+    config_file: str,
+    es_host: str,
+    type_of: str,
+    id_range: tuple[int, int],
+    index_name: str,
+    metrics: bool,
+    options: dict[str, Any],
+) -> dict[str, Any]:
+    """Entry point of a partition worker process: indexes the files of a file_id
+    range into an index the coordinator created
+
+    Args:
+        config_file (str): Configuration file
+        es_host (str): Elasticsearch host
+        type_of (str): Type of: create, update or rebuild
+        id_range (tuple[int, int]): Inclusive file_id range of the partition
+        index_name (str): Physical index the actions go to
+        metrics (bool): Record metrics and return them under "metrics"
+        options (dict[str, Any]): FileIndexer options
+
+    Returns:
+        dict[str, Any]: Bulk indexing summary of the partition
+    """
+    if metrics:
+        get_metrics().enable()
+    file_indexer = FileIndexer(
+        config_file, es_host, type_of, id_range=id_range, **options
+    )
+    file_indexer.indexer.index_name = index_name
+    result = file_indexer.index_range()
+    if metrics:
+        result["metrics"] = get_metrics().state()
+
+    return result
+
+
 class FileIndexer:
     """FileIndexer class"""
 
-    def __init__(self, config_file: str, es_host: str, type_of: str):
+    def __init__(
+        self,
+        config_file: str,
+        es_host: str,
+        type_of: str,
+        stream: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        preload_strategy: str = "in",
+        preload_concurrency: int | None = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        incremental: bool = False,
+        partitions: int = DEFAULT_PARTITIONS,
+        id_range: tuple[int, int] | None = None,
+        checkpoint_file: str | None = None,
+        resume: bool = False,
+        **indexer_options,
+    ):
         """Initializing of the Sample Indexer class
 
         Args:
             config_file (str): Configuration file
             es_host (str): Elasticsearch host
             type_of (str): Type of whether create or update
+            stream (bool): Stream files from the DB in windows instead of loading the whole table
+            batch_size (int): Number of files per window in stream mode
+            preload_strategy (str): How preload_data selects the file ids: in, range or temp_table
+            preload_concurrency (int | None): Maximum number of preload queries
+                running at the same time on their own connections, None for the
+                pool size, 1 runs them one after the other
+            queue_size (int): Maximum number of items waiting between two pipeline stages
+            incremental (bool): Only index the files not yet flagged indexed_in_elasticsearch,
+                delete the files which left the current tree, then update the flags
+            partitions (int): Number of worker processes, each indexing an equal
+                share of the file_id space with its own connections and client
+            id_range (tuple[int, int] | None): Only index the files of this
+                inclusive file_id range, set for the partition workers
+            checkpoint_file (str | None): State file of the last acknowledged
+                file_id, written as bulk chunks are confirmed
+            resume (bool): Continue the interrupted run of checkpoint_file after
+                its last acknowledged file_id
+            **indexer_options: ElasticSearchIndexer options, e.g. bulk_mode, or the
+                export options of create_indexer
         """
+        if incremental and type_of != "update":
+            raise ValueError("Incremental mode updates an existing index, use --type_of update")
+        if partitions > 1 and (
+            incremental
+            or indexer_options.get("hash_store")
+            or indexer_options.get("export_dir")
+        ):
+            raise ValueError(
+                "Partitions cannot be combined with incremental, hash_store or export_dir"
+            )
+        if checkpoint_file and (
+            incremental or partitions > 1 or indexer_options.get("export_dir")
+        ):
+            raise ValueError(
+                "Checkpoints cannot be combined with incremental, partitions or export_dir"
+            )
+        if incremental and indexer_options.get("export_dir"):
+            # the flags would mark files indexed which only reached local files
+            raise ValueError("Incremental mode cannot be combined with export_dir")
+        if resume and not checkpoint_file:
+            raise ValueError("Resuming needs the checkpoint_file of the interrupted run")
+
         self.config_file = config_file
         self.es_host = es_host
         self.type_of = type_of
+        self.stream = stream
+        self.batch_size = batch_size
+        self.preload_strategy = preload_strategy
+        self.preload_concurrency = preload_concurrency
+        self.incremental = incremental
+        self.partitions = partitions
+        self.id_range = id_range
         self._data = None
         self._fetcher = None
         self._indexer = None
+        self.queue_size = queue_size
+        self.indexer_options = indexer_options
+        self.checkpoint = (
+            Checkpoint(checkpoint_file, self.checkpoint_params(), resume)
+            if checkpoint_file
+            else None
+        )
+
+    def checkpoint_params(self) -> dict[str, Any]:
+        """Parameters a resumed run must share with the interrupted one
+
+        Returns:
+            dict[str, Any]: The parameters selecting and sending the files
+        """
+        return {
+            "index": "file",
+            "config_file": os.path.abspath(self.config_file),
+            "es_host": self.es_host,
+            "type_of": self.type_of,
+            "stream": self.stream,
+            "batch_size": self.batch_size,
+            "id_range": list(self.id_range) if self.id_range else None,
+        }
 
     @property
     def data(self):
@@ -45,7 +186,7 @@ class FileIndexer:
             _type_: self.fetcher
         """
         if self._fetcher is None:
-            self._fetcher = FetchFileFromDB(self.data)
+            self._fetcher = FetchFileFromDB(self.data, join_reference=True)
         return self._fetcher
 
     @property
@@ -56,7 +197,11 @@ class FileIndexer:
             _type_: self.indexer
         """
         if self._indexer is None:
-            self._indexer = ElasticSearchIndexer(self.es_host, "file")
+            self._indexer = create_indexer(
+                self.es_host, "file", **self.indexer_options
+            )
+            if self.checkpoint and self.checkpoint.resumed:
+                self._indexer.overwrite = True
         return self._indexer
     
     def load_json_file(self) -> dict[str, Any]:
@@ -84,36 +229,288 @@ class FileIndexer:
         return file
 
 
+    def read_files(self):
+        """Read files from the DB in windows, together with their preloaded rows
+
+        Yields:
+            tuple: (row, dc_map, sp_map) for every file
+        """
+        id_range = self.id_range
+        if self.checkpoint and self.checkpoint.last_key is not None:
+            # resumed after the last acknowledged file_id
+            id_range = (
+                self.checkpoint.last_key + 1,
+                self.id_range[1] if self.id_range else sys.maxsize,
+            )
+        if self.incremental:
+            windows = [self.fetcher.fetch_new_files_from_db()]
+        elif self.stream:
+            windows = self.fetcher.stream_files_from_db(self.batch_size, id_range)
+        else:
+            windows = [self.fetcher.fetch_file_from_db(id_range)]
+
+        for files_info in windows:
+            dc_data, sp_data = self.fetcher.preload_data(
+                [row[0] for row in files_info],
+                self.preload_strategy,
+                concurrency=self.preload_concurrency,
+            )
+            for row in files_info:
+                yield row, dc_data, sp_data
+
+    def build_action(self, item: tuple) -> dict[str, Any]:
+        """Build the bulk action of a file
+
+        Args:
+            item (tuple): An item from read_files
+
+        Returns:
+            dict[str, Any]: Bulk action
+        """
+        row, dc_data, sp_data = item
+        code = row[0]
+        files_data = self.fetcher.populate_the_dictionary(row, dc_data, sp_data)
+        action = self.indexer.index_data(files_data, code, self.type_of)
+        if action is not None and self.checkpoint:
+            self.checkpoint.built(code)
+        return action
+
     def generate_actions(self):
         """Generate actions that will be used for bulk index
 
         Yields:
             _type_: A generator
         """
-        files_info = self.fetcher.fetch_file_from_db()
-        file_id_info = self.fetcher.fetch_file_id_from_db()
-        dc_data, sp_data = self.fetcher.preload_data(file_id_info)
-        
-        for row in files_info:
-            code = row[0]
-            files_data = self.fetcher.populate_the_dictionary(row, dc_data, sp_data )
-            yield self.indexer.index_data(files_data, code, self.type_of)
+        for item in self.read_files():
+            action = self.build_action(item)
+            if action is not None:
+                yield action
+
+    def delete_old_files(self) -> dict[str, Any]:
+        """Deletes the documents of the files which dropped out of the current tree
+
+        Returns:
+            dict[str, Any]: Bulk indexing summary of the delete actions
+        """
+        old_files = self.fetcher.fetch_old_files_from_db()
+        result = self.indexer.bulk_index(
+            self.indexer.delete_data(row[0]) for row in old_files
+        )
+        click.echo(f"Deleted {result['success']} of {len(old_files)} old files")
+
+        return result
+
+    def index_incremental(self, pipeline: IndexingPipeline) -> dict[str, Any]:
+        """Indexes the new files and deletes the old ones. The indexed_in_elasticsearch
+        flags are only updated for the files Elasticsearch acknowledged, so that the
+        next run retries the failures
+
+        Args:
+            pipeline (IndexingPipeline): Pipeline reading the new files
+
+        Returns:
+            dict[str, Any]: Bulk indexing summary of the new files, with the summary of
+            the delete actions under "deleted"
+        """
+        self.indexer.acknowledged = []
+        try:
+            result = pipeline.run()
+            result["deleted"] = self.delete_old_files()
+        finally:
+            file_ids = [int(doc_id) for doc_id in self.indexer.acknowledged]
+            self.indexer.acknowledged = None
+
+        self.fetcher.update_elasticsearch_file(file_ids)
+        click.echo(f"indexed_in_elasticsearch updated for {len(file_ids)} files")
+        if result["failed"] or result["deleted"]["failed"]:
+            click.echo("Some actions failed, their files are retried by the next run")
+
+        return result
+
+    def pipeline(self) -> IndexingPipeline:
+        """Pipeline reading, building and sending the files
+
+        Returns:
+            IndexingPipeline: The pipeline
+        """
+        return IndexingPipeline(
+            self.read_files,
+            self.build_action,
+            self.indexer.bulk_index,
+            self.queue_size,
+            name=self.indexer.alias,
+        )
+
+    def loader(self, pipeline: IndexingPipeline):
+        """Load of the pipeline, which writes the checkpoints when checkpoint_file
+        is set
+
+        Args:
+            pipeline (IndexingPipeline): Pipeline reading the files
+
+        Returns:
+            Callable[[], dict[str, Any]]: Runs the pipeline and returns its summary
+        """
+        if self.checkpoint is None:
+            return pipeline.run
+        return partial(self.checkpoint.run, self.indexer, pipeline.run)
+
+    def index_range(self) -> dict[str, Any]:
+        """Indexes the files of id_range in an existing index, the work of a
+        partition worker
+
+        Returns:
+            dict[str, Any]: Bulk indexing summary, with the pipeline statistics
+        """
+        pipeline = self.pipeline()
+        result = pipeline.run()
+        result["pipeline"] = pipeline.stats()
+        result["id_range"] = self.id_range
+
+        return result
+
+    def index_partitions(self) -> dict[str, Any]:
+        """Splits the file ids into partitions and indexes them in worker processes.
+        The workers are spawned, so that none inherits the connection pools or the
+        clients of this process
+
+        Returns:
+            dict[str, Any]: Bulk indexing summary of every partition together, the
+            summary of each under "partitions"
+        """
+        ranges = self.fetcher.partition_file_ids(
+            self.fetcher.fetch_file_id_from_db(), self.partitions
+        )
+        options = {
+            "stream": self.stream,
+            "batch_size": self.batch_size,
+            "preload_strategy": self.preload_strategy,
+            "preload_concurrency": self.preload_concurrency,
+            "queue_size": self.queue_size,
+            **self.indexer_options,
+        }
+        metrics = get_metrics()
+        summary = {
+            "success": 0,
+            "failed": 0,
+            "errors": [],
+            "chunks": [],
+            "partitions": [],
+        }
+        stages = {}
+        start = time.perf_counter()
+        try:
+            with ProcessPoolExecutor(
+                max_workers=max(len(ranges), 1),
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        index_partition,
+                        self.config_file,
+                        self.es_host,
+                        self.type_of,
+                        id_range,
+                        self.indexer.index_name,
+                        metrics.enabled,
+                        options,
+                    )
+                    for id_range in ranges
+                ]
+                for future in futures:
+                    result = future.result()
+                    if "metrics" in result:
+                        metrics.merge(result.pop("metrics"))
+                    for outcome in ("success", "failed", "errors", "chunks"):
+                        summary[outcome] += result[outcome]
+                    for stage, stage_stats in result["pipeline"]["stages"].items():
+                        totals = stages.setdefault(stage, {"count": 0, "busy": 0.0})
+                        totals["count"] += stage_stats["count"]
+                        totals["busy"] += stage_stats["busy"]
+                    summary["partitions"].append(
+                        {
+                            "id_range": result["id_range"],
+                            "success": result["success"],
+                            "failed": result["failed"],
+                            "elapsed": result["pipeline"]["elapsed"],
+                        }
+                    )
+        finally:
+            self.indexer.finish_load()
+
+        elapsed = time.perf_counter() - start
+        summary["pipeline"] = {
+            "elapsed": elapsed,
+            "stages": {
+                stage: {**totals, "rate": totals["count"] / elapsed if elapsed else 0.0}
+                for stage, totals in stages.items()
+            },
+        }
+        click.echo(
+            f"{len(ranges)} partitions indexed {summary['success']} files in "
+            f"{elapsed:.2f}s, {summary['failed']} failed"
+        )
+
+        return summary
 
     def build_and_index_file_info(self):
         """Bulk index for the file
 
         Returns:
-            _type_: Bullk indexed
+            dict[str, Any] | None: Bulk indexing summary, None when the index was not created
         """
-        actions = self.generate_actions()
+        if self.partitions > 1:
+            return self.build_and_index_partitions()
+
+        pipeline = self.pipeline()
+        load = self.loader(pipeline)
+        # a resumed run continues loading the index of the interrupted one
+        resumed = self.checkpoint is not None and self.checkpoint.resumed
+        result = None
         if self.type_of == "create":
-            if self.create_file_index() is True:
-                self.indexer.bulk_index(actions)
+            if resumed or self.create_file_index() is True:
+                result = self.indexer.load_index(load)
                 click.echo("Bulk indexing successful")
+        elif self.type_of == "rebuild":
+            json_data = self.load_json_file()
+            result = self.indexer.rebuild_index(
+                json_data["settings"],
+                json_data["mappings"],
+                load,
+                self.checkpoint.index_name if resumed else None,
+            )
+        elif self.incremental:
+            result = self.indexer.load_index(partial(self.index_incremental, pipeline))
+            click.echo("Bulk indexing successful")
         else:
-            self.indexer.bulk_index(actions)
+            result = load()
             click.echo("Bulk indexing successful")
 
+        if result is not None:
+            pipeline.report()
+            result["pipeline"] = pipeline.stats()
+
+        return result
+
+    def build_and_index_partitions(self):
+        """Bulk index for the file with partition workers, the index is created,
+        rebuilt and validated here
+
+        Returns:
+            dict[str, Any] | None: Bulk indexing summary, None when the index was not created
+        """
+        if self.type_of == "create":
+            if self.create_file_index() is not True:
+                return None
+            return self.index_partitions()
+        if self.type_of == "rebuild":
+            json_data = self.load_json_file()
+            return self.indexer.rebuild_index(
+                json_data["settings"], json_data["mappings"], self.index_partitions
+            )
+
+        return self.index_partitions()
+
 @click.command()
 @click.option(
     "--config_file",
@@ -126,17 +523,97 @@ class FileIndexer:
 @click.option(
     "--type_of", "-t", type=str, help="Update or create an index", required=True
 )
-def create_data(config_file: str, es_host: str, type_of: str):
+@click.option(
+    "--stream/--no-stream",
+    default=False,
+    help="Stream files from the DB in windows of --batch_size rows",
+)
+@click.option(
+    "--batch_size",
+    "-b",
+    type=int,
+    default=DEFAULT_BATCH_SIZE,
+    show_default=True,
+    help="Number of files per window in stream mode",
+)
+@click.option(
+    "--preload_strategy",
+    "-p",
+    type=click.Choice(PRELOAD_STRATEGIES),
+    default="in",
+    show_default=True,
+    help="How the preload queries select file ids",
+)
+@click.option(
+    "--preload_concurrency",
+    type=int,
+    default=None,
+    help="Preload queries running at the same time, the pool size by default",
+)
+@click.option(
+    "--incremental/--no-incremental",
+    default=False,
+    help="Only index new files, delete the files which left the current tree",
+)
+@click.option(
+    "--partitions",
+    type=int,
+    default=DEFAULT_PARTITIONS,
+    show_default=True,
+    help="Number of worker processes, each indexing a range of file ids",
+)
+@bulk_options
+@export_options
+@pipeline_options
+@checkpoint_options
+@metrics_options
+def create_data(
+    config_file: str,
+    es_host: str,
+    type_of: str,
+    stream: bool,
+    batch_size: int,
+    preload_strategy: str,
+    preload_concurrency: int | None,
+    incremental: bool,
+    partitions: int,
+    **indexer_options,
+):
     """_summary_
 
     Args:
         config_file (str): _description_
         es_host (str): _description_
         type_of (str): _description_
+        stream (bool): Stream files from the DB
+        batch_size (int): Number of files per window in stream mode
+        preload_strategy (str): How the preload queries select file ids
+        preload_concurrency (int | None): Preload queries running at the same time
+        incremental (bool): Only index new files and delete the old ones
+        partitions (int): Number of worker processes
+        **indexer_options: ElasticSearchIndexer options, e.g. bulk_mode, or the
+            export options of create_indexer
     """
-    file_indexer = FileIndexer(config_file, es_host, type_of)
+    file_indexer = FileIndexer(
+        config_file,
+        es_host,
+        type_of,
+        stream,
+        batch_size,
+        preload_strategy,
+        preload_concurrency,
+        incremental=incremental,
+        partitions=partitions,
+        **indexer_options,
+    )
     file_indexer.build_and_index_file_info()
 
 
 if __name__ == "__main__":
     create_data()
+
+
+# Enables programmatic use (from main.py)
+def run(config_file, es_host, type_of, **indexer_options):
+    indexer = FileIndexer(config_file, es_host, type_of, **indexer_options)
+    return indexer.build_and_index_file_info()
@@ -0,0 +1,193 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from itertools import pairwise
+from typing import Any, Iterable, Iterator
+
+
+class StringTable:
+    """Dictionary encoding of a column, every distinct value is stored once and the
+    rows keep its code"""
+
+    def __init__(self):
+        """Initialization of the StringTable class"""
+        self.codes = {}
+        self.values = []
+
+    def encode(self, value: Any) -> int:
+        """Code of a value, added to the table when new
+
+        Args:
+            value (Any): A string, or None
+
+        Returns:
+            int: The code
+        """
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class PreloadMap(Mapping):
+    """Read-only mapping of file_id to its preload rows, stored column-wise.
+
+    Every column is dictionary-encoded into an array of int32 codes. Once sealed,
+    the rows are grouped by file_id: a sorted array of the distinct file ids, and
+    int32 offsets into the code arrays (CSR layout). A lookup builds the list of
+    tuples of one file, the same shape as a defaultdict(list) of rows"""
+
+    def __init__(self, width: int):
+        """Initialization of the PreloadMap class
+
+        Args:
+            width (int): Number of values of a row, file_id excluded
+        """
+        self.tables = [StringTable() for _ in range(width)]
+        self._codes = [array("i") for _ in range(width)]
+        # file_id of every row added since the last seal
+        self._keys = array("q")
+        self._ids = array("q")
+        self._offsets = array("i", [0])
+
+    def extend(self, rows: Iterable[tuple]):
+        """Adds rows, the rows of one file keep the order they are added in
+
+        Args:
+            rows (Iterable[tuple]): (file_id, value, ...) rows
+        """
+        if not isinstance(rows, list):
+            rows = list(rows)
+        self._keys.extend(row[0] for row in rows)
+        columns = zip(self.tables, self._codes, strict=True)
+        for column, (table, codes) in enumerate(columns, 1):
+            encode = table.encode
+            codes.extend(encode(row[column]) for row in rows)
+
+    def seal(self):
+        """Groups the rows added since the last seal by file_id, after the rows
+        already sealed. The lookups seal the map when needed"""
+        if not self._keys:
+            return
+
+        keys = array("q")
+        # the sealed rows come first, so that a file keeps the order of its rows
+        for file_id, (start, end) in zip(
+            self._ids, pairwise(self._offsets), strict=True
+        ):
+            keys.extend([file_id] * (end - start))
+        keys.extend(self._keys)
+
+        ids = sorted(set(keys))
+        position = {file_id: index for index, file_id in enumerate(ids)}
+        offsets = array("i", [0]) * (len(ids) + 1)
+        for file_id in keys:
+            offsets[position[file_id] + 1] += 1
+        for index in range(len(ids)):
+            offsets[index + 1] += offsets[index]
+
+        if any(previous > current for previous, current in pairwise(keys)):
+            # stable counting sort of the codes by file_id
+            slots = offsets[:-1]
+            order = array("i", [0]) * len(keys)
+            for row, file_id in enumerate(keys):
+                index = position[file_id]
+                order[row] = slots[index]
+                slots[index] += 1
+            for column, codes in enumerate(self._codes):
+                grouped = array("i", [0]) * len(codes)
+                for row, slot in enumerate(order):
+                    grouped[slot] = codes[row]
+                self._codes[column] = grouped
+
+        self._ids = array("q", ids)
+        self._offsets = offsets
+        self._keys = array("q")
+
+    def rows(self, index: int) -> list[tuple]:
+        """Decoded rows of the file at an index of the sorted file ids
+
+        Args:
+            index (int): Index in the sorted file ids
+
+        Returns:
+            list[tuple]: The rows, without the file_id
+        """
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return list(
+            zip(
+                *(
+                    [table.values[code] for code in codes[start:end]]
+                    for table, codes in zip(self.tables, self._codes, strict=True)
+                ),
+                strict=True,
+            )
+        )
+
+    def find(self, file_id: Any) -> int | None:
+        """Index of a file in the sorted file ids
+
+        Args:
+            file_id (Any): The file_id
+
+        Returns:
+            int | None: The index, None when the file has no rows
+        """
+        self.seal()
+        index = bisect_left(self._ids, file_id)
+        if index < len(self._ids) and self._ids[index] == file_id:
+            return index
+
+        return None
+
+    def get(self, file_id: Any, default: Any = None) -> Any:
+        index = self.find(file_id)
+        return default if index is None else self.rows(index)
+
+    def __getitem__(self, file_id: Any) -> list[tuple]:
+        index = self.find(file_id)
+        if index is None:
+            raise KeyError(file_id)
+
+        return self.rows(index)
+
+    def __contains__(self, file_id: Any) -> bool:
+        return self.find(file_id) is not None
+
+    def __iter__(self) -> Iterator[int]:
+        self.seal()
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        self.seal()
+        return len(self._ids)
+
+    def nbytes(self) -> int:
+        """Size of the arrays, the string tables excluded
+
+        Returns:
+            int: Bytes
+        """
+        arrays = [self._keys, self._ids, self._offsets, *self._codes]
+        return sum(len(values) * values.itemsize for values in arrays)
+
+
+def extend_map(preload_map: Any, rows: Iterable[tuple]):
+    """Adds (file_id, value, ...) rows to a PreloadMap, or to a defaultdict(list) of
+    value tuples
+
+    Args:
+        preload_map (Any): The map
+        rows (Iterable[tuple]): The rows
+    """
+    if isinstance(preload_map, PreloadMap):
+        preload_map.extend(rows)
+        return
+
+    for file_id, *values in rows:
+        preload_map[file_id].append(tuple(values))
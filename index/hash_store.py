@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Any
+
+HASH_STORE_FILE = "doc_hashes.sqlite"
+
+
+def default_hash_store_path(config_file: str) -> str:
+    """Path of the hash store next to the configuration file
+
+    Args:
+        config_file (str): Configuration file
+
+    Returns:
+        str: Path of the SQLite file
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(config_file)), HASH_STORE_FILE)
+
+
+def document_hash(data: dict[str, Any]) -> str:
+    """Stable hash of a built document, independent of the key order
+
+    Args:
+        data (dict[str, Any]): The document
+
+    Returns:
+        str: Hex digest
+    """
+    payload = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class HashStore:
+    """SQLite store of the hash of every indexed document, per index and doc id"""
+
+    def __init__(self, path: str):
+        """Initialization of the HashStore class
+
+        Args:
+            path (str): Path of the SQLite file, created when missing
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS doc_hashes (
+                index_name TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                PRIMARY KEY (index_name, doc_id)
+            )"""
+        )
+        self._db.commit()
+
+    def load(self, index_name: str) -> dict[str, str]:
+        """Loads the stored hashes of an index
+
+        Args:
+            index_name (str): name of the index
+
+        Returns:
+            dict[str, str]: Hashes keyed by doc id
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT doc_id, hash FROM doc_hashes WHERE index_name = ?",
+                (index_name,),
+            ).fetchall()
+
+        return dict(rows)
+
+    def save(self, index_name: str, hashes: dict[str, str | None]):
+        """Stores the hashes of the documents Elasticsearch accepted
+
+        Args:
+            index_name (str): name of the index
+            hashes (dict[str, str | None]): Hashes keyed by doc id, None removes the
+                hash of a deleted document
+        """
+        stored = [(index_name, doc_id, h) for doc_id, h in hashes.items() if h]
+        deleted = [(index_name, doc_id) for doc_id, h in hashes.items() if not h]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO doc_hashes (index_name, doc_id, hash) "
+                "VALUES (?, ?, ?)",
+                stored,
+            )
+            self._db.executemany(
+                "DELETE FROM doc_hashes WHERE index_name = ? AND doc_id = ?", deleted
+            )
+            self._db.commit()
+
+    def clear(self, index_name: str):
+        """Removes every hash of an index, e.g. when it is created again
+
+        Args:
+            index_name (str): name of the index
+        """
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM doc_hashes WHERE index_name = ?", (index_name,)
+            )
+            self._db.commit()
+
+    def rename(self, source: str, target: str):
+        """Replaces the hashes of an index by the ones stored under another name, e.g.
+        the new generation of a rebuild once the alias points to it
+
+        Args:
+            source (str): name the hashes were stored under
+            target (str): name of the index they now belong to
+        """
+        with self._lock:
+            self._db.execute("DELETE FROM doc_hashes WHERE index_name = ?", (target,))
+            self._db.execute(
+                "UPDATE doc_hashes SET index_name = ? WHERE index_name = ?",
+                (target, source),
+            )
+            self._db.commit()
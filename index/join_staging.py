@@ -0,0 +1,180 @@
+import click
+import threading
+from collections import defaultdict
+from functools import partial
+from typing import Any, Iterable
+from index.db_connection import (
+    ConnectionProvider,
+    get_connection_provider,
+    run_concurrently,
+)
+from index.file_index.preload_map import PreloadMap
+
+# sample_file ⋈ file ⋈ file_data_collection, with the ids of the data type, the
+# analysis group and the data collection, resolved against ReferenceData
+STAGE_SAMPLE_COLLECTIONS_SQL = """SELECT DISTINCT sf.sample_id, f.data_type_id, f.analysis_group_id, fdc.data_collection_id
+    FROM sample_file sf INNER JOIN file f ON sf.file_id = f.file_id
+    INNER JOIN file_data_collection fdc ON f.file_id = fdc.file_id
+    ORDER BY sf.sample_id, f.data_type_id, f.analysis_group_id, fdc.data_collection_id"""
+
+# file ⋈ file_data_collection, files without samples included
+STAGE_COLLECTION_ANALYSIS_SQL = """SELECT DISTINCT fdc.data_collection_id, f.data_type_id, f.analysis_group_id
+    FROM file f INNER JOIN file_data_collection fdc ON f.file_id = fdc.file_id
+    ORDER BY fdc.data_collection_id, f.data_type_id, f.analysis_group_id"""
+
+_staging: dict[ConnectionProvider, "JoinStaging"] = {}
+_staging_lock = threading.Lock()
+
+
+class JoinStaging:
+    """In-process copy of the sample to data collection join, materialised once per
+    run and read by the sample, population and data collection indexers instead of
+    running the multi-way join for every batch, population list or collection"""
+
+    def __init__(self, sample_rows: PreloadMap, analysis_rows: PreloadMap):
+        """Initialization of the JoinStaging class
+
+        Args:
+            sample_rows (PreloadMap): (data_type_id, analysis_group_id,
+                data_collection_id) rows keyed by sample_id
+            analysis_rows (PreloadMap): (data_type_id, analysis_group_id) rows keyed
+                by data_collection_id
+        """
+        self.sample_rows = sample_rows
+        self.analysis_rows = analysis_rows
+        samples = defaultdict(set)
+        for sample_id in sample_rows:
+            for _, _, dc_id in sample_rows[sample_id]:
+                samples[dc_id].add(sample_id)
+        self.samples_counts = {dc_id: len(ids) for dc_id, ids in samples.items()}
+
+    @classmethod
+    def load(cls, connection_provider: ConnectionProvider) -> "JoinStaging":
+        """Runs the two staging queries, at the same time on two connections
+
+        Args:
+            connection_provider (ConnectionProvider): Connection provider
+
+        Returns:
+            JoinStaging: The staged rows
+        """
+        rows = run_concurrently(
+            {
+                "samples": partial(
+                    connection_provider.fetchall, STAGE_SAMPLE_COLLECTIONS_SQL
+                ),
+                "analysis": partial(
+                    connection_provider.fetchall, STAGE_COLLECTION_ANALYSIS_SQL
+                ),
+            }
+        )
+        sample_rows = PreloadMap(3)
+        sample_rows.extend(rows["samples"])
+        sample_rows.seal()
+        analysis_rows = PreloadMap(2)
+        analysis_rows.extend(rows["analysis"])
+        analysis_rows.seal()
+
+        return cls(sample_rows, analysis_rows)
+
+    def sample_collections(self, sample_ids: Iterable[int]) -> list[tuple]:
+        """Rows of the samples, with the shape and order of the dataCollections
+        preload query of the sample index
+
+        Args:
+            sample_ids (Iterable[int]): List of sample ids
+
+        Returns:
+            list[tuple]: (sample_id, data_type_id, analysis_group_id,
+            data_collection_id) rows
+        """
+        return [
+            (sample_id, *row)
+            for sample_id in sorted(set(sample_ids))
+            for row in self.sample_rows.get(sample_id, [])
+        ]
+
+    def population_collections(
+        self, population_samples: dict[int, Iterable[int]]
+    ) -> list[tuple]:
+        """Distinct rows of the samples of every population, with the shape of the
+        data collection query of the population index
+
+        Args:
+            population_samples (dict[int, Iterable[int]]): Sample ids keyed by
+                population id
+
+        Returns:
+            list[tuple]: (population_id, data_type_id, analysis_group_id,
+            data_collection_id) rows
+        """
+        rows = []
+        for pop_id, sample_ids in population_samples.items():
+            combinations = {}
+            for sample_id in sorted(sample_ids):
+                for row in self.sample_rows.get(sample_id, []):
+                    combinations[row] = None
+            rows.extend((pop_id, *row) for row in combinations)
+
+        return rows
+
+    def collection_analysis(self, dc_id: int) -> list[tuple]:
+        """Data type and analysis group ids of the files of a data collection
+
+        Args:
+            dc_id (int): Data collection id
+
+        Returns:
+            list[tuple]: (data_type_id, analysis_group_id) rows
+        """
+        return self.analysis_rows.get(dc_id, [])
+
+    def samples_count(self, dc_id: int) -> int:
+        """Number of samples with a file in a data collection
+
+        Args:
+            dc_id (int): Data collection id
+
+        Returns:
+            int: The sample count
+        """
+        return self.samples_counts.get(dc_id, 0)
+
+
+def get_join_staging(db_config: dict[str, Any]) -> JoinStaging:
+    """Returns the staged join shared by every fetcher using the same database, the
+    first call of the run loads it
+
+    Args:
+        db_config (dict[str, Any]): DB configuration from read_from_config_file
+
+    Returns:
+        JoinStaging: The shared staged join
+    """
+    provider = get_connection_provider(db_config)
+    with _staging_lock:
+        if provider not in _staging:
+            _staging[provider] = JoinStaging.load(provider)
+        return _staging[provider]
+
+
+def clear_join_staging():
+    """Forgets the staged join, the next get_join_staging runs the queries again"""
+    with _staging_lock:
+        _staging.clear()
+
+
+def staging_options(command):
+    """Adds the --stage_joins option to an indexer click command
+
+    Args:
+        command: click command function
+
+    Returns:
+        The decorated command
+    """
+    return click.option(
+        "--stage_joins/--no-stage_joins",
+        default=False,
+        help="Read the sample to data collection join from one staged copy per run",
+    )(command)
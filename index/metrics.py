@@ -0,0 +1,509 @@
+import bisect
+import click
+import copy
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from elasticsearch import JsonSerializer
+from typing import Any, Dict, Iterator
+
+# Upper bounds in seconds of the latency histograms
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+# Name, type and help of every metric, as exposed to Prometheus
+METRICS = {
+    "es_py_sql_execute_seconds": ("histogram", "Time spent executing SQL statements"),
+    "es_py_sql_fetch_seconds": ("histogram", "Time spent fetching SQL result rows"),
+    "es_py_sql_rows_total": ("counter", "SQL result rows fetched"),
+    "es_py_build_seconds_total": ("counter", "Time spent building documents"),
+    "es_py_documents_built_total": ("counter", "Documents built"),
+    "es_py_serialize_seconds_total": ("counter", "Time spent serializing bulk actions"),
+    "es_py_serialized_bytes_total": ("counter", "Bytes of serialized bulk actions"),
+    "es_py_bulk_request_seconds": ("histogram", "Latency of the bulk requests"),
+    "es_py_bulk_request_bytes_total": ("counter", "Bytes sent in bulk requests"),
+    "es_py_bulk_retried_total": ("counter", "Bulk actions sent again after a rejection"),
+    "es_py_documents_total": ("counter", "Bulk actions by outcome"),
+}
+
+
+class Histogram:
+    """Cumulative histogram of observed values, in the Prometheus layout"""
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        """Initialization of the Histogram class
+
+        Args:
+            buckets (tuple): Sorted upper bounds of the buckets, +Inf is implied
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        """Adds a value
+
+        Args:
+            value (float): The observed value
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimates a quantile from the buckets, as histogram_quantile does
+
+        Args:
+            q (float): Quantile between 0 and 1
+
+        Returns:
+            float: Upper bound of the bucket holding the quantile, max for +Inf
+        """
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts, strict=False):
+            seen += count
+            if count and seen >= rank:
+                return bound
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts of the histogram for the JSON summary
+
+        Returns:
+            Dict[str, Any]: count, sum, mean, max, p50, p95, p99 and the cumulative
+            buckets
+        """
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts, strict=True):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+def format_labels(labels: tuple, **extra) -> str:
+    """Prometheus label set
+
+    Args:
+        labels (tuple): Sorted (name, value) pairs
+        **extra: Labels appended after them, e.g. le
+
+    Returns:
+        str: {name="value",...}, empty without labels
+    """
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class MetricsRegistry:
+    """Counters and histograms of a run, shared by every indexer of the process.
+    Nothing is recorded until enable() is called"""
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        """Initialization of the MetricsRegistry class
+
+        Args:
+            buckets (tuple): Upper bounds of the latency histograms
+        """
+        self.buckets = buckets
+        self.enabled = False
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        """Starts recording"""
+        self.enabled = True
+
+    def reset(self):
+        """Stops recording and drops the recorded values"""
+        with self._lock:
+            self.enabled = False
+            self.counters = {}
+            self.histograms = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Increments a counter
+
+        Args:
+            name (str): One of METRICS
+            value (float): Increment
+            **labels: Labels of the series, e.g. index
+        """
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Adds a value to a histogram
+
+        Args:
+            name (str): One of METRICS
+            value (float): Observed value, in seconds for the latencies
+            **labels: Labels of the series, e.g. index
+        """
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def state(self) -> Dict[str, Any]:
+        """Recorded values, to be merged into the registry of another process
+
+        Returns:
+            Dict[str, Any]: Copies of the counters and the histograms
+        """
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "histograms": copy.deepcopy(self.histograms),
+            }
+
+    def merge(self, state: Dict[str, Any]):
+        """Adds the values recorded by another process, e.g. a partition worker
+
+        Args:
+            state (Dict[str, Any]): Result of state()
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            for key, value in state["counters"].items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for key, other in state["histograms"].items():
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = Histogram(other.buckets)
+                histogram.counts = [
+                    a + b for a, b in zip(histogram.counts, other.counts, strict=True)
+                ]
+                histogram.sum += other.sum
+                histogram.count += other.count
+                histogram.max = max(histogram.max, other.max)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Observes the duration of the block in a histogram
+
+        Args:
+            name (str): One of METRICS
+            **labels: Labels of the series
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def summary(self) -> Dict[str, Any]:
+        """Recorded values for the JSON summary
+
+        Returns:
+            Dict[str, Any]: Series of every metric, with their labels
+        """
+        summary = {}
+        with self._lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                summary.setdefault(name, []).append(
+                    {"labels": dict(labels), "value": value}
+                )
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                summary.setdefault(name, []).append(
+                    {"labels": dict(labels), **histogram.summary()}
+                )
+        return summary
+
+    def prometheus(self) -> str:
+        """Recorded values in the Prometheus text exposition format
+
+        Returns:
+            str: The exposition
+        """
+        lines = []
+        with self._lock:
+            for name, (kind, description) in METRICS.items():
+                counters = sorted(
+                    (labels, value)
+                    for (metric, labels), value in self.counters.items()
+                    if metric == name
+                )
+                histograms = sorted(
+                    ((labels, histogram)
+                     for (metric, labels), histogram in self.histograms.items()
+                     if metric == name),
+                    key=lambda series: series[0],
+                )
+                if not counters and not histograms:
+                    continue
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in counters:
+                    lines.append(f"{name}{format_labels(labels)} {value}")
+                for labels, histogram in histograms:
+                    cumulative = 0
+                    for bound, count in zip(
+                        histogram.buckets + ("+Inf",), histogram.counts, strict=True
+                    ):
+                        cumulative += count
+                        lines.append(
+                            f"{name}_bucket{format_labels(labels, le=bound)} {cumulative}"
+                        )
+                    lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum}")
+                    lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str):
+        """Writes the exposition for the node_exporter textfile collector. The file is
+        replaced atomically so that the collector never reads a partial file
+
+        Args:
+            path (str): .prom file in the directory of the collector
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file:
+            file.write(self.prometheus())
+        os.replace(tmp_path, path)
+
+    def write_json(self, path: str):
+        """Writes the JSON summary
+
+        Args:
+            path (str): JSON file
+        """
+        with open(path, "w") as file:
+            json.dump(self.summary(), file, indent=2)
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Returns the registry shared by every indexer of the process
+
+    Returns:
+        MetricsRegistry: The registry
+    """
+    return _registry
+
+
+class MeteredCursor:
+    """Cursor wrapper recording the execution and the fetch time of the queries"""
+
+    def __init__(self, cursor: Any, registry: MetricsRegistry):
+        """Initialization of the MeteredCursor class
+
+        Args:
+            cursor (Any): mysql.connector cursor
+            registry (MetricsRegistry): Registry the timings go to
+        """
+        self._cursor = cursor
+        self._registry = registry
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def execute(self, *args, **kwargs):
+        with self._registry.timer("es_py_sql_execute_seconds"):
+            return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        with self._registry.timer("es_py_sql_execute_seconds"):
+            return self._cursor.executemany(*args, **kwargs)
+
+    def _fetch(self, method: str, *args) -> Any:
+        """Runs a fetch method of the cursor and records its time and rows
+
+        Args:
+            method (str): fetchone, fetchmany or fetchall
+            *args: Arguments of the method
+
+        Returns:
+            Any: The result of the method
+        """
+        with self._registry.timer("es_py_sql_fetch_seconds"):
+            result = getattr(self._cursor, method)(*args)
+        if method == "fetchone":
+            self._registry.inc("es_py_sql_rows_total", result is not None)
+        else:
+            self._registry.inc("es_py_sql_rows_total", len(result))
+        return result
+
+    def fetchone(self):
+        return self._fetch("fetchone")
+
+    def fetchmany(self, *args):
+        return self._fetch("fetchmany", *args)
+
+    def fetchall(self):
+        return self._fetch("fetchall")
+
+
+class MeteredConnection:
+    """Connection wrapper whose cursors are MeteredCursor"""
+
+    def __init__(self, connection: Any, registry: MetricsRegistry):
+        """Initialization of the MeteredConnection class
+
+        Args:
+            connection (Any): mysql.connector connection
+            registry (MetricsRegistry): Registry the timings go to
+        """
+        self._connection = connection
+        self._registry = registry
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._connection, name)
+
+    def cursor(self, *args, **kwargs) -> MeteredCursor:
+        return MeteredCursor(self._connection.cursor(*args, **kwargs), self._registry)
+
+
+def metered_connection(connection: Any) -> Any:
+    """Wraps a connection when metrics are enabled
+
+    Args:
+        connection (Any): mysql.connector connection
+
+    Returns:
+        Any: A MeteredConnection, the connection itself when metrics are disabled
+    """
+    if not _registry.enabled:
+        return connection
+    return MeteredConnection(connection, _registry)
+
+
+class MeteredJsonSerializer(JsonSerializer):
+    """JSON serializer of an Elasticsearch client recording the time and the bytes
+    spent serializing the bulk actions of an index"""
+
+    def __init__(self, index: str):
+        """Initialization of the MeteredJsonSerializer class
+
+        Args:
+            index (str): Label of the series
+        """
+        super().__init__()
+        self.index = index
+
+    def dumps(self, data: Any) -> bytes:
+        start = time.perf_counter()
+        serialized = super().dumps(data)
+        _registry.inc(
+            "es_py_serialize_seconds_total", time.perf_counter() - start, index=self.index
+        )
+        _registry.inc("es_py_serialized_bytes_total", len(serialized), index=self.index)
+        return serialized
+
+
+def client_serializer(index: str) -> JsonSerializer | None:
+    """Serializer given to the Elasticsearch client of an indexer
+
+    Args:
+        index (str): Name of the index
+
+    Returns:
+        JsonSerializer | None: A MeteredJsonSerializer when metrics are enabled, None
+        keeps the default serializer
+    """
+    return MeteredJsonSerializer(index) if _registry.enabled else None
+
+
+@contextmanager
+def collect_metrics(
+    textfile: str | None = None, json_file: str | None = None
+) -> Iterator[MetricsRegistry]:
+    """Records the metrics of the block and writes them once it is over, even when
+    it failed. Nothing is recorded without a destination
+
+    Args:
+        textfile (str | None): Prometheus textfile collector file
+        json_file (str | None): JSON summary file
+
+    Yields:
+        Iterator[MetricsRegistry]: The registry
+    """
+    if not textfile and not json_file:
+        yield _registry
+        return
+
+    _registry.reset()
+    _registry.enable()
+    try:
+        yield _registry
+    finally:
+        if textfile:
+            _registry.write_textfile(textfile)
+            click.echo(f"Metrics written to {textfile}")
+        if json_file:
+            _registry.write_json(json_file)
+            click.echo(f"Metrics summary written to {json_file}")
+        _registry.reset()
+
+
+def metrics_options(command):
+    """Adds the metrics options to an indexer click command. Unlike the other
+    options they do not reach the command, which runs inside collect_metrics
+
+    Args:
+        command: click command function
+
+    Returns:
+        The decorated command
+    """
+
+    @functools.wraps(command)
+    def wrapper(*args, metrics_textfile=None, metrics_json=None, **kwargs):
+        with collect_metrics(metrics_textfile, metrics_json):
+            return command(*args, **kwargs)
+
+    options = [
+        click.option(
+            "--metrics_textfile",
+            type=click.Path(dir_okay=False),
+            default=None,
+            help="Write the run metrics to this Prometheus textfile collector file",
+        ),
+        click.option(
+            "--metrics_json",
+            type=click.Path(dir_okay=False),
+            default=None,
+            help="Write a JSON summary of the run metrics to this file",
+        ),
+    ]
+    for option in reversed(options):
+        wrapper = option(wrapper)
+
+    return wrapper
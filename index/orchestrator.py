@@ -0,0 +1,182 @@
+import click
+import importlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+from index.config_read import read_from_config_file
+from index.db_connection import get_connection_provider
+from index.elasticsearch_indexer import set_bulk_concurrency
+from index.join_staging import clear_join_staging
+from index.reference_cache import clear_reference_data
+
+# Mapping index types to module paths, heaviest first so that they start first
+INDEX_MODULES = {
+    "file_index": "index.file_index.indexing",
+    "sample_index": "index.sample_index.indexing",
+    "population_index": "index.population_index.indexing",
+    "data_collection_index": "index.data_collection_index.indexing",
+    "super_population_index": "index.super_population_index.indexing",
+    "analysis_group_index": "index.analysis_group_index.indexing",
+}
+
+# Index types reading the sample to data collection join from the JoinStaging
+STAGED_INDEX_TYPES = ("sample_index", "population_index", "data_collection_index")
+
+DEFAULT_MAX_PARALLEL = 3
+
+
+def load_runner(index_type: str) -> Callable[..., Any]:
+    """Imports the run() entry point of an indexer module
+
+    Args:
+        index_type (str): One of INDEX_MODULES
+
+    Returns:
+        Callable[..., Any]: run(config_file, es_host, type_of, **indexer_options)
+    """
+    return importlib.import_module(INDEX_MODULES[index_type]).run
+
+
+class IndexOrchestrator:
+    """Runs several indexers concurrently in one process, sharing the connection
+    pool and the reference data"""
+
+    def __init__(
+        self,
+        config_file: str,
+        es_host: str,
+        type_of: str,
+        index_types: list[str] | None = None,
+        max_parallel: int = DEFAULT_MAX_PARALLEL,
+        db_concurrency: int | None = None,
+        es_concurrency: int | None = None,
+        stage_joins: bool = False,
+        **indexer_options,
+    ):
+        """Initialization of the IndexOrchestrator class
+
+        Args:
+            config_file (str): Configuration file
+            es_host (str): ElasticSearch host
+            type_of (str): Type of: create, update or rebuild
+            index_types (list[str] | None): Indexers to run, every one when None
+            max_parallel (int): Number of indexers running at the same time
+            db_concurrency (int | None): Size of the shared connection pool, the
+                configured pool_size when None
+            es_concurrency (int | None): Maximum number of bulk requests in flight,
+                unlimited when None
+            stage_joins (bool): Stage the sample to data collection join once for
+                the indexers of STAGED_INDEX_TYPES
+            **indexer_options: Options forwarded to every run(), e.g. bulk_mode
+        """
+        self.config_file = config_file
+        self.es_host = es_host
+        self.type_of = type_of
+        self.index_types = list(index_types or INDEX_MODULES)
+        self.max_parallel = max_parallel
+        self.db_concurrency = db_concurrency
+        self.es_concurrency = es_concurrency
+        self.stage_joins = stage_joins
+        self.indexer_options = indexer_options
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    def run_index(self, index_type: str) -> Any:
+        """Runs one indexer and records its timing
+
+        Args:
+            index_type (str): One of INDEX_MODULES
+
+        Returns:
+            Any: The result of the run() of the indexer
+        """
+        options = self.indexer_options
+        if self.stage_joins and index_type in STAGED_INDEX_TYPES:
+            options = {**options, "stage_joins": True}
+        start = time.perf_counter()
+        try:
+            result = load_runner(index_type)(
+                self.config_file, self.es_host, self.type_of, **options
+            )
+        except BaseException as e:
+            self.record(index_type, "failed", start, error=repr(e))
+            raise
+        self.record(index_type, "ok", start)
+
+        return result
+
+    def record(self, index_type: str, status: str, start: float, **details):
+        """Records the outcome of an indexer
+
+        Args:
+            index_type (str): One of INDEX_MODULES
+            status (str): ok or failed
+            start (float): perf_counter value when the indexer started
+            **details: Extra fields, e.g. the error
+        """
+        with self._lock:
+            self.timings[index_type] = {
+                "status": status,
+                "elapsed": time.perf_counter() - start,
+                **details,
+            }
+
+    def run(self) -> Dict[str, Any]:
+        """Runs the indexers, max_parallel at a time. A failed indexer does not stop
+        the others
+
+        Returns:
+            Dict[str, Any]: Results of the indexers, their timings and the index
+            types which failed
+        """
+        data = read_from_config_file(self.config_file)
+        if self.db_concurrency:
+            data["pool_size"] = self.db_concurrency
+        # registers the shared provider before the indexers create theirs
+        get_connection_provider(data)
+        set_bulk_concurrency(self.es_concurrency)
+
+        results = {}
+        failed = []
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(
+                max_workers=self.max_parallel, thread_name_prefix="indexer"
+            ) as executor:
+                futures = {
+                    index_type: executor.submit(self.run_index, index_type)
+                    for index_type in self.index_types
+                }
+                for index_type, future in futures.items():
+                    if future.exception() is None:
+                        results[index_type] = future.result()
+                    else:
+                        failed.append(index_type)
+        finally:
+            set_bulk_concurrency(None)
+            clear_reference_data()
+            clear_join_staging()
+
+        self.report(time.perf_counter() - start)
+
+        return {"results": results, "timings": self.timings, "failed": failed}
+
+    def report(self, elapsed: float):
+        """Echoes the timing of every indexer
+
+        Args:
+            elapsed (float): Wall time of the whole run in seconds
+        """
+        click.echo(f"Indexed {len(self.index_types)} indices in {elapsed:.2f}s")
+        for index_type in self.index_types:
+            timing = self.timings.get(index_type, {"status": "not run", "elapsed": 0})
+            line = f"  {index_type}: {timing['status']} in {timing['elapsed']:.2f}s"
+            if "error" in timing:
+                line += f" ({timing['error']})"
+            click.echo(line)
+
+
+# Enables programmatic use (from main.py)
+def run(config_file, es_host, type_of, **options):
+    return IndexOrchestrator(config_file, es_host, type_of, **options).run()
@@ -0,0 +1,242 @@
+import click
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator
+from index.metrics import get_metrics
+
+DEFAULT_QUEUE_SIZE = 1000
+
+_DONE = object()
+
+
+class IndexingPipeline:
+    """Runs the DB reader, the document builder and the bulk sender of an indexer
+    concurrently, connected by bounded queues"""
+
+    def __init__(
+        self,
+        reader: Callable[[], Iterable[Any]],
+        builder: Callable[[Any], Dict[str, Any] | None],
+        sender: Callable[[Iterable[Dict[str, Any]]], Any],
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        name: str | None = None,
+    ):
+        """Initialization of the IndexingPipeline class
+
+        Args:
+            reader (Callable[[], Iterable[Any]]): Returns the items read from the DB
+            builder (Callable[[Any], Dict[str, Any] | None]): Builds the bulk action of an
+                item, None skips the item
+            sender (Callable[[Iterable[Dict[str, Any]]], Any]): Sends the actions, usually
+                ElasticSearchIndexer.bulk_index
+            queue_size (int): Maximum number of items waiting between two stages
+            name (str | None): Index label of the build metrics
+        """
+        self.reader = reader
+        self.builder = builder
+        self.sender = sender
+        self.name = name
+        self.queues = {
+            "rows": queue.Queue(maxsize=queue_size),
+            "actions": queue.Queue(maxsize=queue_size),
+        }
+        self.max_depths = {"rows": 0, "actions": 0}
+        self.counts = {"read": 0, "build": 0, "send": 0}
+        self.busy = {"read": 0.0, "build": 0.0, "send": 0.0}
+        self.started = None
+        self.finished = None
+        self._stop = threading.Event()
+        self._errors = []
+
+    def _put(self, name: str, item: Any) -> bool:
+        """Puts an item on a queue, waiting while it is full
+
+        Args:
+            name (str): Name of the queue
+            item (Any): The item
+
+        Returns:
+            bool: False when the pipeline was stopped before the item was queued
+        """
+        while not self._stop.is_set():
+            try:
+                self.queues[name].put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            self.max_depths[name] = max(self.max_depths[name], self.queues[name].qsize())
+            return True
+        return False
+
+    def _get(self, name: str) -> Any:
+        """Gets an item from a queue, waiting while it is empty
+
+        Args:
+            name (str): Name of the queue
+
+        Returns:
+            Any: The item, or the end marker when the pipeline was stopped
+        """
+        while True:
+            try:
+                return self.queues[name].get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return _DONE
+
+    def _fail(self, error: BaseException):
+        """Records the error of a stage and stops the other stages
+
+        Args:
+            error (BaseException): The error
+        """
+        self._errors.append(error)
+        self._stop.set()
+
+    def _read(self):
+        """Reader stage, puts the items of the reader on the rows queue"""
+        try:
+            rows = iter(self.reader())
+            while True:
+                start = time.perf_counter()
+                row = next(rows, _DONE)
+                self.busy["read"] += time.perf_counter() - start
+                if row is _DONE or not self._put("rows", row):
+                    break
+                self.counts["read"] += 1
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put("rows", _DONE)
+
+    def _build(self):
+        """Builder stage, turns the rows into bulk actions"""
+        try:
+            while (row := self._get("rows")) is not _DONE:
+                start = time.perf_counter()
+                action = self.builder(row)
+                self.busy["build"] += time.perf_counter() - start
+                if action is None:
+                    continue
+                if not self._put("actions", action):
+                    break
+                self.counts["build"] += 1
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put("actions", _DONE)
+
+    def _actions(self) -> Iterator[Dict[str, Any]]:
+        """Actions for the sender stage
+
+        Yields:
+            Iterator[Dict[str, Any]]: Bulk actions in the order they were built
+        """
+        while True:
+            start = time.perf_counter()
+            action = self._get("actions")
+            self.busy["send"] -= time.perf_counter() - start
+            if action is _DONE:
+                return
+            self.counts["send"] += 1
+            yield action
+
+    def run(self) -> Any:
+        """Runs the three stages until the reader is exhausted
+
+        Raises:
+            BaseException: The first error raised by the reader or the builder
+
+        Returns:
+            Any: The result of the sender
+        """
+        self.started = time.perf_counter()
+        threads = [
+            threading.Thread(target=self._read, name="pipeline-reader", daemon=True),
+            threading.Thread(target=self._build, name="pipeline-builder", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        start = time.perf_counter()
+        try:
+            result = self.sender(self._actions())
+        finally:
+            self.busy["send"] += time.perf_counter() - start
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            self.finished = time.perf_counter()
+            self.record_metrics()
+
+        if self._errors:
+            raise self._errors[0]
+
+        return result
+
+    def record_metrics(self):
+        """Adds the build time and the number of built documents to the metrics"""
+        metrics = get_metrics()
+        labels = {"index": self.name or "unknown"}
+        metrics.inc("es_py_build_seconds_total", self.busy["build"], **labels)
+        metrics.inc("es_py_documents_built_total", self.counts["build"], **labels)
+
+    def stats(self) -> Dict[str, Any]:
+        """Throughput of every stage and depth of every queue
+
+        Returns:
+            Dict[str, Any]: Pipeline statistics
+        """
+        end = self.finished or time.perf_counter()
+        elapsed = end - self.started if self.started else 0.0
+        return {
+            "elapsed": elapsed,
+            "stages": {
+                stage: {
+                    "count": self.counts[stage],
+                    "busy": self.busy[stage],
+                    "rate": self.counts[stage] / elapsed if elapsed else 0.0,
+                }
+                for stage in self.counts
+            },
+            "queues": {
+                name: {
+                    "depth": q.qsize(),
+                    "max_depth": self.max_depths[name],
+                    "size": q.maxsize,
+                }
+                for name, q in self.queues.items()
+            },
+        }
+
+    def report(self):
+        """Echoes the pipeline statistics"""
+        stats = self.stats()
+        click.echo(f"Pipeline finished in {stats['elapsed']:.2f}s")
+        for stage, stage_stats in stats["stages"].items():
+            click.echo(
+                f"  {stage}: {stage_stats['count']} items, "
+                f"{stage_stats['busy']:.2f}s busy, {stage_stats['rate']:.1f} items/s"
+            )
+        for name, queue_stats in stats["queues"].items():
+            click.echo(
+                f"  {name} queue: max depth {queue_stats['max_depth']}/{queue_stats['size']}"
+            )
+
+
+def pipeline_options(command):
+    """Adds the IndexingPipeline options to an indexer click command
+
+    Args:
+        command: click command function
+
+    Returns:
+        The decorated command
+    """
+    return click.option(
+        "--queue_size",
+        type=int,
+        default=DEFAULT_QUEUE_SIZE,
+        show_default=True,
+        help="Maximum number of items waiting between two pipeline stages",
+    )(command)
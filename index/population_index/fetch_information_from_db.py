@@ -1,16 +1,46 @@
-import mysql.connector
+from index.db_connection import get_connection_provider
+from index.join_staging import get_join_staging
+from index.reference_cache import get_reference_data
 from collections import defaultdict
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Set, Tuple
+
+
+def _collation_key(value: str | None) -> tuple:
+    """Sort key approximating MySQL ordering: NULL first, then case insensitive
+
+    Args:
+        value (str | None): Column value
+
+    Returns:
+        tuple: Sort key
+    """
+    return (value is not None, (value or "").casefold(), value or "")
 
 
 class PopulationDetailsFetcher:
-    def __init__(self, db_config: dict[str, Any]):
+    def __init__(
+        self,
+        db_config: dict[str, Any],
+        join_reference: bool = False,
+        stage_joins: bool = False,
+    ):
         """Initializing the population details fetcher
 
         Args:
             db_config (dict): DB configuration dictionary
-        """        
+            join_reference (bool): Read populations, superpopulations, data types,
+                analysis groups and data collections from ReferenceData instead of
+                joining them in SQL
+            stage_joins (bool): Read the data collection details from the
+                JoinStaging of the run, needs join_reference
+        """
+        if stage_joins and not join_reference:
+            raise ValueError("stage_joins needs join_reference")
         self.db_config = db_config
+        self.connection_provider = get_connection_provider(db_config)
+        self.join_reference = join_reference
+        self.reference = get_reference_data(db_config) if join_reference else None
+        self.staging = get_join_staging(db_config) if stage_joins else None
 
     def fetch_population(self) -> List[Tuple]:
         """Fetches population information
@@ -28,13 +58,7 @@ class PopulationDetailsFetcher:
             GROUP BY p.population_id
         """
 
-        with mysql.connector.connect(
-            host=self.db_config["host"],
-            port=self.db_config["port"],
-            database=self.db_config["database"],
-            user=self.db_config["user"],
-            password=self.db_config["password"],
-        ) as db:
+        with self.connection_provider.connection() as db:
             cursor = db.cursor()
             cursor.execute(query)
             return cursor.fetchall()
@@ -46,27 +70,25 @@ class PopulationDetailsFetcher:
             List[int]: List of ids, used to fetch data collection and overlap population details
         """
 
+        if self.join_reference:
+            return [row["population_id"] for row in self.reference.records["population"].values()]
+
         query = "SELECT population_id FROM population"
 
-        with mysql.connector.connect(
-            host=self.db_config["host"],
-            port=self.db_config["port"],
-            database=self.db_config["database"],
-            user=self.db_config["user"],
-            password=self.db_config["password"],
-        ) as db:
-            cursor = db.cursor()
-            cursor.execute(query)
-            rows = cursor.fetchall()
-            return [row[0] for row in rows]
+        return [row[0] for row in self.fetch_rows(query, [])]
 
     def fetch_data_collection_details(
-        self, pop_ids: List[int]
+        self,
+        pop_ids: List[int],
+        population_samples: Dict[int, Set[int]] | None = None,
     ) -> Dict[int, List[Tuple]]:
         """Fetches data collection details, so it reduces the query to the DB
 
         Args:
             pop_ids (List[int]): list of pop ids
+            population_samples (Dict[int, Set[int]] | None): Result from
+                fetch_population_samples, read by the staged join instead of
+                scanning dc_sample_pop_assign again
 
         Returns:
             Dict[int, List[Tuple]]: A dictionary containing the key and the list of rows from the db
@@ -74,6 +96,9 @@ class PopulationDetailsFetcher:
         if not pop_ids:
             return {}
 
+        if self.join_reference:
+            return self.resolve_data_collection_details(pop_ids, population_samples)
+
         placeholders = ",".join(["%s"] * len(pop_ids))
         query = f"""
             SELECT p.population_id, dt.code, ag.description, dc.title, dc.data_collection_id, dc.reuse_policy 
@@ -89,13 +114,7 @@ class PopulationDetailsFetcher:
             GROUP BY dt.data_type_id, ag.analysis_group_id, dc.data_collection_id, p.population_id
         """
 
-        with mysql.connector.connect(
-            host=self.db_config["host"],
-            port=self.db_config["port"],
-            user=self.db_config["user"],
-            database=self.db_config["database"],
-            password=self.db_config["password"],
-        ) as db:
+        with self.connection_provider.connection() as db:
             cursor = db.cursor()
             cursor.execute(query, pop_ids)
             rows = cursor.fetchall()
@@ -108,6 +127,98 @@ class PopulationDetailsFetcher:
 
         return results
 
+    def resolve_data_collection_details(
+        self,
+        pop_ids: List[int],
+        population_samples: Dict[int, Set[int]] | None = None,
+    ) -> Dict[int, List[Tuple]]:
+        """fetch_data_collection_details with the data type, analysis group and data
+        collection joined against ReferenceData, the query only returns their ids
+
+        Args:
+            pop_ids (List[int]): list of pop ids
+            population_samples (Dict[int, Set[int]] | None): Result from
+                fetch_population_samples, scanned here when None
+
+        Returns:
+            Dict[int, List[Tuple]]: Rows with the shape of fetch_data_collection_details
+        """
+        if self.staging is not None:
+            # only the population to sample step, the rest of the join is staged
+            if population_samples is None:
+                population_samples = self.fetch_population_samples()
+            rows = self.staging.population_collections(
+                {
+                    pop_id: population_samples[pop_id]
+                    for pop_id in pop_ids
+                    if pop_id in population_samples
+                }
+            )
+        else:
+            placeholders = ",".join(["%s"] * len(pop_ids))
+            query = f"""
+                SELECT dspa.population_id, f.data_type_id, f.analysis_group_id, fdc.data_collection_id
+                FROM dc_sample_pop_assign dspa
+                JOIN sample_file sf ON dspa.sample_id = sf.sample_id
+                JOIN file f ON sf.file_id = f.file_id
+                JOIN file_data_collection fdc ON f.file_id = fdc.file_id
+                WHERE dspa.population_id IN ({placeholders})
+                GROUP BY f.data_type_id, f.analysis_group_id, fdc.data_collection_id, dspa.population_id
+            """
+            rows = self.fetch_rows(query, pop_ids)
+
+        return self.resolve_collection_rows(rows)
+
+    def fetch_rows(self, query: str, params: List[Any]) -> List[Tuple]:
+        """Runs a query on a pooled connection
+
+        Args:
+            query (str): The query
+            params (List[Any]): Its parameters
+
+        Returns:
+            List[Tuple]: The rows
+        """
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            cursor.close()
+
+        return rows
+
+    def resolve_collection_rows(self, rows: List[Tuple]) -> Dict[int, List[Tuple]]:
+        """Joins (population_id, data_type_id, analysis_group_id,
+        data_collection_id) rows with ReferenceData, like inner joins
+
+        Args:
+            rows (List[Tuple]): Rows of the query or of the staged join
+
+        Returns:
+            Dict[int, List[Tuple]]: Rows with the shape of fetch_data_collection_details
+        """
+        reference = self.reference
+        results = defaultdict(list)
+        for pop_id, data_type_id, analysis_group_id, dc_id in rows:
+            population = reference.get("population", pop_id)
+            data_type = reference.get("data_type", data_type_id)
+            analysis_group = reference.get("analysis_group", analysis_group_id)
+            collection = reference.get("data_collection", dc_id)
+            # inner joins
+            if None in (population, data_type, analysis_group, collection):
+                continue
+            results[pop_id].append(
+                (
+                    data_type["code"],
+                    analysis_group["description"],
+                    collection["title"],
+                    dc_id,
+                    collection["reuse_policy"],
+                )
+            )
+
+        return results
+
     def fetch_overlap_population_details(
         self, pop_ids: List[int]
     ) -> Dict[int, List[Dict[str, Any]]]:
@@ -138,13 +249,7 @@ class PopulationDetailsFetcher:
             ORDER BY dspa1.population_id, p.description, s.name;
         """
 
-        with mysql.connector.connect(
-            host=self.db_config["host"],
-            port=self.db_config["port"],
-            database=self.db_config["database"],
-            user=self.db_config["user"],
-            password=self.db_config["password"],
-        ) as db:
+        with self.connection_provider.connection() as db:
             cursor = db.cursor()
             cursor.execute(query, pop_ids)
             rows = cursor.fetchall()
@@ -155,6 +260,175 @@ class PopulationDetailsFetcher:
 
         return results
 
+    def fetch_population_samples(self) -> Dict[int, Set[int]]:
+        """Scans dc_sample_pop_assign once and groups the sample ids by population
+
+        Returns:
+            Dict[int, Set[int]]: Sample ids keyed by population id
+        """
+        query = "SELECT DISTINCT population_id, sample_id FROM dc_sample_pop_assign"
+
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(query)
+            rows = cursor.fetchall()
+            cursor.close()
+
+        population_samples = defaultdict(set)
+        for pop_id, sample_id in rows:
+            population_samples[pop_id].add(sample_id)
+
+        return population_samples
+
+    def fetch_population_with_counts(
+        self, population_samples: Dict[int, Set[int]]
+    ) -> List[Tuple]:
+        """Fetches population information, the sample counts come from the
+        population_samples sets instead of a GROUP BY on dc_sample_pop_assign
+
+        Args:
+            population_samples (Dict[int, Set[int]]): Result from fetch_population_samples
+
+        Returns:
+            List[Tuple]: Rows with the same shape as fetch_population
+        """
+        if self.join_reference:
+            rows = self.resolve_populations()
+        else:
+            query = """
+                SELECT p.code, p.name, p.description, p.latitude, p.longitude, p.elastic_id, p.display_order,
+                       sp.code, sp.name, sp.display_colour, sp.display_order, p.population_id
+                FROM population p
+                JOIN superpopulation sp ON p.superpopulation_id = sp.superpopulation_id
+            """
+
+            with self.connection_provider.connection() as db:
+                cursor = db.cursor()
+                cursor.execute(query)
+                rows = cursor.fetchall()
+                cursor.close()
+
+        # populations without assigned samples are left out, as with the join
+        return [
+            row[:7] + (len(population_samples[row[11]]),) + row[7:]
+            for row in rows
+            if population_samples.get(row[11])
+        ]
+
+    def resolve_populations(self) -> List[Tuple]:
+        """Populations joined with their superpopulation from ReferenceData
+
+        Returns:
+            List[Tuple]: Rows with the shape of the population query of
+            fetch_population_with_counts
+        """
+        rows = []
+        for population in self.reference.records["population"].values():
+            superpopulation = self.reference.get(
+                "superpopulation", population["superpopulation_id"]
+            )
+            if superpopulation is None:
+                continue
+            rows.append(
+                (
+                    population["code"],
+                    population["name"],
+                    population["description"],
+                    population["latitude"],
+                    population["longitude"],
+                    population["elastic_id"],
+                    population["display_order"],
+                    superpopulation["code"],
+                    superpopulation["name"],
+                    superpopulation["display_colour"],
+                    superpopulation["display_order"],
+                    population["population_id"],
+                )
+            )
+
+        return rows
+
+    @staticmethod
+    def shared_samples(
+        pop_ids: List[int], population_samples: Dict[int, Set[int]]
+    ) -> Dict[int, Dict[int, Set[int]]]:
+        """Intersects the sample sets of the populations
+
+        Args:
+            pop_ids (List[int]): list of pop ids
+            population_samples (Dict[int, Set[int]]): Result from fetch_population_samples
+
+        Returns:
+            Dict[int, Dict[int, Set[int]]]: For every population, the sample ids shared
+            with each overlapping population
+        """
+        sample_populations = defaultdict(list)
+        for pop_id, samples in population_samples.items():
+            for sample_id in samples:
+                sample_populations[sample_id].append(pop_id)
+
+        results = {}
+        for pop_id in pop_ids:
+            shared = defaultdict(set)
+            for sample_id in population_samples.get(pop_id, ()):
+                for other_id in sample_populations[sample_id]:
+                    if other_id != pop_id:
+                        shared[other_id].add(sample_id)
+            if shared:
+                results[pop_id] = shared
+
+        return results
+
+    def compute_overlap_population_details(
+        self, pop_ids: List[int], population_samples: Dict[int, Set[int]]
+    ) -> Dict[int, List[Tuple]]:
+        """In memory equivalent of fetch_overlap_population_details, the self join is
+        replaced by set intersections
+
+        Args:
+            pop_ids (List[int]): list of pop ids
+            population_samples (Dict[int, Set[int]]): Result from fetch_population_samples
+
+        Returns:
+            Dict[int, List[Tuple]]: Rows with the same shape and order as
+            fetch_overlap_population_details
+        """
+        overlaps = self.shared_samples(pop_ids, population_samples)
+        if not overlaps:
+            return {}
+
+        reference = self.reference
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            if reference is not None:
+                populations = {
+                    pop_id: (population["elastic_id"], population["description"])
+                    for pop_id, population in reference.records["population"].items()
+                }
+            else:
+                cursor.execute("SELECT population_id, elastic_id, description FROM population")
+                populations = {row[0]: row[1:] for row in cursor.fetchall()}
+            cursor.execute("SELECT sample_id, name FROM sample")
+            sample_names = dict(cursor.fetchall())
+            cursor.close()
+
+        results = defaultdict(list)
+        for pop_id, shared in overlaps.items():
+            rows = set()
+            for other_id, sample_ids in shared.items():
+                if other_id not in populations:
+                    continue
+                elastic_id, description = populations[other_id]
+                for sample_id in sample_ids:
+                    if sample_id in sample_names:
+                        rows.add((pop_id, elastic_id, description, sample_names[sample_id]))
+            # ORDER BY p.description, s.name with a case insensitive collation
+            results[pop_id] = sorted(
+                rows, key=lambda row: (_collation_key(row[2]), _collation_key(row[3]))
+            )
+
+        return results
+
     def build_population_info(
         self,
         row: Tuple,
@@ -1,28 +1,55 @@
 import click
 import json
+from functools import partial
 from typing import Any
-from index.elasticsearch_indexer import ElasticSearchIndexer
+from index.elasticsearch_indexer import bulk_options
+from index.bulk_export import create_indexer, export_options
+from index.metrics import metrics_options
 from index.population_index.fetch_information_from_db import PopulationDetailsFetcher
 from index.config_read import read_from_config_file
+from index.db_connection import run_concurrently
+from index.join_staging import staging_options
+from index.pipeline import IndexingPipeline, DEFAULT_QUEUE_SIZE, pipeline_options
 
 json_file = "index/population_index/populations_mappings.json"
 
 
 class PopulationIndexer:
-    def __init__(self, config_file: str, es_host: str, type_of: str):
+    def __init__(
+        self,
+        config_file: str,
+        es_host: str,
+        type_of: str,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        preload_concurrency: int | None = None,
+        stage_joins: bool = False,
+        **indexer_options,
+    ):
         """Initialization of the class
 
         Args:
             config_file (str): Configuration file
             es_host (str): ElasticSearch Host
             type_of (str): Type of
+            queue_size (int): Maximum number of items waiting between two pipeline stages
+            preload_concurrency (int | None): Maximum number of independent preload
+                queries running at the same time on their own connections, None for
+                all of them, 1 runs them one after the other
+            stage_joins (bool): Read the data collections of the populations from
+                the JoinStaging shared by the indexers of the run
+            **indexer_options: ElasticSearchIndexer options, e.g. bulk_mode, or the
+                export options of create_indexer
         """
         self.config_file = config_file
         self.es_host = es_host
         self.type_of = type_of
+        self.queue_size = queue_size
+        self.preload_concurrency = preload_concurrency
         self.data = read_from_config_file(config_file)
-        self.fetcher = PopulationDetailsFetcher(self.data)
-        self.indexer = ElasticSearchIndexer(es_host, "population")
+        self.fetcher = PopulationDetailsFetcher(
+            self.data, join_reference=True, stage_joins=stage_joins
+        )
+        self.indexer = create_indexer(es_host, "population", **indexer_options)
 
     def load_json_file(self) -> dict[str, Any]:
         """Loading Json file to get the settings and the mappings
@@ -48,40 +75,125 @@ class PopulationIndexer:
 
         return population
 
-    def build_and_index_population_info(self):
-        """Build and index population info"""
-        pop_info = self.fetcher.fetch_population()
+    def fetch_samples_and_overlaps(self, pop_ids: list[int]) -> tuple[dict, dict]:
+        """Scans the population samples, then computes the overlapping populations
+        from them
+
+        Args:
+            pop_ids (list[int]): List of population ids
+
+        Returns:
+            tuple[dict, dict]: The sample ids and the overlap rows, by population id
+        """
+        population_samples = self.fetcher.fetch_population_samples()
+        overlap_map = self.fetcher.compute_overlap_population_details(
+            pop_ids, population_samples
+        )
+
+        return population_samples, overlap_map
+
+    def read_populations(self):
+        """Read populations from the DB, together with the data collection and
+        overlapping population maps. The data collection join and the sample scan
+        do not depend on each other, they run at the same time on two connections.
+        With staged joins the data collections are resolved from the scanned samples
+        once the scan is done
+
+        Yields:
+            tuple: (row, dc_map, overlap_map) for every population
+        """
         pop_ids = self.fetcher.fetch_population_ids()
-        actions = []
-        dc_map = self.fetcher.fetch_data_collection_details(pop_ids)
-        overlap_map = self.fetcher.fetch_overlap_population_details(pop_ids)
+        if self.fetcher.staging is not None:
+            population_samples, overlap_map = self.fetch_samples_and_overlaps(pop_ids)
+            dc_map = self.fetcher.fetch_data_collection_details(
+                pop_ids, population_samples
+            )
+        else:
+            preloaded = run_concurrently(
+                {
+                    "samples": partial(self.fetch_samples_and_overlaps, pop_ids),
+                    "dc_map": partial(
+                        self.fetcher.fetch_data_collection_details, pop_ids
+                    ),
+                },
+                self.preload_concurrency,
+            )
+            population_samples, overlap_map = preloaded["samples"]
+            dc_map = preloaded["dc_map"]
+        pop_info = self.fetcher.fetch_population_with_counts(population_samples)
         for row in pop_info:
-            code = row[5]
-            if not code:
-                continue
-            
-            population_data = self.fetcher.build_population_info(row, dc_map, overlap_map)
+            yield row, dc_map, overlap_map
 
-            action = self.indexer.index_data(population_data, code, self.type_of)
-            actions.append(action)
+    def build_action(self, item: tuple) -> dict[str, Any] | None:
+        """Build the bulk action of a population
 
+        Args:
+            item (tuple): An item from read_populations
+
+        Returns:
+            dict[str, Any] | None: Bulk action, None for populations without an elastic id
+        """
+        row, dc_map, overlap_map = item
+        code = row[5]
+        if not code:
+            return None
+
+        population_data = self.fetcher.build_population_info(row, dc_map, overlap_map)
+
+        return self.indexer.index_data(population_data, code, self.type_of)
+
+    def build_and_index_population_info(self):
+        """Build and index population info
+
+        Returns:
+            dict[str, Any] | None: Bulk indexing summary, None when the index was not created
+        """
+        pipeline = IndexingPipeline(
+            self.read_populations,
+            self.build_action,
+            self.indexer.bulk_index,
+            self.queue_size,
+            name=self.indexer.alias,
+        )
+        result = None
         if self.type_of == "create":
             if self.create_population_index() is True:
-                self.indexer.bulk_index(actions)
+                result = self.indexer.load_index(pipeline.run)
                 click.echo(
                     f"{self.indexer.index_name} has been populated with documents"
                 )
+        elif self.type_of == "rebuild":
+            json_data = self.load_json_file()
+            result = self.indexer.rebuild_index(
+                json_data["settings"], json_data["mappings"], pipeline.run
+            )
         else:
-            self.indexer.bulk_index(actions)
+            result = pipeline.run()
             click.echo(f"{self.indexer.index_name} has been populated with documents")
 
+        if result is not None:
+            pipeline.report()
+            result["pipeline"] = pipeline.stats()
+
+        return result
 
 @click.command()
 @click.option("--config_file", "-c", type=click.Path(exists=True), required=True)
 @click.option("--es_host", "-es", type=str, required=True)
 @click.option("--type_of", "-t", type=str, required=True)
-def create_data(config_file: str, es_host: str, type_of: str):
-    indexer = PopulationIndexer(config_file, es_host, type_of)
+@click.option(
+    "--preload_concurrency",
+    type=int,
+    default=None,
+    help="Preload queries running at the same time, all of them by default",
+)
+@staging_options
+@bulk_options
+@export_options
+@pipeline_options
+@metrics_options
+def create_data(config_file: str, es_host: str, type_of: str, **indexer_options):
+    indexer = PopulationIndexer(config_file, es_host, type_of, **indexer_options)
     result = indexer.build_and_index_population_info()
 
 
@@ -91,7 +203,6 @@ if __name__ == "__main__":
 
 
 # Enables programmatic use (from main.py)
-def run(config_file, es_host, type_of):
-    indexer = PopulationIndexer(config_file, es_host, type_of)
-    result = indexer.build_and_index_population_info()
-    print(result)
+def run(config_file, es_host, type_of, **indexer_options):
+    indexer = PopulationIndexer(config_file, es_host, type_of, **indexer_options)
+    return indexer.build_and_index_population_info()
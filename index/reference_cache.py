@@ -0,0 +1,259 @@
+import base64
+import click
+import json
+import os
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+from index.db_connection import ConnectionProvider, get_connection_provider
+
+# Reference tables loaded by ReferenceData, with their primary key
+REFERENCE_TABLES = {
+    "population": "population_id",
+    "superpopulation": "superpopulation_id",
+    "data_collection": "data_collection_id",
+    "analysis_group": "analysis_group_id",
+    "data_type": "data_type_id",
+}
+SNAPSHOT_VERSION = 2
+# tags of the column values JSON has no type for, e.g. DECIMAL coordinates
+SNAPSHOT_TYPES = {
+    "decimal": (Decimal, str, Decimal),
+    "datetime": (datetime, datetime.isoformat, datetime.fromisoformat),
+    "date": (date, date.isoformat, date.fromisoformat),
+    "bytes": (bytes, lambda value: base64.b64encode(value).decode(), base64.b64decode),
+}
+
+_reference_data: dict[ConnectionProvider, "ReferenceData"] = {}
+_reference_lock = threading.Lock()
+
+
+def encode_value(value: Any) -> Any:
+    """JSON form of a column value, tagged with its type when JSON has none
+
+    Args:
+        value (Any): Value read from the DB
+
+    Raises:
+        TypeError: A value of an unsupported type
+
+    Returns:
+        Any: The JSON serializable value
+    """
+    for tag, (kind, encode, _) in SNAPSHOT_TYPES.items():
+        if isinstance(value, kind):
+            return {"$type": tag, "value": encode(value)}
+
+    raise TypeError(f"Unsupported reference value: {value!r}")
+
+
+def decode_value(value: dict[str, Any]) -> Any:
+    """Column value of a tagged JSON object written by encode_value
+
+    Args:
+        value (dict[str, Any]): JSON object
+
+    Returns:
+        Any: The value read from the DB
+    """
+    if "$type" not in value:
+        return value
+
+    return SNAPSHOT_TYPES[value["$type"]][2](value["value"])
+
+
+class ReferenceData:
+    """The reference tables loaded once, as id keyed lookups the fetchers join
+    against in Python instead of in SQL"""
+
+    def __init__(
+        self,
+        columns: dict[str, list[str]],
+        rows: dict[str, list[tuple]],
+        fingerprint: dict[str, Any] | None = None,
+    ):
+        """Initialization of the ReferenceData class
+
+        Args:
+            columns (dict[str, list[str]]): Column names of every table
+            rows (dict[str, list[tuple]]): Rows of every table, in the table order
+            fingerprint (dict[str, Any] | None): Checksums of the tables the rows
+                were read from
+        """
+        self.columns = columns
+        self.table_rows = rows
+        self.fingerprint = fingerprint
+        self.records = {}
+        for table, key in REFERENCE_TABLES.items():
+            names = columns.get(table, [])
+            records = (dict(zip(names, row, strict=True)) for row in rows.get(table, []))
+            self.records[table] = {record[key]: record for record in records}
+
+    @staticmethod
+    def table_fingerprint(connection_provider: ConnectionProvider) -> dict[str, Any]:
+        """Checksums of the reference tables, a snapshot is only reused when they
+        did not change
+
+        Args:
+            connection_provider (ConnectionProvider): Provider the query runs on
+
+        Returns:
+            dict[str, Any]: Checksum keyed by table name
+        """
+        with connection_provider.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(f"CHECKSUM TABLE {', '.join(REFERENCE_TABLES)}")
+            checksums = cursor.fetchall()
+            cursor.close()
+
+        # the server reports db.table names
+        return {name.split(".")[-1]: checksum for name, checksum in checksums}
+
+    @classmethod
+    def load(
+        cls, connection_provider: ConnectionProvider, fingerprint: dict | None = None
+    ) -> "ReferenceData":
+        """Reads every reference table
+
+        Args:
+            connection_provider (ConnectionProvider): Provider the queries run on
+            fingerprint (dict | None): Checksums taken before the tables were read
+
+        Returns:
+            ReferenceData: The loaded tables
+        """
+        columns = {}
+        rows = {}
+        with connection_provider.connection() as db:
+            cursor = db.cursor()
+            for table in REFERENCE_TABLES:
+                cursor.execute(f"SELECT * FROM {table}")
+                rows[table] = cursor.fetchall()
+                columns[table] = list(cursor.column_names)
+            cursor.close()
+
+        return cls(columns, rows, fingerprint)
+
+    def save(self, path: str):
+        """Writes the tables and their fingerprint to a JSON snapshot file
+
+        Args:
+            path (str): Snapshot file
+        """
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "fingerprint": self.fingerprint,
+            "columns": self.columns,
+            "rows": self.table_rows,
+        }
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as file:
+            json.dump(snapshot, file, default=encode_value)
+        os.replace(temporary, path)
+
+    @classmethod
+    def from_snapshot(cls, path: str, fingerprint: dict) -> "ReferenceData | None":
+        """Reads a snapshot file written by save
+
+        Args:
+            path (str): Snapshot file
+            fingerprint (dict): Current checksums of the tables
+
+        Returns:
+            ReferenceData | None: The snapshot, None when it is missing, unreadable
+            or stale
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as file:
+                snapshot = json.load(file, object_hook=decode_value)
+        except (ValueError, KeyError) as e:
+            click.echo(f"Reference snapshot {path} ignored: {e}")
+            return None
+        if (
+            not isinstance(snapshot, dict)
+            or snapshot.get("version") != SNAPSHOT_VERSION
+            or snapshot.get("fingerprint") != fingerprint
+        ):
+            return None
+
+        rows = {
+            table: [tuple(row) for row in table_rows]
+            for table, table_rows in snapshot["rows"].items()
+        }
+        return cls(snapshot["columns"], rows, fingerprint)
+
+    def rows(self, table: str) -> list[tuple]:
+        """Rows of a table, same shape as SELECT * FROM table
+
+        Args:
+            table (str): One of REFERENCE_TABLES
+
+        Returns:
+            list[tuple]: The rows
+        """
+        return self.table_rows[table]
+
+    def get(self, table: str, row_id: Any) -> dict[str, Any] | None:
+        """Record of a table by primary key
+
+        Args:
+            table (str): One of REFERENCE_TABLES
+            row_id (Any): Primary key, None for a NULL foreign key
+
+        Returns:
+            dict[str, Any] | None: The record, None when it does not exist
+        """
+        return self.records[table].get(row_id)
+
+    def value(self, table: str, row_id: Any, column: str) -> Any:
+        """Column of a record, like a LEFT JOIN
+
+        Args:
+            table (str): One of REFERENCE_TABLES
+            row_id (Any): Primary key, None for a NULL foreign key
+            column (str): Column name
+
+        Returns:
+            Any: The value, None when the record does not exist
+        """
+        record = self.records[table].get(row_id)
+        return record[column] if record else None
+
+
+def get_reference_data(db_config: dict[str, Any]) -> ReferenceData:
+    """Returns the reference data shared by every fetcher using the same database.
+    With a reference_snapshot path in the configuration, the tables are read from
+    the snapshot while their checksums are unchanged
+
+    Args:
+        db_config (dict[str, Any]): DB configuration from read_from_config_file
+
+    Returns:
+        ReferenceData: The shared reference data
+    """
+    provider = get_connection_provider(db_config)
+    with _reference_lock:
+        if provider not in _reference_data:
+            snapshot = db_config.get("reference_snapshot")
+            fingerprint = None
+            reference = None
+            if snapshot:
+                # CHECKSUM TABLE reads the whole tables, only worth it for a snapshot
+                fingerprint = ReferenceData.table_fingerprint(provider)
+                reference = ReferenceData.from_snapshot(snapshot, fingerprint)
+            if reference is None:
+                reference = ReferenceData.load(provider, fingerprint)
+                if snapshot:
+                    reference.save(snapshot)
+                    click.echo(f"Reference snapshot written to {snapshot}")
+            _reference_data[provider] = reference
+        return _reference_data[provider]
+
+
+def clear_reference_data():
+    """Forgets the loaded reference data, the next get_reference_data reads it again"""
+    with _reference_lock:
+        _reference_data.clear()
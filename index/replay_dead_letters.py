@@ -0,0 +1,123 @@
+import click
+from typing import Any, Dict, Iterator
+from index.dead_letter import is_accepted, read_dead_letters, replay_action
+from index.elasticsearch_indexer import (
+    DEFAULT_CHUNK_SIZE,
+    ElasticSearchIndexer,
+    bulk_options,
+)
+from index.metrics import metrics_options
+
+
+class DeadLetterReplayer:
+    """Sends the actions of a dead letter file again"""
+
+    def __init__(
+        self,
+        es_host: str,
+        path: str,
+        index_name: str | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        **indexer_options,
+    ):
+        """Initialization of the DeadLetterReplayer class
+
+        Args:
+            es_host (str): Host of the ElasticSearch
+            path (str): Dead letter file
+            index_name (str | None): Target index, the index recorded in the file
+                when None
+            chunk_size (int): Number of actions per bulk request
+            **indexer_options: ElasticSearchIndexer options, e.g. max_retries or
+                dead_letter_dir for the actions failing again
+        """
+        self.path = path
+        entries = read_dead_letters(path)
+        first = next(entries, None)
+        entries.close()
+        self.index_name = index_name or (first["index"] if first else None)
+        self.chunk_size = chunk_size
+        self.indexer = ElasticSearchIndexer(
+            es_host, self.index_name or "unknown", chunk_size=chunk_size, **indexer_options
+        )
+
+    def chunks(self) -> Iterator[list]:
+        """Operations of the bulk requests
+
+        Yields:
+            Iterator[list]: Action and source lines of chunk_size actions
+        """
+        operations = []
+        count = 0
+        for entry in read_dead_letters(self.path):
+            action, source = replay_action(entry, self.index_name)
+            operations.append(action)
+            if source is not None:
+                operations.append(source)
+            count += 1
+            if count == self.chunk_size:
+                yield operations
+                operations = []
+                count = 0
+        if operations:
+            yield operations
+
+    def replay(self) -> Dict[str, Any]:
+        """Sends the actions, the ones failing again go to a new dead letter file
+        when the indexer has a dead_letter_dir
+
+        Returns:
+            Dict[str, Any]: Bulk indexing summary
+        """
+        summary = {"success": 0, "failed": 0, "errors": [], "chunks": []}
+        for operations in self.chunks():
+            response = self.indexer.client.bulk(operations=operations)
+            for item in response["items"]:
+                self.indexer.add_result(summary, is_accepted(item), item)
+        click.echo(
+            f"{summary['success']} actions of {self.path} replayed into "
+            f"'{self.index_name}', {summary['failed']} failed"
+        )
+
+        return self.indexer.finish_summary(summary)
+
+
+@click.command()
+@click.option(
+    "--dead_letter_file",
+    "-f",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Dead letter file to replay",
+    required=True,
+)
+@click.option("--es_host", "-es", type=str, help="ElasticSearch host", required=True)
+@click.option(
+    "--index_name",
+    "-i",
+    default=None,
+    help="Target index, the index recorded in the file when omitted",
+)
+@bulk_options
+@metrics_options
+def replay_dead_letters(
+    dead_letter_file: str, es_host: str, index_name: str | None, **indexer_options
+):
+    """Replays the failed actions of a dead letter file
+
+    Args:
+        dead_letter_file (str): Dead letter file
+        es_host (str): ElasticSearch host
+        index_name (str | None): Target index
+        **indexer_options: ElasticSearchIndexer options, e.g. max_retries
+    """
+    run(dead_letter_file, es_host, index_name, **indexer_options)
+
+
+# Enables programmatic use (from main.py)
+def run(dead_letter_file, es_host, index_name=None, **indexer_options):
+    replayer = DeadLetterReplayer(es_host, dead_letter_file, index_name, **indexer_options)
+    return replayer.replay()
+
+
+if __name__ == "__main__":
+    replay_dead_letters()
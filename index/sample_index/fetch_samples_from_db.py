@@ -1,43 +1,51 @@
-from mysql.connector import connect
+from collections import defaultdict
 from typing import Any
 from index.sample_index.utils import create_the_dictionary_structure
+from index.db_connection import get_connection_provider
+from index.join_staging import get_join_staging
+from index.reference_cache import get_reference_data
+
+DEFAULT_BATCH_SIZE = 1000
 
 
 class SampleDetailsFetcher:
-    def __init__(self, db_config: dict):
+    def __init__(
+        self, db_config: dict, join_reference: bool = False, stage_joins: bool = False
+    ):
         """Initialization of the SampleDetailsFetcher class
 
         Args:
             db_config (dict): A dictionary containing the configuration data
+            join_reference (bool): Resolve populations, data types, analysis groups
+                and data collections of preload_data against ReferenceData instead
+                of in SQL
+            stage_joins (bool): Read the dataCollections rows of preload_data from
+                the JoinStaging of the run, needs join_reference
         """
+        if stage_joins and not join_reference:
+            raise ValueError("stage_joins needs join_reference")
 
         self.db_config = db_config
-        self.samples_dict = create_the_dictionary_structure()
+        self.connection_provider = get_connection_provider(db_config)
+        self.join_reference = join_reference
+        self.reference = get_reference_data(db_config) if join_reference else None
+        self.staging = get_join_staging(db_config) if stage_joins else None
 
     def fetch_samples(self) -> list[tuple]:
         """Fetch samples from the database
 
         Returns:
-            list[tuple]: List of tuples info from the DB
+            list[tuple]: List of tuples info from the DB, in sample_id order
         """
 
-        select_samples_sql = (
-            """SELECT s.sample_id, s.name, s.biosample_id, s.sex from sample s"""
-        )
-
-        db = connect(
-            host=self.db_config["host"],
-            port=self.db_config["port"],
-            database=self.db_config["database"],
-            user=self.db_config["user"],
-            password=self.db_config["password"],
-        )
+        select_samples_sql = """SELECT s.sample_id, s.name, s.biosample_id, s.sex from sample s
+                                ORDER BY s.sample_id"""
 
-        cursor = db.cursor()
-        cursor.execute(select_samples_sql)
-        samples = cursor.fetchall()
-        cursor.close()
-        db.close()
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(select_samples_sql)
+            samples = cursor.fetchall()
+            cursor.close()
 
         return samples
 
@@ -54,19 +62,11 @@ class SampleDetailsFetcher:
         select_source_sample_sql = """SELECT s_source.sample_source_id, s_source.name, s_source.description, s_source.url from sample s, 
                                         sample_source s_source where s.sample_source_id=s_source.sample_source_id and s.sample_id = %s"""
 
-        db = connect(
-            host=self.db_config["host"],
-            port=self.db_config["port"],
-            database=self.db_config["database"],
-            user=self.db_config["user"],
-            password=self.db_config["password"],
-        )
-
-        cursor = db.cursor()
-        cursor.execute(select_source_sample_sql, (sample_id,))
-        source = cursor.fetchall()
-        cursor.close()
-        db.close()
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(select_source_sample_sql, (sample_id,))
+            source = cursor.fetchall()
+            cursor.close()
 
         return source
 
@@ -85,19 +85,11 @@ class SampleDetailsFetcher:
                                             superpopulation.display_order from dc_sample_pop_assign, population, superpopulation where dc_sample_pop_assign.sample_id = %s
                                             and dc_sample_pop_assign.population_id =population.population_id and population.superpopulation_id =superpopulation.superpopulation_id"""
 
-        db = connect(
-            host=self.db_config["host"],
-            port=self.db_config["port"],
-            database=self.db_config["database"],
-            user=self.db_config["user"],
-            password=self.db_config["password"],
-        )
-
-        cursor = db.cursor()
-        cursor.execute(select_population_sample_sql, (sample_id,))
-        population = cursor.fetchall()
-        cursor.close()
-        db.close()
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(select_population_sample_sql, (sample_id,))
+            population = cursor.fetchall()
+            cursor.close()
 
         return population
 
@@ -119,19 +111,11 @@ class SampleDetailsFetcher:
                                             INNER JOIN data_collection dc ON fdc.data_collection_id=dc.data_collection_id
                                             WHERE sf.sample_id=%s GROUP BY dt.data_type_id, ag.analysis_group_id, dc.data_collection_id"""
 
-        db = connect(
-            host=self.db_config["host"],
-            port=self.db_config["port"],
-            database=self.db_config["database"],
-            user=self.db_config["user"],
-            password=self.db_config["password"],
-        )
-
-        cursor = db.cursor()
-        cursor.execute(select_datacollection_sample_sql, (sample_id,))
-        datacollection = cursor.fetchall()
-        cursor.close()
-        db.close()
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(select_datacollection_sample_sql, (sample_id,))
+            datacollection = cursor.fetchall()
+            cursor.close()
 
         return datacollection
 
@@ -147,19 +131,11 @@ class SampleDetailsFetcher:
 
         select_relationship_sample_sql = """SELECT s.name, sr.type FROM sample s, sample_relationship sr WHERE sr.relation_sample_id=s.sample_id AND sr.subject_sample_id=%s"""
 
-        db = connect(
-            host=self.db_config["host"],
-            port=self.db_config["port"],
-            database=self.db_config["database"],
-            user=self.db_config["user"],
-            password=self.db_config["password"],
-        )
-
-        cursor = db.cursor()
-        cursor.execute(select_relationship_sample_sql, (sample_id,))
-        sample_relationship = cursor.fetchall()
-        cursor.close()
-        db.close()
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(select_relationship_sample_sql, (sample_id,))
+            sample_relationship = cursor.fetchall()
+            cursor.close()
 
         return sample_relationship
 
@@ -177,34 +153,182 @@ class SampleDetailsFetcher:
             """SELECT synonym from sample_synonym where sample_id = %s"""
         )
 
-        db = connect(
-            host=self.db_config["host"],
-            port=self.db_config["port"],
-            database=self.db_config["database"],
-            user=self.db_config["user"],
-            password=self.db_config["password"],
-        )
-
-        cursor = db.cursor()
-        cursor.execute(select_sample_synonyms_sql, (sample_id,))
-        sample_synonyms = cursor.fetchall()
-        cursor.close()
-        db.close()
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(select_sample_synonyms_sql, (sample_id,))
+            sample_synonyms = cursor.fetchall()
+            cursor.close()
 
         return sample_synonyms
 
-    def populate_source_samples(self, sample_id: int) -> list:
+    def preload_data(
+        self, sample_ids: list[int]
+    ) -> tuple[defaultdict, defaultdict, defaultdict]:
+        """Preload source, population and dataCollections rows for a batch of samples,
+        so each sample does not need its own round trips to the database
+
+        Args:
+            sample_ids (list[int]): List of sample_id
+
+        Returns:
+            tuple[defaultdict, defaultdict, defaultdict]: source, population and dataCollections
+            rows keyed by sample_id, in the same shape as the per sample fetch functions
+        """
+        source_map = defaultdict(list)
+        population_map = defaultdict(list)
+        dc_map = defaultdict(list)
+        if not sample_ids:
+            return source_map, population_map, dc_map
+
+        format_strings = ",".join(["%s"] * len(sample_ids))
+
+        select_source_sample_sql = f"""SELECT s.sample_id, s_source.sample_source_id, s_source.name, s_source.description, s_source.url
+                                        from sample s, sample_source s_source where s.sample_source_id=s_source.sample_source_id
+                                        and s.sample_id IN ({format_strings})"""
+
+        select_population_sample_sql = f"""SELECT DISTINCT dc_sample_pop_assign.sample_id, population.population_id, population.code, population.name,
+                                            population.description, population.latitude, population.longitude, population.elastic_id, population.superpopulation_id,
+                                            superpopulation.code, superpopulation.name, superpopulation.display_colour, superpopulation.display_order
+                                            from dc_sample_pop_assign, population, superpopulation where dc_sample_pop_assign.sample_id IN ({format_strings})
+                                            and dc_sample_pop_assign.population_id =population.population_id and population.superpopulation_id =superpopulation.superpopulation_id"""
+
+        select_datacollection_sample_sql = f"""SELECT sf.sample_id, dt.code, ag.description, dc.title, dc.data_collection_id, dc.reuse_policy
+                                            FROM file f LEFT JOIN data_type dt ON f.data_type_id = dt.data_type_id
+                                            LEFT JOIN analysis_group ag ON f.analysis_group_id = ag.analysis_group_id
+                                            INNER JOIN sample_file sf ON sf.file_id=f.file_id
+                                            INNER JOIN file_data_collection fdc ON f.file_id=fdc.file_id
+                                            INNER JOIN data_collection dc ON fdc.data_collection_id=dc.data_collection_id
+                                            WHERE sf.sample_id IN ({format_strings})
+                                            GROUP BY sf.sample_id, dt.data_type_id, ag.analysis_group_id, dc.data_collection_id
+                                            ORDER BY sf.sample_id, dt.data_type_id, ag.analysis_group_id, dc.data_collection_id"""
+
+        if self.join_reference:
+            select_population_sample_sql = f"""SELECT DISTINCT sample_id, population_id FROM dc_sample_pop_assign
+                                                WHERE sample_id IN ({format_strings})"""
+
+            select_datacollection_sample_sql = f"""SELECT sf.sample_id, f.data_type_id, f.analysis_group_id, fdc.data_collection_id
+                                                FROM file f INNER JOIN sample_file sf ON sf.file_id=f.file_id
+                                                INNER JOIN file_data_collection fdc ON f.file_id=fdc.file_id
+                                                WHERE sf.sample_id IN ({format_strings})
+                                                GROUP BY sf.sample_id, f.data_type_id, f.analysis_group_id, fdc.data_collection_id
+                                                ORDER BY sf.sample_id, f.data_type_id, f.analysis_group_id, fdc.data_collection_id"""
+
+        queries = [select_source_sample_sql, select_population_sample_sql]
+        if self.staging is None:
+            queries.append(select_datacollection_sample_sql)
+
+        with self.connection_provider.connection() as db:
+            cursor = db.cursor()
+            rows = []
+            for sql in queries:
+                cursor.execute(sql, sample_ids)
+                rows.append(cursor.fetchall())
+            cursor.close()
+
+        if self.staging is not None:
+            rows.append(self.staging.sample_collections(sample_ids))
+        source_rows, population_rows, dc_rows = rows
+        if self.join_reference:
+            population_rows = self.resolve_population_rows(population_rows)
+            dc_rows = self.resolve_datacollection_rows(dc_rows)
+
+        for sample_rows, sample_map in (
+            (source_rows, source_map),
+            (population_rows, population_map),
+            (dc_rows, dc_map),
+        ):
+            for row in sample_rows:
+                sample_map[row[0]].append(row[1:])
+
+        return source_map, population_map, dc_map
+
+    def resolve_population_rows(self, rows: list[tuple]) -> list[tuple]:
+        """Joins (sample_id, population_id) rows with the populations and their
+        superpopulation from ReferenceData
+
+        Args:
+            rows (list[tuple]): Rows of the population preload query
+
+        Returns:
+            list[tuple]: Rows with the shape of the SQL population preload query
+        """
+        resolved = []
+        for sample_id, population_id in rows:
+            population = self.reference.get("population", population_id)
+            if population is None:
+                continue
+            superpopulation = self.reference.get(
+                "superpopulation", population["superpopulation_id"]
+            )
+            if superpopulation is None:
+                continue
+            resolved.append(
+                (
+                    sample_id,
+                    population_id,
+                    population["code"],
+                    population["name"],
+                    population["description"],
+                    population["latitude"],
+                    population["longitude"],
+                    population["elastic_id"],
+                    population["superpopulation_id"],
+                    superpopulation["code"],
+                    superpopulation["name"],
+                    superpopulation["display_colour"],
+                    superpopulation["display_order"],
+                )
+            )
+
+        return resolved
+
+    def resolve_datacollection_rows(self, rows: list[tuple]) -> list[tuple]:
+        """Joins (sample_id, data_type_id, analysis_group_id, data_collection_id)
+        rows with ReferenceData, data types and analysis groups like a LEFT JOIN and
+        data collections like an INNER JOIN
+
+        Args:
+            rows (list[tuple]): Rows of the dataCollections preload query
+
+        Returns:
+            list[tuple]: Rows with the shape of the SQL dataCollections preload query
+        """
+        resolved = []
+        for sample_id, data_type_id, analysis_group_id, dc_id in rows:
+            collection = self.reference.get("data_collection", dc_id)
+            if collection is None:
+                continue
+            resolved.append(
+                (
+                    sample_id,
+                    self.reference.value("data_type", data_type_id, "code"),
+                    self.reference.value(
+                        "analysis_group", analysis_group_id, "description"
+                    ),
+                    collection["title"],
+                    dc_id,
+                    collection["reuse_policy"],
+                )
+            )
+
+        return resolved
+
+    def populate_source_samples(
+        self, sample_id: int, sources: list[tuple] | None = None
+    ) -> list:
         """Populating source samples 
 
         Args:
             sample_id (int): sample id information
+            sources (list[tuple] | None): Preloaded source rows, fetched from the DB when None
 
         Returns:
             list: A list of dictionary containing source information
         """
 
         source_sample = []
-        sources = self.fetch_source_samples(sample_id)
+        if sources is None:
+            sources = self.fetch_source_samples(sample_id)
         seen = set()  # a set to ensure only unique entries
         for row in sources:
             entry = (row[3], row[1], row[2])
@@ -216,18 +340,22 @@ class SampleDetailsFetcher:
 
         return source_sample
 
-    def populate_population_samples(self, sample_id: int) -> list:
+    def populate_population_samples(
+        self, sample_id: int, populations: list[tuple] | None = None
+    ) -> list:
         """Populating population samples information
 
         Args:
             sample_id (int): sample id information
+            populations (list[tuple] | None): Preloaded population rows, fetched from the DB when None
 
         Returns:
             list: A list of dictionary containing the population information
         """
 
         population_sample = []
-        populations = self.fetch_population_samples(sample_id)
+        if populations is None:
+            populations = self.fetch_population_samples(sample_id)
         seen = set()
         for row in populations:
             entry = (row[6], row[9], row[2], row[8], row[3], row[1])
@@ -246,11 +374,14 @@ class SampleDetailsFetcher:
 
         return population_sample
 
-    def populate_datacollection_samples(self, sample_id: int) -> list:
+    def populate_datacollection_samples(
+        self, sample_id: int, datacollections: list[tuple] | None = None
+    ) -> list:
         """Populating data collection sample information
 
         Args:
             sample_id (int): sample id information
+            datacollections (list[tuple] | None): Preloaded dataCollections rows, fetched from the DB when None
 
         Returns:
             list: A list of dictionary containing the data collection
@@ -258,7 +389,8 @@ class SampleDetailsFetcher:
 
         dataCollections = {"dataTypes": [], "dataReusePolicy": None, "title": None}
         dataCollection_sample = []
-        datacollections = self.fetch_dataCollections_samples(sample_id)
+        if datacollections is None:
+            datacollections = self.fetch_dataCollections_samples(sample_id)
         seen = set()
         for row in datacollections:
             entry = (row[4], row[2])
@@ -276,25 +408,49 @@ class SampleDetailsFetcher:
 
         return dataCollection_sample
 
-    def build_the_dictionary_structure(self, row: tuple) -> dict[str, Any]:
+    def build_the_dictionary_structure(
+        self,
+        row: tuple,
+        source_map: dict[int, list[tuple]] | None = None,
+        population_map: dict[int, list[tuple]] | None = None,
+        dc_map: dict[int, list[tuple]] | None = None,
+    ) -> dict[str, Any]:
         """Building the dictionary structure
 
         Args:
             row (tuple): Row from the fetch samples return
+            source_map (dict[int, list[tuple]] | None): Source rows keyed by sample_id from preload_data
+            population_map (dict[int, list[tuple]] | None): Population rows keyed by sample_id from preload_data
+            dc_map (dict[int, list[tuple]] | None): dataCollections rows keyed by sample_id from preload_data
 
         Returns:
             dict[str, Any]: The updated dictionary
         """
+        sample_id = row[0]
 
-        self.samples_dict.update(
+        # a new dictionary for every sample, the previous one may still be waiting to be sent
+        samples_dict = create_the_dictionary_structure()
+        samples_dict.update(
             {
                 "biosampleId": row[2],
                 "sex": row[3],
                 "name": row[1],
-                "source": self.populate_source_samples(row[0]),
-                "populations": self.populate_population_samples(row[0]),
-                "dataCollections": self.populate_datacollection_samples(row[0]),
+                "source": self.populate_source_samples(
+                    sample_id,
+                    source_map.get(sample_id, []) if source_map is not None else None,
+                ),
+                "populations": self.populate_population_samples(
+                    sample_id,
+                    (
+                        population_map.get(sample_id, [])
+                        if population_map is not None
+                        else None
+                    ),
+                ),
+                "dataCollections": self.populate_datacollection_samples(
+                    sample_id, dc_map.get(sample_id, []) if dc_map is not None else None
+                ),
             }
         )
 
-        return self.samples_dict
+        return samples_dict
@@ -1,29 +1,85 @@
 import click
 import sys
 import json
+import os
+from functools import partial
 from typing import Any
-from index.elasticsearch_indexer import ElasticSearchIndexer
-from .fetch_samples_from_db import SampleDetailsFetcher
+from index.elasticsearch_indexer import bulk_options
+from index.bulk_export import create_indexer, export_options
+from index.checkpoint import Checkpoint, checkpoint_options
+from index.join_staging import staging_options
+from index.metrics import metrics_options
+from .fetch_samples_from_db import SampleDetailsFetcher, DEFAULT_BATCH_SIZE
 from index.config_read import read_from_config_file
+from index.pipeline import IndexingPipeline, DEFAULT_QUEUE_SIZE, pipeline_options
 
 json_file = "index/sample_index/sample.json"
 class SampleIndexer:
     """SampleIndexer Class """
 
-    def __init__(self, config_file: str, es_host: str, type_of: str):
+    def __init__(
+        self,
+        config_file: str,
+        es_host: str,
+        type_of: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        checkpoint_file: str | None = None,
+        resume: bool = False,
+        stage_joins: bool = False,
+        **indexer_options,
+    ):
         """Initializing of the Sample Indexer class
 
         Args:
             config_file (str): Configuration file
             es_host (str): Elasticsearch host
             type_of (str): Type of whether create or update
+            batch_size (int): Number of samples preloaded from the DB at a time
+            queue_size (int): Maximum number of items waiting between two pipeline stages
+            checkpoint_file (str | None): State file of the last acknowledged
+                sample_id, written as bulk chunks are confirmed
+            resume (bool): Continue the interrupted run of checkpoint_file after
+                its last acknowledged sample_id
+            stage_joins (bool): Read the data collections of the samples from the
+                JoinStaging shared by the indexers of the run
+            **indexer_options: ElasticSearchIndexer options, e.g. bulk_mode, or the
+                export options of create_indexer
         """
+        if checkpoint_file and indexer_options.get("export_dir"):
+            raise ValueError("Checkpoints cannot be combined with export_dir")
+        if resume and not checkpoint_file:
+            raise ValueError("Resuming needs the checkpoint_file of the interrupted run")
+
         self.config_file = config_file
         self.es_host = es_host
         self.type_of = type_of
+        self.batch_size = batch_size
         self._data = None
         self._fetcher = None
         self._indexer = None
+        self.queue_size = queue_size
+        self.stage_joins = stage_joins
+        self.indexer_options = indexer_options
+        self.checkpoint = (
+            Checkpoint(checkpoint_file, self.checkpoint_params(), resume)
+            if checkpoint_file
+            else None
+        )
+
+    def checkpoint_params(self) -> dict[str, Any]:
+        """Parameters a resumed run must share with the interrupted one
+
+        Returns:
+            dict[str, Any]: The parameters selecting and sending the samples
+        """
+        return {
+            "index": "sample",
+            "config_file": os.path.abspath(self.config_file),
+            "es_host": self.es_host,
+            "type_of": self.type_of,
+            "batch_size": self.batch_size,
+        }
 
     @property
     def data(self):
@@ -45,7 +101,9 @@ class SampleIndexer:
             _type_: self.fetcher
         """
         if self._fetcher is None:
-            self._fetcher = SampleDetailsFetcher(self.data)
+            self._fetcher = SampleDetailsFetcher(
+                self.data, join_reference=True, stage_joins=self.stage_joins
+            )
         return self._fetcher
 
     @property
@@ -56,7 +114,11 @@ class SampleIndexer:
             _type_: self.indexer
         """
         if self._indexer is None:
-            self._indexer = ElasticSearchIndexer(self.es_host, "sample")
+            self._indexer = create_indexer(
+                self.es_host, "sample", **self.indexer_options
+            )
+            if self.checkpoint and self.checkpoint.resumed:
+                self._indexer.overwrite = True
         return self._indexer
     
     def load_json_file(self) -> dict[str, Any]:
@@ -83,34 +145,97 @@ class SampleIndexer:
 
         return sample
 
+    def read_samples(self):
+        """Read samples from the DB in batches, together with their preloaded rows
+
+        Yields:
+            tuple: (row, source_map, population_map, dc_map) for every sample
+        """
+        samples_info = self.fetcher.fetch_samples()
+        if self.checkpoint and self.checkpoint.last_key is not None:
+            # resumed after the last acknowledged sample_id
+            samples_info = [
+                row for row in samples_info if row[0] > self.checkpoint.last_key
+            ]
+
+        for start in range(0, len(samples_info), self.batch_size):
+            batch = samples_info[start : start + self.batch_size]
+            source_map, population_map, dc_map = self.fetcher.preload_data(
+                [row[0] for row in batch]
+            )
+            for row in batch:
+                yield row, source_map, population_map, dc_map
+
+    def build_action(self, item: tuple) -> dict[str, Any]:
+        """Build the bulk action of a sample
+
+        Args:
+            item (tuple): An item from read_samples
+
+        Returns:
+            dict[str, Any]: Bulk action
+        """
+        row, source_map, population_map, dc_map = item
+        code = row[1]
+        samples_data = self.fetcher.build_the_dictionary_structure(
+            row, source_map, population_map, dc_map
+        )
+        action = self.indexer.index_data(samples_data, code, self.type_of)
+        if action is not None and self.checkpoint:
+            self.checkpoint.built(row[0])
+        return action
+
     def generate_actions(self):
         """Generate actions that will be used for bulk index
 
         Yields:
             _type_: A generator
         """
-        samples_info = self.fetcher.fetch_samples()
-
-        for row in samples_info:
-            code = row[1]
-            samples_data = self.fetcher.build_the_dictionary_structure(row)
-            yield self.indexer.index_data(samples_data, code, self.type_of)
+        for item in self.read_samples():
+            action = self.build_action(item)
+            if action is not None:
+                yield action
 
     def build_and_index_sample_info(self):
         """Build and index sample information
 
         Returns:
-            _type_: Bulk actions
+            dict[str, Any] | None: Bulk indexing summary, None when the index was not created
         """
-        actions = self.generate_actions()
+        pipeline = IndexingPipeline(
+            self.read_samples,
+            self.build_action,
+            self.indexer.bulk_index,
+            self.queue_size,
+            name=self.indexer.alias,
+        )
+        load = pipeline.run
+        if self.checkpoint:
+            load = partial(self.checkpoint.run, self.indexer, pipeline.run)
+        # a resumed run continues loading the index of the interrupted one
+        resumed = self.checkpoint is not None and self.checkpoint.resumed
+        result = None
         if self.type_of == "create":
-            if self.create_sample_index() is True:
-                self.indexer.bulk_index(actions)
+            if resumed or self.create_sample_index() is True:
+                result = self.indexer.load_index(load)
                 click.echo("Bulk indexing successful")
+        elif self.type_of == "rebuild":
+            json_data = self.load_json_file()
+            result = self.indexer.rebuild_index(
+                json_data["settings"],
+                json_data["mappings"],
+                load,
+                self.checkpoint.index_name if resumed else None,
+            )
         else:
-            self.indexer.bulk_index(actions)
+            result = load()
             click.echo("Bulk indexing successful")
 
+        if result is not None:
+            pipeline.report()
+            result["pipeline"] = pipeline.stats()
+
+        return result
 
 @click.command()
 @click.option(
@@ -124,10 +249,34 @@ class SampleIndexer:
 @click.option(
     "--type_of", "-t", type=str, help="Update or create an index", required=True
 )
-def create_data(config_file: str, es_host: str, type_of: str):
-    sample_indexer = SampleIndexer(config_file, es_host, type_of)
+@click.option(
+    "--batch_size",
+    "-b",
+    type=int,
+    default=DEFAULT_BATCH_SIZE,
+    show_default=True,
+    help="Number of samples preloaded from the DB at a time",
+)
+@staging_options
+@bulk_options
+@export_options
+@pipeline_options
+@checkpoint_options
+@metrics_options
+def create_data(
+    config_file: str, es_host: str, type_of: str, batch_size: int, **indexer_options
+):
+    sample_indexer = SampleIndexer(
+        config_file, es_host, type_of, batch_size, **indexer_options
+    )
     sample_indexer.build_and_index_sample_info()
 
 
 if __name__ == "__main__":
     create_data()
+
+
+# Enables programmatic use (from main.py)
+def run(config_file, es_host, type_of, **indexer_options):
+    indexer = SampleIndexer(config_file, es_host, type_of, **indexer_options)
+    return indexer.build_and_index_sample_info()
@@ -1,5 +1,6 @@
-from mysql.connector import connect
 from typing import Any
+from index.db_connection import get_connection_provider
+from index.reference_cache import get_reference_data
 
 
 class FetchSPFromDB:
@@ -12,33 +13,28 @@ class FetchSPFromDB:
             data (dict[str, Any]): Takes the configuration data
         """
         self.data = data
+        self.connection_provider = get_connection_provider(data)
 
     def fetch_information_from_db(self) -> list[tuple]:
-        """Fetching superpopulation information from DB
+        """Fetching superpopulation information from the ReferenceData shared by
+        the indexers of the run
 
         Returns:
-            list(tuple) - Returns a list of tuples from the database
+            list(tuple) - Returns a list of (elastic_id, name, display_colour,
+            display_order) tuples, one per superpopulation
         """
 
         # not using code because code is sometimes null
-        select_superpop_sql = """SELECT sp.elastic_id, sp.name, sp.display_colour, sp.display_order from superpopulation sp GROUP BY sp.superpopulation_id"""
-
-        host = self.data["host"]
-        port = self.data["port"]
-        database = self.data["database"]
-        password = self.data["password"]
-        user = self.data["user"]
-
-        db = connect(
-            host=host, port=port, user=user, password=password, database=database
-        )
-        cursor = db.cursor()
-        cursor.execute(select_superpop_sql)
-        superpopulation = cursor.fetchall()
-        cursor.close()
-        db.close()
-
-        return superpopulation
+        reference = get_reference_data(self.data)
+        return [
+            (
+                record["elastic_id"],
+                record["name"],
+                record["display_colour"],
+                record["display_order"],
+            )
+            for record in reference.records["superpopulation"].values()
+        ]
 
     def build_superpopulation_info(self, row: tuple) -> dict[str, Any]:
         """Build superpopulation dictionary
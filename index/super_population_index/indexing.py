@@ -1,9 +1,12 @@
 import click
 import json
 from typing import Any
-from index.elasticsearch_indexer import ElasticSearchIndexer
+from index.elasticsearch_indexer import bulk_options
+from index.bulk_export import create_indexer, export_options
+from index.metrics import metrics_options
 from .fetch_information_from_db import FetchSPFromDB
 from index.config_read import read_from_config_file
+from index.pipeline import IndexingPipeline, DEFAULT_QUEUE_SIZE, pipeline_options
 
 json_file = "index/super_population_index/superpopulations_mappings.json"
 
@@ -11,19 +14,32 @@ json_file = "index/super_population_index/superpopulations_mappings.json"
 class SuperPopulationIndexer:
     """Class for the Superpopulation Indexer"""
 
-    def __init__(self, config_file: str, es_host: str, type_of: str):
+    def __init__(
+        self,
+        config_file: str,
+        es_host: str,
+        type_of: str,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        **indexer_options,
+    ):
         """Initializes the Superpopulation Indexer class
 
         Args:
             config_file (str): Configuration file
             es_host (str): ElasticSearch Host
             type_of (str): _description_
+            queue_size (int): Maximum number of items waiting between two pipeline stages
+            **indexer_options: ElasticSearchIndexer options, e.g. bulk_mode, or the
+                export options of create_indexer
         """
 
         self.type_of = type_of
+        self.queue_size = queue_size
         self.data = read_from_config_file(config_file)
         self.fetcher = FetchSPFromDB(self.data)
-        self.indexer = ElasticSearchIndexer(es_host, "superpopulation")
+        self.indexer = create_indexer(
+            es_host, "superpopulation", **indexer_options
+        )
 
     def load_json_file(self) -> dict[str, Any]:
         """Loading Json file to get the settings and the mappings
@@ -50,24 +66,51 @@ class SuperPopulationIndexer:
 
         return superpopulation
 
+    def build_action(self, row: tuple) -> dict[str, Any]:
+        """Build the bulk action of a superpopulation
+
+        Args:
+            row (tuple): A row from fetch_information_from_db
+
+        Returns:
+            dict[str, Any]: Bulk action
+        """
+        elasticId = row[0]
+        super_pop_data = self.fetcher.build_superpopulation_info(row)
+        return self.indexer.index_data(super_pop_data, elasticId, self.type_of)
+
     def build_and_index_superpopulation(self):
-        """Builds and indexes the superpopulation index"""
-        actions = []
-        superpopulation = self.fetcher.fetch_information_from_db()
-        for row in superpopulation:
-            elasticId = row[0]
-            super_pop_data = self.fetcher.build_superpopulation_info(row)
-            action = self.indexer.index_data(super_pop_data, elasticId, self.type_of)
-            actions.append(action)
+        """Builds and indexes the superpopulation index
 
+        Returns:
+            dict[str, Any] | None: Bulk indexing summary, None when the index was not created
+        """
+        pipeline = IndexingPipeline(
+            self.fetcher.fetch_information_from_db,
+            self.build_action,
+            self.indexer.bulk_index,
+            self.queue_size,
+            name=self.indexer.alias,
+        )
+        result = None
         if self.type_of == "create":
             if self.create_superpopulation_index() is True:
-                self.indexer.bulk_index(actions)
+                result = self.indexer.load_index(pipeline.run)
                 click.echo("Index built successfully")
+        elif self.type_of == "rebuild":
+            json_data = self.load_json_file()
+            result = self.indexer.rebuild_index(
+                json_data["settings"], json_data["mappings"], pipeline.run
+            )
         else:
-            self.indexer.bulk_index(actions)
+            result = pipeline.run()
             click.echo("Index built successfully")
 
+        if result is not None:
+            pipeline.report()
+            result["pipeline"] = pipeline.stats()
+
+        return result
 
 @click.command()
 @click.option(
@@ -81,10 +124,22 @@ class SuperPopulationIndexer:
 @click.option(
     "--type_of", "-t", type=str, help="Update or create an index", required=True
 )
-def create_data(config_file: str, es_host: str, type_of: str):
-    superpop_indexer = SuperPopulationIndexer(config_file, es_host, type_of)
+@bulk_options
+@export_options
+@pipeline_options
+@metrics_options
+def create_data(config_file: str, es_host: str, type_of: str, **indexer_options):
+    superpop_indexer = SuperPopulationIndexer(
+        config_file, es_host, type_of, **indexer_options
+    )
     superpop_indexer.build_and_index_superpopulation()
 
 
 if __name__ == "__main__":
     create_data()
+
+
+# Enables programmatic use (from main.py)
+def run(config_file, es_host, type_of, **indexer_options):
+    indexer = SuperPopulationIndexer(config_file, es_host, type_of, **indexer_options)
+    return indexer.build_and_index_superpopulation()
@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import MagicMock, patch
 from typing import Any
 from index.analysis_group_index.fetch_ag_from_db import FetchAGFromDB
+from index.reference_cache import ReferenceData
 
 
 @pytest.fixture
@@ -41,15 +42,33 @@ def test_fetch_information_from_db(mocker, fetcher: FetchAGFromDB):
         mocker (MockerFixture): Mocker for the DB
         fetcher (FetchAGFromDB): FetchAGFromDB class
     """    
+    columns = [
+        "analysis_group_id", "code", "description", "short_title", "display_order",
+        "website",
+    ]
+    reference = ReferenceData(
+        {"analysis_group": columns},
+        {
+            "analysis_group": [
+                (1, "test_exome", "Test exome", "test-exome", 2, None),
+                (2, "unused", "No sample files", "unused", 3, None),
+            ]
+        },
+    )
+    mocker.patch(
+        "index.analysis_group_index.fetch_ag_from_db.get_reference_data",
+        return_value=reference,
+    )
     mock_cursor = MagicMock()
-    mock_cursor.fetchall.return_value = [(1, "test_exome", "Test exome", "test-exome", 2, None)]
+    mock_cursor.fetchall.return_value = [(1,)]
     mock_db = MagicMock()
     mock_db.cursor.return_value = mock_cursor
-    mocker.patch(
-        "index.analysis_group_index.fetch_ag_from_db.connect", return_value=mock_db
+    mocker.patch.object(
+        fetcher.connection_provider, "get_connection", return_value=mock_db
     )
 
     result = fetcher.fetch_information_from_DB()
+    assert len(result) == 1
     assert result[0][1] == "test_exome"
 
 def test_build_ag_info(fetcher: FetchAGFromDB):
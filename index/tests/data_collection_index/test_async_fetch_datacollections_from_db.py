@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+from index.data_collection_index.async_fetch_information_from_db import (
+    AsyncDCDetailsFetcher,
+)
+from index.data_collection_index.fetch_information_from_db import (
+    SELECT_SAMPLES_COUNT_SQL,
+    SELECT_POPULATION_COUNT_SQL,
+    PUBLICATION_INFO_SQL,
+    ANALYSIS_INFO_SQL,
+    PRELOAD_SAMPLES_COUNT_SQL,
+    PRELOAD_POPULATION_COUNT_SQL,
+    PRELOAD_PUBLICATION_SQL,
+    PRELOAD_ANALYSIS_SQL,
+)
+from typing import Any
+from pytest_mock import MockerFixture
+
+
+@pytest.fixture
+def fetcher() -> AsyncDCDetailsFetcher:
+    """Fixture for Fetcher
+
+    Returns:
+        AsyncDCDetailsFetcher: AsyncDCDetailsFetcher class
+    """
+    return AsyncDCDetailsFetcher(
+        {
+            "host": "localhost",
+            "port": 3306,
+            "user": "user",
+            "password": "pass",
+            "database": "test_db",
+        }
+    )
+
+
+def test_populate_the_dictionary_structure(
+    mocker: MockerFixture, fetcher: AsyncDCDetailsFetcher
+):
+    """Test For AsyncDCDetailsFetcher - populate_the_dictionary_structure builds the
+    same document as the sync fetcher
+
+    Args:
+        mocker (MockerFixture): MockerFixture
+        fetcher (AsyncDCDetailsFetcher): AsyncDCDetailsFetcher
+    """
+    rows = {
+        SELECT_SAMPLES_COUNT_SQL: [(10,)],
+        SELECT_POPULATION_COUNT_SQL: [(2,)],
+        PUBLICATION_INFO_SQL: [(1, "http://pub", 1, "Publication")],
+        ANALYSIS_INFO_SQL: [("alignment", "Low coverage"), ("sequence", "Exome")],
+    }
+    queries = []
+
+    async def fetchall(sql: str, params: tuple = ()) -> list[tuple]:
+        queries.append((sql, params))
+        return rows[sql]
+
+    mocker.patch.object(fetcher.async_provider, "fetchall", side_effect=fetchall)
+    row = (1, "test-dc", "Test datacollections", "test-c", 1, "policy", None, "site")
+
+    dc_data: dict[str, Any] = asyncio.run(
+        fetcher.populate_the_dictionary_structure(row)
+    )
+
+    assert len(queries) == 4
+    assert all(params == (1,) for _, params in queries)
+    assert dc_data == fetcher.build_the_dictionary_structure(
+        row,
+        10,
+        2,
+        rows[PUBLICATION_INFO_SQL],
+        rows[ANALYSIS_INFO_SQL],
+    )
+    assert dc_data["samples"] == {"count": 10}
+    assert dc_data["dataTypes"] == ["alignment", "sequence"]
+
+
+def test_preload_data(mocker: MockerFixture, fetcher: AsyncDCDetailsFetcher):
+    """Test For AsyncDCDetailsFetcher - preload_data runs the four grouped queries
+    once, the documents are then built without any query
+
+    Args:
+        mocker (MockerFixture): MockerFixture
+        fetcher (AsyncDCDetailsFetcher): AsyncDCDetailsFetcher
+    """
+    rows = {
+        PRELOAD_SAMPLES_COUNT_SQL: [(1, 10), (2, 3)],
+        PRELOAD_POPULATION_COUNT_SQL: [(1, 2)],
+        PRELOAD_PUBLICATION_SQL: [(1, 1, "http://pub", 1, "Publication")],
+        PRELOAD_ANALYSIS_SQL: [(1, "alignment", "Low coverage"), (2, "sequence", "Exome")],
+    }
+    queries = []
+
+    async def fetchall(sql: str, params: tuple = ()) -> list[tuple]:
+        queries.append((sql, params))
+        return rows[sql]
+
+    mocker.patch.object(fetcher.async_provider, "fetchall", side_effect=fetchall)
+    row = (1, "test-dc", "Test datacollections", "test-c", 1, "policy", None, "site")
+
+    async def populate() -> dict[str, Any]:
+        preloaded = await fetcher.preload_data()
+        return await fetcher.populate_the_dictionary_structure(row, preloaded)
+
+    dc_data: dict[str, Any] = asyncio.run(populate())
+
+    assert sorted(sql for sql, _ in queries) == sorted(rows)
+    assert dc_data == fetcher.build_the_dictionary_structure(
+        row, 10, 2, [(1, "http://pub", 1, "Publication")], [("alignment", "Low coverage")]
+    )
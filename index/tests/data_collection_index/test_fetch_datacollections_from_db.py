@@ -55,7 +55,9 @@ def test_fetch_datacollections(mocker: MockerFixture, fetcher: DCDetailsFetcher)
 
     mock_db = MagicMock()
     mock_db.cursor.return_value = mock_cursor
-    mocker.patch("index.data_collection_index.fetch_information_from_db.connect", return_value=mock_db)
+    mocker.patch.object(
+        fetcher.connection_provider, "get_connection", return_value=mock_db
+    )
 
 
     result = fetcher.fetch_datacollections()
@@ -77,7 +79,9 @@ def test_fetch_publication_info(mocker: MockerFixture, fetcher:DCDetailsFetcher)
 
     mock_db = MagicMock()
     mock_db.cursor.return_value = mock_cursor
-    mocker.patch("index.data_collection_index.fetch_information_from_db.connect", return_value=mock_db)
+    mocker.patch.object(
+        fetcher.connection_provider, "get_connection", return_value=mock_db
+    )
 
     result = fetcher.fetch_publication_info(1)
     assert result[0][1] == "http://testdc"
@@ -100,7 +104,9 @@ def test_fetch_analysis_information(mocker: MockerFixture, fetcher:DCDetailsFetc
 
     mock_db = MagicMock()
     mock_db.cursor.return_value = mock_cursor
-    mocker.patch("index.data_collection_index.fetch_information_from_db.connect", return_value=mock_db)
+    mocker.patch.object(
+        fetcher.connection_provider, "get_connection", return_value=mock_db
+    )
 
     result = fetcher.fetch_analysis_information(1)
     assert isinstance(result, list) 
@@ -141,3 +147,41 @@ def test_populate_the_dictionary_structure(mocker: MockerFixture, fetcher: DCDet
     assert result["samples"]["count"] == 2
     assert result["populations"]["count"] == 1
     assert result["publications"][0]["url"] == "http://pub1"
+
+
+def test_preload_data(mocker: MockerFixture, fetcher: DCDetailsFetcher):
+    """Test for DCDetailsFetcher - preload_data and populating from the preloaded maps
+
+    Args:
+        mocker (MockerFixture): MockerFixture
+        fetcher (DCDetailsFetcher): DCDetailsFetcher
+    """
+    mock_cursor = MagicMock()
+    mock_cursor.fetchall.side_effect = [
+        [(1, 2), (2, 5)],
+        [(1, 1)],
+        [(1, 10, "http://pub1", 1, "Publication One")],
+        [(1, "WGS", "Variant Calling"), (2, "sequence", "Exome")],
+    ]
+
+    mock_db = MagicMock()
+    mock_db.cursor.return_value = mock_cursor
+    mocker.patch.object(
+        fetcher.connection_provider, "get_connection", return_value=mock_db
+    )
+
+    preloaded = fetcher.preload_data()
+    assert mock_cursor.execute.call_count == 4
+
+    row = (1, "test-dc", "Test datacollections", "test-c", 1, None, None, None)
+    result = fetcher.populate_the_dictionary_structure(row, preloaded)
+    assert result["samples"]["count"] == 2
+    assert result["populations"]["count"] == 1
+    assert result["publications"][0]["url"] == "http://pub1"
+    assert result["WGS"] == ["Variant Calling"]
+
+    other = fetcher.populate_the_dictionary_structure((2,) + row[1:], preloaded)
+    assert other["samples"]["count"] == 5
+    assert other["populations"]["count"] == 0
+    assert other["publications"] == []
+    assert other["dataTypes"] == ["sequence"]
@@ -0,0 +1,270 @@
+from collections import defaultdict
+import pytest
+from unittest.mock import MagicMock
+from index.file_index.fetch_information_from_db import FetchFileFromDB
+from index.reference_cache import ReferenceData
+from typing import Any
+from pytest_mock import MockerFixture
+
+
+@pytest.fixture
+def db_config() -> dict[str, Any]:
+    """DB configuration
+
+    Returns:
+        dict: Dictionary containing the test db configuration
+    """
+    return {
+        "host": "localhost",
+        "port": 3306,
+        "user": "user",
+        "password": "pass",
+        "database": "test_db",
+    }
+
+
+@pytest.fixture
+def fetcher(db_config: dict[str, Any]) -> FetchFileFromDB:
+    """The fetcher fixture
+
+    Args:
+        db_config (dict): DB configuration
+
+    Returns:
+        FetchFileFromDB: A class
+    """
+    return FetchFileFromDB(db_config)
+
+
+def test_stream_files_from_db(mocker: MockerFixture, fetcher: FetchFileFromDB):
+    """Test for FetchFileFromDB: stream_files_from_db
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        fetcher (FetchFileFromDB): FetchFileFromDB class
+    """
+    mock_cursor = MagicMock()
+    mock_cursor.fetchmany.side_effect = [
+        [(1, "ftp://file1", "md5", "sequence", "Exome")],
+        [(2, "ftp://file2", "md5", "alignment", "Exome")],
+        [],
+    ]
+    mock_db = MagicMock()
+    mock_db.cursor.return_value = mock_cursor
+    mocker.patch.object(
+        fetcher.connection_provider, "get_connection", return_value=mock_db
+    )
+
+    windows = list(fetcher.stream_files_from_db(batch_size=1))
+    assert [window[0][0] for window in windows] == [1, 2]
+    mock_cursor.fetchmany.assert_called_with(1)
+    mock_db.consume_results.assert_not_called()
+    mock_db.close.assert_called_once()
+
+
+def test_stream_files_from_db_stopped_early(
+    mocker: MockerFixture, fetcher: FetchFileFromDB
+):
+    """Test for FetchFileFromDB: stream_files_from_db when the consumer stops early
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        fetcher (FetchFileFromDB): FetchFileFromDB class
+    """
+    mock_cursor = MagicMock()
+    mock_cursor.fetchmany.return_value = [(1, "ftp://file1", "md5", "sequence", "Exome")]
+    mock_db = MagicMock()
+    mock_db.cursor.return_value = mock_cursor
+    mocker.patch.object(
+        fetcher.connection_provider, "get_connection", return_value=mock_db
+    )
+
+    windows = fetcher.stream_files_from_db(batch_size=1)
+    next(windows)
+    windows.close()
+    mock_db.consume_results.assert_called_once()
+    mock_db.close.assert_called_once()
+
+
+def test_populate_the_dictionary(fetcher: FetchFileFromDB):
+    """Test for FetchFileFromDB: populate_the_dictionary
+
+    Args:
+        fetcher (FetchFileFromDB): FetchFileFromDB class
+    """
+    dc_map = {1: [("1000 Genomes on GRCh38", "open")]}
+    sp_map = {1: [("HG00096", "British"), ("HG00097", "British")]}
+
+    result = fetcher.populate_the_dictionary(
+        (1, "ftp://file1", "md5", "sequence", "Exome"), dc_map, sp_map
+    )
+    assert result["dataCollections"] == ["1000 Genomes on GRCh38"]
+    assert result["dataReusePolicy"] == "open"
+    assert result["samples"] == ["HG00096", "HG00097"]
+    assert result["url"] == "ftp://file1"
+
+
+def test_file_id_ranges(fetcher: FetchFileFromDB):
+    """Test for FetchFileFromDB: file_id_ranges
+
+    Args:
+        fetcher (FetchFileFromDB): FetchFileFromDB class
+    """
+    assert fetcher.file_id_ranges([7, 1, 2, 3, 250, 251], range_size=10) == [
+        (1, 7),
+        (250, 251),
+    ]
+    assert fetcher.file_id_ranges([]) == []
+
+
+def test_partition_file_ids(fetcher: FetchFileFromDB):
+    """Test for FetchFileFromDB: partition_file_ids and the range of files_sql
+
+    Args:
+        fetcher (FetchFileFromDB): FetchFileFromDB class
+    """
+    assert fetcher.partition_file_ids([9, 1, 2, 3, 500, 501, 502], 3) == [
+        (1, 3),
+        (9, 500),
+        (501, 502),
+    ]
+    assert fetcher.partition_file_ids([4], 3) == [(4, 4)]
+    assert fetcher.partition_file_ids([], 3) == []
+    assert "WHERE f.file_id BETWEEN %s AND %s" in fetcher.files_sql(id_range=(1, 3))
+    assert "AND f.file_id BETWEEN %s AND %s" in fetcher.files_sql(True, (1, 3))
+
+
+@pytest.mark.parametrize("strategy", ["in", "range", "temp_table"])
+def test_preload_data(mocker: MockerFixture, fetcher: FetchFileFromDB, strategy: str):
+    """Test for FetchFileFromDB: preload_data returns the same maps for every strategy
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        fetcher (FetchFileFromDB): FetchFileFromDB class
+        strategy (str): Preload strategy
+    """
+    mock_cursor = MagicMock()
+    mock_cursor.fetchall.side_effect = [
+        [(1, "1000 Genomes on GRCh38", "open"), (3, "1000 Genomes on GRCh38", "open")],
+        [(1, "HG00096", "British"), (3, "HG00097", "British")],
+    ]
+    mock_db = MagicMock()
+    mock_db.cursor.return_value = mock_cursor
+    mocker.patch.object(
+        fetcher.connection_provider, "get_connection", return_value=mock_db
+    )
+
+    dc_map, sp_map = fetcher.preload_data([1, 2], strategy)
+    if strategy == "range":
+        # file 3 is inside the BETWEEN window but was not asked for
+        assert 3 not in dc_map and 3 not in sp_map
+    assert dc_map[1] == [("1000 Genomes on GRCh38", "open")]
+    assert sp_map[1] == [("HG00096", "British")]
+
+
+@pytest.mark.parametrize("strategy", ["in", "range"])
+def test_preload_data_concurrently(
+    mocker: MockerFixture, fetcher: FetchFileFromDB, strategy: str
+):
+    """Test for FetchFileFromDB: preload_data runs the queries on their own
+    connections and keeps the rows in window order
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        fetcher (FetchFileFromDB): FetchFileFromDB class
+        strategy (str): Preload strategy
+    """
+
+    def fetchall(sql, params):
+        file_id = params[0]
+        if "dc.title" in sql:
+            return [(file_id, f"collection {file_id}", "open")]
+        return [(file_id, f"HG{file_id}", "British")]
+
+    mock_fetchall = mocker.patch.object(
+        fetcher.connection_provider, "fetchall", side_effect=fetchall
+    )
+
+    dc_map, sp_map = fetcher.preload_data(
+        [1, 2, 7], strategy, range_size=5, concurrency=None
+    )
+    assert mock_fetchall.call_count == (2 if strategy == "in" else 4)
+    assert dc_map[1] == [("collection 1", "open")]
+    assert sp_map.get(7, []) == ([] if strategy == "in" else [("HG7", "British")])
+
+
+def test_preload_data_unsupported_strategy(fetcher: FetchFileFromDB):
+    """Test for FetchFileFromDB: preload_data with an unknown strategy
+
+    Args:
+        fetcher (FetchFileFromDB): FetchFileFromDB class
+    """
+    with pytest.raises(ValueError):
+        fetcher.preload_data([1], "join")
+
+
+def test_fetch_new_files_from_db(mocker: MockerFixture, fetcher: FetchFileFromDB):
+    """Test for FetchFileFromDB: fetch_new_files_from_db
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        fetcher (FetchFileFromDB): FetchFileFromDB class
+    """
+    mock_cursor = MagicMock()
+    mock_cursor.fetchall.return_value = [(3, "ftp://file3", "md5", "sequence", "Exome")]
+    mock_db = MagicMock()
+    mock_db.cursor.return_value = mock_cursor
+    mocker.patch.object(
+        fetcher.connection_provider, "get_connection", return_value=mock_db
+    )
+
+    files = fetcher.fetch_new_files_from_db()
+    assert files[0][0] == 3
+    assert "indexed_in_elasticsearch IS NOT TRUE" in mock_cursor.execute.call_args[0][0]
+
+
+def test_join_reference(mocker: MockerFixture, db_config: dict[str, Any]):
+    """Test for FetchFileFromDB: reference ids resolved against ReferenceData
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        db_config (dict[str, Any]): DB configuration
+    """
+    reference = ReferenceData(
+        {
+            "data_type": ["data_type_id", "code"],
+            "analysis_group": ["analysis_group_id", "description"],
+            "data_collection": [
+                "data_collection_id",
+                "title",
+                "reuse_policy",
+                "reuse_policy_precedence",
+            ],
+            "population": ["population_id", "description"],
+        },
+        {
+            "data_type": [(1, "alignment")],
+            "analysis_group": [(3, "Exome")],
+            "data_collection": [(5, "Phase 3", "open", 2), (6, "Pilot", "fort", 1)],
+            "population": [(7, "British"), (8, "Finnish")],
+        },
+    )
+    mocker.patch(
+        "index.file_index.fetch_information_from_db.get_reference_data",
+        return_value=reference,
+    )
+    fetcher = FetchFileFromDB(db_config, join_reference=True)
+
+    rows = fetcher.resolve_file_rows([(10, "url", "md5", 1, None)])
+    assert rows == [(10, "url", "md5", "alignment", None)]
+
+    dc_map = defaultdict(list)
+    sp_map = defaultdict(list)
+    fetcher.add_preload_rows(
+        [(10, 5), (10, 6), (10, 99)],
+        [(10, "HG00096", 7), (10, "HG00096", 7), (10, "HG00097", 8)],
+        dc_map,
+        sp_map,
+    )
+    assert dc_map[10] == [("Pilot", "fort"), ("Phase 3", "open")]
+    assert sp_map[10] == [("HG00096", "British"), ("HG00097", "Finnish")]
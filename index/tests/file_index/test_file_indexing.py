@@ -0,0 +1,121 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from index.file_index.async_indexing import AsyncFileIndexer
+from index.file_index.indexing import FileIndexer
+from index.metrics import MetricsRegistry
+from pytest_mock import MockerFixture
+
+
+def test_index_partitions(mocker: MockerFixture):
+    """Test for FileIndexer: index_partitions sums the summaries of the workers
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+    """
+    mocker.patch(
+        "index.file_index.indexing.ProcessPoolExecutor",
+        side_effect=lambda max_workers, mp_context: ThreadPoolExecutor(max_workers),
+    )
+    worker_metrics = MetricsRegistry()
+    worker_metrics.enable()
+    worker_metrics.inc("es_py_documents_built_total", 2, index="file")
+
+    def index_partition(
+        config_file, es_host, type_of, id_range, index_name, metrics, options
+    ):
+        assert (index_name, metrics, options["batch_size"]) == ("file_1", True, 10)
+        failed = id_range[0] == 3
+        return {
+            "success": 1 if failed else 2,
+            "failed": int(failed),
+            "errors": [{"create": {"_id": 4, "status": 400}}] if failed else [],
+            "chunks": [{"success": 2 - failed, "failed": int(failed)}],
+            "id_range": id_range,
+            "pipeline": {
+                "elapsed": 1.0,
+                "stages": {"read": {"count": 2, "busy": 0.5, "rate": 2.0}},
+            },
+            "metrics": worker_metrics.state(),
+        }
+
+    mocker.patch("index.file_index.indexing.index_partition", side_effect=index_partition)
+    registry = mocker.patch("index.file_index.indexing.get_metrics").return_value
+    registry.enabled = True
+
+    file_indexer = FileIndexer(
+        "config.ini", "http://localhost:9200", "update", batch_size=10, partitions=2
+    )
+    file_indexer._fetcher = mocker.Mock()
+    file_indexer._fetcher.fetch_file_id_from_db.return_value = [1, 2, 3, 4]
+    file_indexer._fetcher.partition_file_ids.return_value = [(1, 2), (3, 4)]
+    file_indexer._indexer = mocker.Mock(index_name="file_1")
+
+    summary = file_indexer.index_partitions()
+
+    file_indexer._fetcher.partition_file_ids.assert_called_once_with([1, 2, 3, 4], 2)
+    assert (summary["success"], summary["failed"]) == (3, 1)
+    assert len(summary["chunks"]) == 2
+    assert [p["id_range"] for p in summary["partitions"]] == [(1, 2), (3, 4)]
+    assert summary["pipeline"]["stages"]["read"]["count"] == 4
+    assert registry.merge.call_count == 2
+    file_indexer._indexer.finish_load.assert_called_once()
+
+
+def test_index_incremental(mocker: MockerFixture):
+    """Test for FileIndexer: an incremental run only flags the files Elasticsearch
+    acknowledged, the failed file is left for the next run
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+    """
+
+    def bulk(client, actions, **kwargs):
+        for action in actions:
+            ok = action["_id"] != 2
+            status = 200 if ok else 400
+            yield ok, {action["_op_type"]: {"_id": str(action["_id"]), "status": status}}
+
+    mocker.patch("index.elasticsearch_indexer.streaming_bulk", side_effect=bulk)
+    file_indexer = FileIndexer(
+        "config.ini", "http://localhost:9200", "update", incremental=True
+    )
+    file_indexer._fetcher = mocker.Mock()
+    file_indexer._fetcher.fetch_new_files_from_db.return_value = [(1, "a"), (2, "b")]
+    file_indexer._fetcher.preload_data.return_value = ({}, {})
+    file_indexer._fetcher.populate_the_dictionary.return_value = {}
+    file_indexer._fetcher.fetch_old_files_from_db.return_value = [(7,)]
+
+    result = file_indexer.build_and_index_file_info()
+
+    assert (result["success"], result["failed"]) == (1, 1)
+    assert result["deleted"]["success"] == 1
+    file_indexer._fetcher.update_elasticsearch_file.assert_called_once_with([1, 7])
+    assert file_indexer.indexer.acknowledged is None
+
+
+def test_incremental_export_rejected(tmp_path):
+    """Test for FileIndexer: an incremental run cannot write to an export, it would
+    flag files which never reached Elasticsearch
+
+    Args:
+        tmp_path: Temporary directory from pytest
+    """
+    with pytest.raises(ValueError):
+        FileIndexer(
+            "config.ini",
+            "http://localhost:9200",
+            "update",
+            incremental=True,
+            export_dir=str(tmp_path),
+        )
+
+
+def test_async_indexer_options():
+    """Test for AsyncFileIndexer: queue_size reaches the queue and the async
+    indexer, not the preload concurrency of FileIndexer
+    """
+    file_indexer = AsyncFileIndexer(
+        "config.ini", "http://localhost:9200", "update", queue_size=7
+    )
+    assert (file_indexer.queue_size, file_indexer.preload_concurrency) == (7, None)
+    assert file_indexer.indexer.queue_size == 7
@@ -0,0 +1,38 @@
+from collections import defaultdict
+from index.file_index.preload_map import PreloadMap, extend_map
+
+
+def test_preload_map_lookup():
+    """Test for PreloadMap: the rows of a file keep their order, whatever the order
+    of the file ids and the number of seals"""
+    preload_map = PreloadMap(2)
+    preload_map.extend(
+        [(3, "HG00097", "Finnish"), (1, "HG00096", "British"), (3, "HG00096", None)]
+    )
+    assert preload_map[3] == [("HG00097", "Finnish"), ("HG00096", None)]
+
+    preload_map.extend([(2, "HG00098", "British"), (3, "HG00099", "British")])
+    assert preload_map.get(3) == [
+        ("HG00097", "Finnish"),
+        ("HG00096", None),
+        ("HG00099", "British"),
+    ]
+    assert preload_map.get(1) == [("HG00096", "British")]
+    assert preload_map.get(4, []) == []
+    assert 4 not in preload_map and 2 in preload_map
+    assert list(preload_map) == [1, 2, 3] and len(preload_map) == 3
+    # every distinct value is stored once
+    assert preload_map.tables[0].values == ["HG00097", "HG00096", "HG00098", "HG00099"]
+    assert len(preload_map.tables[1]) == 3
+    assert preload_map.nbytes() == 3 * 8 + 4 * 4 + 2 * 5 * 4
+
+
+def test_extend_map_defaultdict():
+    """Test for extend_map: a defaultdict(list) gets the same rows as a PreloadMap"""
+    rows = [(1, "Phase 3", "open"), (2, "Pilot", None), (1, "Pilot", "fort")]
+    sp_map = defaultdict(list)
+    preload_map = PreloadMap(2)
+    extend_map(sp_map, rows)
+    extend_map(preload_map, rows)
+
+    assert dict(preload_map) == dict(sp_map)
@@ -0,0 +1,109 @@
+import pytest
+from unittest.mock import MagicMock
+from index.population_index.fetch_information_from_db import PopulationDetailsFetcher
+from typing import Any
+from pytest_mock import MockerFixture
+
+
+@pytest.fixture
+def fetcher() -> PopulationDetailsFetcher:
+    """The fetcher fixture
+
+    Returns:
+        PopulationDetailsFetcher: A class
+    """
+    return PopulationDetailsFetcher(
+        {
+            "host": "localhost",
+            "port": 3306,
+            "user": "user",
+            "password": "pass",
+            "database": "test_db",
+        }
+    )
+
+
+@pytest.fixture
+def population_samples() -> dict[int, set[int]]:
+    """Sample ids keyed by population id
+
+    Returns:
+        dict[int, set[int]]: Population 1 shares samples with 2 and 3
+    """
+    return {1: {10, 11, 12}, 2: {11, 12, 13}, 3: {12}, 4: {14}}
+
+
+def test_shared_samples(population_samples: dict[int, set[int]]):
+    """Test for PopulationDetailsFetcher: shared_samples
+
+    Args:
+        population_samples (dict[int, set[int]]): Sample ids keyed by population id
+    """
+    shared = PopulationDetailsFetcher.shared_samples([1, 2, 4], population_samples)
+
+    assert shared[1] == {2: {11, 12}, 3: {12}}
+    assert shared[2] == {1: {11, 12}, 3: {12}}
+    assert 4 not in shared
+
+
+def test_compute_overlap_population_details(
+    mocker: MockerFixture,
+    fetcher: PopulationDetailsFetcher,
+    population_samples: dict[int, set[int]],
+):
+    """Test for PopulationDetailsFetcher: compute_overlap_population_details returns
+    the rows of the self join, in the same order
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        fetcher (PopulationDetailsFetcher): PopulationDetailsFetcher class
+        population_samples (dict[int, set[int]]): Sample ids keyed by population id
+    """
+    mock_cursor = MagicMock()
+    mock_cursor.fetchall.side_effect = [
+        [(1, "GBR", "British"), (2, "fin", "finnish"), (3, "CEU", "Utah")],
+        [(10, "HG01"), (11, "hg02"), (12, "HG03"), (13, "HG04")],
+    ]
+    mock_db = MagicMock()
+    mock_db.cursor.return_value = mock_cursor
+    mocker.patch.object(
+        fetcher.connection_provider, "get_connection", return_value=mock_db
+    )
+
+    overlap_map = fetcher.compute_overlap_population_details([1], population_samples)
+
+    assert overlap_map[1] == [
+        (1, "fin", "finnish", "hg02"),
+        (1, "fin", "finnish", "HG03"),
+        (1, "CEU", "Utah", "HG03"),
+    ]
+
+
+def test_fetch_population_with_counts(
+    mocker: MockerFixture,
+    fetcher: PopulationDetailsFetcher,
+    population_samples: dict[int, set[int]],
+):
+    """Test for PopulationDetailsFetcher: fetch_population_with_counts
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        fetcher (PopulationDetailsFetcher): PopulationDetailsFetcher class
+        population_samples (dict[int, set[int]]): Sample ids keyed by population id
+    """
+    population: tuple[Any, ...] = ("GBR", "British", "desc", 1.0, 2.0, "GBR", 1)
+    superpopulation = ("EUR", "European", "blue", 2)
+    mock_cursor = MagicMock()
+    mock_cursor.fetchall.return_value = [
+        population + superpopulation + (1,),
+        population + superpopulation + (9,),
+    ]
+    mock_db = MagicMock()
+    mock_db.cursor.return_value = mock_cursor
+    mocker.patch.object(
+        fetcher.connection_provider, "get_connection", return_value=mock_db
+    )
+
+    rows = fetcher.fetch_population_with_counts(population_samples)
+
+    assert rows == [population + (3,) + superpopulation + (1,)]
@@ -45,8 +45,8 @@ def test_fetch_samples(mocker: MockerFixture, fetcher: SampleDetailsFetcher):
     mock_cursor.fetchall.return_value = [(1, "Sample1", "TEST123", "M")]
     mock_db = MagicMock()
     mock_db.cursor.return_value = mock_cursor
-    mocker.patch(
-        "index.sample_index.fetch_samples_from_db.connect", return_value=mock_db
+    mocker.patch.object(
+        fetcher.connection_provider, "get_connection", return_value=mock_db
     )
 
     result = fetcher.fetch_samples()
@@ -67,8 +67,8 @@ def test_fetch_source_samples(mocker, fetcher):
     ]
     mock_db = MagicMock()
     mock_db.cursor.return_value = mock_cursor
-    mocker.patch(
-        "index.sample_index.fetch_samples_from_db.connect", return_value=mock_db
+    mocker.patch.object(
+        fetcher.connection_provider, "get_connection", return_value=mock_db
     )
 
     result = fetcher.fetch_source_samples(1)
@@ -105,8 +105,8 @@ def test_fetch_population_samples(mocker, fetcher):
 
     mock_db = MagicMock()
     mock_db.cursor.return_value = mock_cursor
-    mocker.patch(
-        "index.sample_index.fetch_samples_from_db.connect", return_value=mock_db
+    mocker.patch.object(
+        fetcher.connection_provider, "get_connection", return_value=mock_db
     )
 
     result = fetcher.fetch_population_samples(1)
@@ -128,11 +128,67 @@ def test_fetch_dataCollections_samples(mocker, fetcher):
 
     mock_db = MagicMock()
     mock_db.cursor.return_value = mock_cursor
-    mocker.patch(
-        "index.sample_index.fetch_samples_from_db.connect", return_value=mock_db
+    mocker.patch.object(
+        fetcher.connection_provider, "get_connection", return_value=mock_db
     )
     result = fetcher.fetch_dataCollections_samples(1)
 
     assert result[0][0] == "test_igsr"
     assert result[0][4] == None
 
+
+
+def test_preload_data(mocker: MockerFixture, fetcher: SampleDetailsFetcher):
+    """Test for SampleDetailsFetcher: preload_data
+
+    Args:
+        mocker (MockerFixture):  Mocker from the Pytest_mock:MockerFixture
+        fetcher (SampleDetailsFetcher): SampleDetailsFetcher class
+    """
+    mock_cursor = MagicMock()
+    mock_cursor.fetchall.side_effect = [
+        [(1, 1, "test_source", "test source description", "http:/test_source_url")],
+        [(1, 1, "GBR", "Great Britian", "Britain", None, None, "GBR", 2, "EUR", "European", None, 1)],
+        [
+            (1, "sequence", "Exome", "test igsr", 1, None),
+            (2, "alignment", "Exome", "test igsr", 1, None),
+        ],
+    ]
+    mock_db = MagicMock()
+    mock_db.cursor.return_value = mock_cursor
+    mocker.patch.object(
+        fetcher.connection_provider, "get_connection", return_value=mock_db
+    )
+
+    source_map, population_map, dc_map = fetcher.preload_data([1, 2])
+    assert source_map[1][0][1] == "test_source"
+    assert population_map[1][0][1] == "GBR"
+    assert dc_map[2] == [("alignment", "Exome", "test igsr", 1, None)]
+    assert mock_cursor.execute.call_count == 3
+
+
+def test_build_the_dictionary_structure_with_preloaded_maps(
+    mocker: MockerFixture, fetcher: SampleDetailsFetcher
+):
+    """Test for SampleDetailsFetcher: build_the_dictionary_structure using preload_data maps
+
+    Args:
+        mocker (MockerFixture):  Mocker from the Pytest_mock:MockerFixture
+        fetcher (SampleDetailsFetcher): SampleDetailsFetcher class
+    """
+    mock_get_connection = mocker.patch.object(
+        fetcher.connection_provider, "get_connection"
+    )
+    source_map = {1: [(1, "test_source", "test source description", "http:/test_source_url")]}
+    population_map = {
+        1: [(1, "GBR", "Great Britian", "Britain", None, None, "GBR", 2, "EUR", "European", None, 1)]
+    }
+    dc_map = {1: [("sequence", "Exome", "test igsr", 1, None)]}
+
+    result = fetcher.build_the_dictionary_structure(
+        (1, "Sample1", "TEST123", "M"), source_map, population_map, dc_map
+    )
+    mock_get_connection.assert_not_called()
+    assert result["source"][0]["name"] == "test_source"
+    assert result["populations"][0]["code"] == "GBR"
+    assert result["dataCollections"][0]["sequence"] == ["Exome"]
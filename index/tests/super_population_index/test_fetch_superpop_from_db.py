@@ -1,6 +1,7 @@
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 from index.super_population_index.fetch_information_from_db import FetchSPFromDB
+from index.reference_cache import ReferenceData
 from pytest_mock import MockerFixture
 from typing import Any
 
@@ -40,18 +41,20 @@ def test_fetch_information_from_db(mocker: MockerFixture, fetcher:FetchSPFromDB)
         mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
         fetcher (FetchSPFromDB): FetchSPFromDB class
     """    
-    mock_cursor = MagicMock()
-    mock_cursor.fetchall.return_value = [
-        ("TEST", "Test ancestry", None, None)
+    columns = [
+        "superpopulation_id", "code", "name", "display_colour", "display_order",
+        "elastic_id",
     ]
-
-    mock_db = mock_cursor
-    mock_db.cursor.return_value = mock_cursor
+    reference = ReferenceData(
+        {"superpopulation": columns},
+        {"superpopulation": [(1, None, "Test ancestry", None, None, "TEST")]},
+    )
     mocker.patch(
-        "index.super_population_index.fetch_information_from_db.connect",
-        return_value=mock_db
+        "index.super_population_index.fetch_information_from_db.get_reference_data",
+        return_value=reference,
     )
     result = fetcher.fetch_information_from_db()
+    assert result == [("TEST", "Test ancestry", None, None)]
     assert result[0][0] == "TEST"
     assert isinstance(result, list)
 
@@ -0,0 +1,48 @@
+from benchmarks.fake_bulk_server import FakeBulkServer
+from benchmarks.generate_data import DataGenerator
+from benchmarks.run_benchmarks import indexer_metrics
+from index.elasticsearch_indexer import ElasticSearchIndexer
+
+
+def test_fake_bulk_server():
+    """Test for FakeBulkServer: the indexer creates the index and every action is
+    counted"""
+    server = FakeBulkServer().start()
+    try:
+        indexer = ElasticSearchIndexer(server.url, "sample", chunk_size=2)
+        assert indexer.create_index({"number_of_shards": 1}, {"properties": {}})
+        summary = indexer.bulk_index(
+            indexer.index_data({"name": f"HG{i}"}, i, "create") for i in range(5)
+        )
+    finally:
+        server.stop()
+
+    assert (summary["success"], summary["failed"]) == (5, 0)
+    assert server.stats()["documents"] == 5
+    assert server.stats()["requests"] == 3
+
+
+def test_generator_and_metrics():
+    """Test for DataGenerator and indexer_metrics"""
+    db_config = {
+        "host": "localhost",
+        "port": 3306,
+        "user": "user",
+        "password": "pass",
+        "database": "bench_db",
+    }
+    first = list(DataGenerator(db_config, files=50, seed=1).file_rows())
+    second = list(DataGenerator(db_config, files=50, seed=1).file_rows())
+    assert first == second
+    assert len(first) == 50
+    # every file has at least one sample and one data collection
+    assert all(samples and collections for _, samples, collections in first)
+
+    result = {
+        "success": 10,
+        "failed": 0,
+        "pipeline": {"stages": {"read": {"busy": 1.0}, "send": {"busy": 0.5}}},
+    }
+    metrics = indexer_metrics(result, 2.0)
+    assert metrics["docs_per_sec"] == 5.0
+    assert (metrics["db_time"], metrics["build_time"], metrics["bulk_time"]) == (1.0, 0.0, 0.5)
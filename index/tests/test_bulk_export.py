@@ -0,0 +1,101 @@
+import json
+import pytest
+from index.bulk_export import BulkExportIndexer, create_indexer
+from index.bulk_loader import BulkFileLoader, exported_indices
+from pytest_mock import MockerFixture
+
+
+def test_export_and_load(mocker: MockerFixture, tmp_path):
+    """Test for BulkExportIndexer and BulkFileLoader: actions written to split files
+    are sent back unchanged in bulk requests of chunk_size actions
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        tmp_path: Temporary directory from pytest
+    """
+    export_dir = str(tmp_path)
+    exporter = create_indexer(None, "sample", export_dir=export_dir, export_max_file_bytes=1)
+    assert isinstance(exporter, BulkExportIndexer)
+
+    exporter.create_index({"number_of_shards": 1}, {"properties": {}})
+    actions = [exporter.index_data({"name": f"HG{i}"}, i, "create") for i in range(3)]
+    actions.append(exporter.delete_data(3))
+    summary = exporter.bulk_index(iter(actions))
+    assert summary["success"] == 4
+    # one action per file once a file is over max_file_bytes
+    assert len(summary["files"]) == 4
+    assert exported_indices(export_dir) == ["sample"]
+
+    loader = BulkFileLoader("http://localhost:9200", export_dir, "sample", chunk_size=2)
+    bodies = []
+    for path in loader.files():
+        bodies.extend(body for body, _ in loader.read_chunks(path))
+    lines = [json.loads(line) for line in b"".join(bodies).splitlines()]
+    assert lines[:2] == [{"create": {"_id": 0}}, {"name": "HG0"}]
+    assert lines[-1] == {"delete": {"_id": 3}}
+
+    def bulk(index, operations):
+        items = [
+            {op: {"_id": meta["_id"], "status": 201}}
+            for line in operations.splitlines()
+            for op, meta in json.loads(line).items()
+            if op in ("create", "delete")
+        ]
+        return {"items": items}
+
+    mock_bulk = mocker.patch.object(loader.indexer.client, "bulk", side_effect=bulk)
+    assert loader.manifest()["settings"] == {"number_of_shards": 1}
+    # the create actions would conflict with the documents of an existing index
+    with pytest.raises(ValueError):
+        loader.run("update")
+    mocker.patch.object(loader.indexer, "create_index", return_value=True)
+    result = loader.run("create")
+    assert (result["success"], result["failed"], result["files"]) == (4, 0, 4)
+    assert mock_bulk.call_args.kwargs["index"] == "sample"
+
+    # an update export into the same directory replaces the manifest
+    exporter = create_indexer(None, "sample", export_dir=export_dir)
+    exporter.bulk_index(iter([exporter.index_data({"name": "HG0"}, 0, "update")]))
+    assert loader.manifest() == {"type_of": "update"}
+    assert len(loader.files()) == 1
+    with pytest.raises(ValueError):
+        loader.run("create")
+
+
+def test_load_retries_rejected_items(mocker: MockerFixture, tmp_path):
+    """Test for BulkFileLoader: the items rejected with 429 are sent again through
+    the BulkRetry of the indexer instead of being counted as failed
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        tmp_path: Temporary directory from pytest
+    """
+    export_dir = str(tmp_path)
+    exporter = create_indexer(None, "sample", export_dir=export_dir)
+    exporter.create_index({"number_of_shards": 1}, {"properties": {}})
+    exporter.bulk_index(
+        iter([exporter.index_data({"name": f"HG{i}"}, i, "create") for i in range(2)])
+    )
+
+    loader = BulkFileLoader(
+        "http://localhost:9200", export_dir, "sample", initial_backoff=0, max_retries=2
+    )
+    rejected = {
+        "errors": True,
+        "items": [
+            {"create": {"_id": 0, "status": 201}},
+            {"create": {"_id": 1, "status": 429}},
+        ],
+    }
+    accepted = {"errors": False, "items": [{"create": {"_id": 1, "status": 201}}]}
+    responses = [rejected, accepted]
+    mock_bulk = mocker.patch.object(loader.indexer.client, "_bulk", side_effect=responses)
+    mocker.patch.object(loader.indexer, "create_index", return_value=True)
+    result = loader.run("create")
+    assert (result["success"], result["failed"]) == (2, 0)
+    retried = mock_bulk.call_args_list[1].kwargs["operations"]
+    assert [json.loads(line) for line in retried] == [
+        {"create": {"_id": 1}},
+        {"name": "HG1"},
+    ]
+    assert loader.indexer.retry.actions == 1
@@ -0,0 +1,141 @@
+import json
+import sys
+import elasticsearch
+import pytest
+from elastic_transport import ObjectApiResponse
+from pytest_mock import MockerFixture
+from index.file_index.indexing import FileIndexer
+
+
+def bulk_response(operations, **kwargs):
+    """Accepts every action of a bulk request
+
+    Args:
+        operations: Lines of the request
+        **kwargs: Other arguments of bulk
+
+    Returns:
+        ObjectApiResponse: Bulk response
+    """
+    actions = [next(iter(json.loads(line).items())) for line in operations[::2]]
+    items = [{op_type: {"_id": meta["_id"], "status": 201}} for op_type, meta in actions]
+    return ObjectApiResponse(body={"errors": False, "items": items}, meta=None)
+
+
+def file_indexer(mocker: MockerFixture, path: str, rows: list, resume: bool = False):
+    """FileIndexer of rows, with a mocked fetcher
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        path (str): Checkpoint file
+        rows (list): Rows returned by fetch_file_from_db
+        resume (bool): Continue from the checkpoint file
+
+    Returns:
+        FileIndexer: The indexer
+    """
+    indexer = FileIndexer(
+        "config.ini",
+        "http://localhost:9200",
+        "create",
+        chunk_size=2,
+        max_retries=0,
+        ingest_profile=False,
+        checkpoint_file=path,
+        resume=resume,
+    )
+    indexer._fetcher = mocker.Mock()
+    indexer._fetcher.fetch_file_from_db.return_value = rows
+    indexer._fetcher.preload_data.return_value = ({}, {})
+    indexer._fetcher.populate_the_dictionary.side_effect = lambda row, dc, sp: {
+        "name": row[1]
+    }
+
+    return indexer
+
+
+def test_resume_after_interruption(mocker: MockerFixture, tmp_path):
+    """Test for FileIndexer: an interrupted run keeps the last acknowledged file_id,
+    the resumed run only sends the files after it and removes the checkpoint
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        tmp_path: Temporary directory
+    """
+    path = str(tmp_path / "file_checkpoint.json")
+    rows = [(file_id, f"file{file_id}") for file_id in range(1, 6)]
+    mocker.patch.object(FileIndexer, "create_file_index", return_value=True)
+    mock_bulk = mocker.patch(
+        "index.elasticsearch_indexer.Elasticsearch.bulk",
+        side_effect=[
+            bulk_response([b'{"create":{"_id":1}}', b"{}", b'{"create":{"_id":2}}', b"{}"]),
+            elasticsearch.ConnectionError("refused"),
+        ],
+    )
+
+    with pytest.raises(elasticsearch.ConnectionError):
+        file_indexer(mocker, path, rows).build_and_index_file_info()
+    with open(path) as file:
+        state = json.load(file)
+    assert (state["last_key"], state["success"], state["index_name"]) == (2, 2, "file")
+
+    with pytest.raises(ValueError):
+        FileIndexer(
+            "config.ini",
+            "http://localhost:9200",
+            "update",
+            checkpoint_file=path,
+            resume=True,
+        )
+
+    mock_bulk.side_effect = bulk_response
+    resumed = file_indexer(mocker, path, rows[2:], resume=True)
+    result = resumed.build_and_index_file_info()
+
+    resumed._fetcher.fetch_file_from_db.assert_called_once_with((3, sys.maxsize))
+    FileIndexer.create_file_index.assert_called_once()
+    operations = mock_bulk.call_args.kwargs["operations"]
+    assert json.loads(operations[0]) == {"index": {"_index": "file", "_id": 5}}
+    assert (result["success"], result["failed"]) == (5, 0)
+    assert result["resumed"] == {"last_key": 2, "success": 2, "failed": 0}
+    assert not (tmp_path / "file_checkpoint.json").exists()
+
+
+def test_resume_after_rejected_action(mocker: MockerFixture, tmp_path):
+    """Test for FileIndexer: a file rejected by Elasticsearch stops the acknowledged
+    window, the resumed run sends it again together with the files after it
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        tmp_path: Temporary directory
+    """
+    path = str(tmp_path / "file_checkpoint.json")
+    rows = [(file_id, f"file{file_id}") for file_id in range(1, 6)]
+    mocker.patch.object(FileIndexer, "create_file_index", return_value=True)
+    items = [
+        {"create": {"_id": 1, "status": 201}},
+        {"create": {"_id": 2, "status": 400, "error": {"type": "mapper_parsing"}}},
+    ]
+    mock_bulk = mocker.patch(
+        "index.elasticsearch_indexer.Elasticsearch.bulk",
+        side_effect=[
+            ObjectApiResponse(body={"errors": True, "items": items}, meta=None),
+            bulk_response([b'{"create":{"_id":3}}', b"{}", b'{"create":{"_id":4}}', b"{}"]),
+            elasticsearch.ConnectionError("refused"),
+        ],
+    )
+
+    with pytest.raises(elasticsearch.ConnectionError):
+        file_indexer(mocker, path, rows).build_and_index_file_info()
+    with open(path) as file:
+        state = json.load(file)
+    assert (state["last_key"], state["success"], state["failed"]) == (1, 1, 0)
+
+    mock_bulk.side_effect = bulk_response
+    resumed = file_indexer(mocker, path, rows[1:], resume=True)
+    result = resumed.build_and_index_file_info()
+
+    resumed._fetcher.fetch_file_from_db.assert_called_once_with((2, sys.maxsize))
+    operations = mock_bulk.call_args_list[3].kwargs["operations"]
+    assert json.loads(operations[0]) == {"index": {"_index": "file", "_id": 2}}
+    assert (result["success"], result["failed"]) == (5, 0)
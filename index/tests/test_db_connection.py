@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from index.db_connection import (
+    AsyncConnectionProvider,
+    ConnectionProvider,
+    get_connection_provider,
+    run_concurrently,
+)
+from typing import Any
+from pytest_mock import MockerFixture
+
+
+@pytest.fixture
+def db_config() -> dict[str, Any]:
+    """DB configuration
+
+    Returns:
+        dict: Dictionary containing the test db configuration
+    """
+    return {
+        "host": "localhost",
+        "port": 3306,
+        "user": "user",
+        "password": "pass",
+        "database": "test_db",
+        "pool_size": 2,
+    }
+
+
+def test_connection_returns_to_pool(mocker: MockerFixture, db_config: dict[str, Any]):
+    """Test for ConnectionProvider: connection
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        db_config (dict[str, Any]): DB configuration
+    """
+    mock_db = MagicMock()
+    mock_pool = mocker.patch(
+        "index.db_connection.pooling.MySQLConnectionPool"
+    ).return_value
+    mock_pool.get_connection.return_value = mock_db
+    provider = ConnectionProvider(db_config)
+
+    with provider.connection() as db:
+        assert db is mock_db
+
+    mock_db.ping.assert_called_once_with(reconnect=True, attempts=3, delay=1)
+    mock_db.close.assert_called_once()
+    assert provider.pool_size == 2
+
+
+def test_connection_returns_to_pool_on_error(
+    mocker: MockerFixture, db_config: dict[str, Any]
+):
+    """Test for ConnectionProvider: connection when the query fails
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        db_config (dict[str, Any]): DB configuration
+    """
+    mock_db = MagicMock()
+    provider = ConnectionProvider(db_config, health_check=False)
+    mocker.patch.object(provider, "get_connection", return_value=mock_db)
+
+    with pytest.raises(RuntimeError):
+        with provider.connection():
+            raise RuntimeError("query failed")
+
+    mock_db.ping.assert_not_called()
+    mock_db.close.assert_called_once()
+
+
+def test_get_connection_provider_is_shared(db_config: dict[str, Any]):
+    """Test for get_connection_provider
+
+    Args:
+        db_config (dict[str, Any]): DB configuration
+    """
+    provider = get_connection_provider(db_config)
+
+    assert get_connection_provider(dict(db_config)) is provider
+    assert get_connection_provider({**db_config, "database": "other"}) is not provider
+
+
+def test_async_connection_is_reused(mocker: MockerFixture, db_config: dict[str, Any]):
+    """Test for AsyncConnectionProvider: fetchall reuses the idle connection
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        db_config (dict[str, Any]): DB configuration
+    """
+    mock_cursor = AsyncMock()
+    mock_cursor.fetchall.return_value = [(1,)]
+    mock_db = AsyncMock()
+    mock_db.cursor.return_value = mock_cursor
+    mock_connect = mocker.patch(
+        "index.db_connection.aio.connect", AsyncMock(return_value=mock_db)
+    )
+    provider = AsyncConnectionProvider(db_config)
+
+    async def queries():
+        first = await provider.fetchall("SELECT 1")
+        second = await provider.fetchall("SELECT %s", (1,))
+        await provider.close()
+        return first, second
+
+    assert asyncio.run(queries()) == ([(1,)], [(1,)])
+    mock_connect.assert_awaited_once()
+    mock_db.ping.assert_awaited_once_with(reconnect=True, attempts=3, delay=1)
+    mock_cursor.execute.assert_awaited_with("SELECT %s", (1,))
+    mock_db.close.assert_awaited_once()
+
+
+def test_run_concurrently():
+    """Test for run_concurrently: the calls run at the same time unless the
+    concurrency is 1"""
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait(value):
+        barrier.wait()
+        return value
+
+    results = run_concurrently({"a": lambda: wait(1), "b": lambda: wait(2)})
+    assert results == {"a": 1, "b": 2}
+
+    results = run_concurrently(
+        {"a": threading.get_ident, "b": threading.get_ident}, concurrency=1
+    )
+    assert results == {"a": threading.get_ident(), "b": threading.get_ident()}
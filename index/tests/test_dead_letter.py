@@ -0,0 +1,109 @@
+import elasticsearch
+import pytest
+from pytest_mock import MockerFixture
+from index.dead_letter import DeadLetterQueue, read_dead_letters
+from index.elasticsearch_indexer import BoundedElasticsearch
+from index.replay_dead_letters import DeadLetterReplayer
+
+
+def test_dead_letter_record(tmp_path):
+    """Test for DeadLetterQueue: record keeps the failed actions with their source
+
+    Args:
+        tmp_path: Temporary directory
+    """
+    queue = DeadLetterQueue(str(tmp_path), "sample")
+    operations = [
+        b'{"create":{"_index":"sample_1","_id":"HG1"}}',
+        b'{"name":"HG1"}',
+        b'{"delete":{"_index":"sample_1","_id":"HG2"}}',
+        b'{"update":{"_index":"sample_1","_id":"HG3"}}',
+        b'{"doc":{"name":"HG3"},"doc_as_upsert":true}',
+    ]
+    queue.record(
+        operations,
+        [
+            {
+                "create": {
+                    "_id": "HG1",
+                    "status": 400,
+                    "error": {"type": "mapper_parsing_exception", "reason": "bad"},
+                }
+            },
+            {"delete": {"_id": "HG2", "status": 404}},
+            {"update": {"_id": "HG3", "status": 201}},
+        ],
+    )
+    queue.record(operations[2:], error=elasticsearch.ConnectionError("refused"))
+    queue.close()
+
+    entries = list(read_dead_letters(queue.path))
+    assert queue.count == 3
+    assert entries[0]["source"] == {"name": "HG1"}
+    assert entries[0]["status"] == 400
+    assert entries[0]["error_type"] == "mapper_parsing_exception"
+    assert entries[1]["op_type"] == "delete" and entries[1]["source"] is None
+    assert entries[1]["error_type"] == "ConnectionError"
+    assert entries[2]["action"] == {"update": {"_index": "sample_1", "_id": "HG3"}}
+
+
+def test_failed_bulk_goes_to_dead_letters(mocker: MockerFixture, tmp_path):
+    """Test for BoundedElasticsearch: bulk writes the failed items, then the replay
+    sends them to the alias
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        tmp_path: Temporary directory
+    """
+    queue = DeadLetterQueue(str(tmp_path), "file")
+    mock_bulk = mocker.patch(
+        "index.elasticsearch_indexer.Elasticsearch.bulk",
+        return_value={
+            "errors": True,
+            "items": [
+                {"create": {"_id": "1", "status": 201}},
+                {"create": {"_id": "2", "status": 400, "error": {"type": "x"}}},
+            ],
+        },
+    )
+    client = BoundedElasticsearch("http://localhost:9200", dead_letters=queue)
+    client.options(request_timeout=5).bulk(
+        operations=b'{"create":{"_index":"file_1","_id":"1"}}\n{"a":1}\n'
+        b'{"create":{"_index":"file_1","_id":"2"}}\n{"a":2}\n'
+    )
+    queue.close()
+    assert queue.count == 1
+
+    mock_bulk.return_value = {
+        "errors": False,
+        "items": [{"index": {"_id": "2", "status": 200}}],
+    }
+    replayer = DeadLetterReplayer("http://localhost:9200", queue.path, max_retries=0)
+    summary = replayer.replay()
+
+    assert replayer.index_name == "file"
+    assert mock_bulk.call_args.kwargs["operations"] == [
+        {"index": {"_index": "file", "_id": "2"}},
+        {"a": 2},
+    ]
+    assert (summary["success"], summary["failed"]) == (1, 0)
+
+
+def test_bulk_error_goes_to_dead_letters(mocker: MockerFixture, tmp_path):
+    """Test for BoundedElasticsearch: bulk writes every action of a request which
+    failed as a whole
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        tmp_path: Temporary directory
+    """
+    queue = DeadLetterQueue(str(tmp_path), "file")
+    mocker.patch(
+        "index.elasticsearch_indexer.Elasticsearch.bulk",
+        side_effect=elasticsearch.ConnectionError("refused"),
+    )
+    client = BoundedElasticsearch("http://localhost:9200", dead_letters=queue)
+
+    with pytest.raises(elasticsearch.ConnectionError):
+        client.bulk(operations=[b'{"delete":{"_id":"1"}}', b'{"delete":{"_id":"2"}}'])
+    assert queue.count == 2
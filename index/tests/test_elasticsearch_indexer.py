@@ -0,0 +1,367 @@
+import asyncio
+import elasticsearch
+import json
+import pytest
+from elastic_transport import ObjectApiResponse
+from index.async_elasticsearch_indexer import AsyncElasticSearchIndexer
+from index.elasticsearch_indexer import BulkRetry, ElasticSearchIndexer
+from pytest_mock import MockerFixture
+
+
+@pytest.fixture
+def indexer() -> ElasticSearchIndexer:
+    """The indexer fixture
+
+    Returns:
+        ElasticSearchIndexer: A class
+    """
+    return ElasticSearchIndexer("http://localhost:9200", "test", chunk_size=2)
+
+
+def test_index_data(indexer: ElasticSearchIndexer):
+    """Test for ElasticSearchIndexer: index_data
+
+    Args:
+        indexer (ElasticSearchIndexer): ElasticSearchIndexer class
+    """
+    create = indexer.index_data({"name": "HG00096"}, "HG00096", "create")
+    update = indexer.index_data({"name": "HG00096"}, "HG00096", "update")
+
+    assert create["_source"] == {"name": "HG00096"}
+    assert update["doc"] == {"name": "HG00096"}
+    assert update["doc_as_upsert"] is True
+    with pytest.raises(ValueError):
+        indexer.index_data({}, "HG00096", "delete")
+
+
+def test_bulk_index_summary(mocker: MockerFixture, indexer: ElasticSearchIndexer):
+    """Test for ElasticSearchIndexer: bulk_index success and failure accounting
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        indexer (ElasticSearchIndexer): ElasticSearchIndexer class
+    """
+    failure = {"update": {"_id": "3", "status": 400}}
+    mock_bulk = mocker.patch(
+        "index.elasticsearch_indexer.streaming_bulk",
+        return_value=iter(
+            [
+                (True, {"update": {"_id": "1"}}),
+                (True, {"update": {"_id": "2"}}),
+                (False, failure),
+            ]
+        ),
+    )
+
+    result = indexer.bulk_index([{}, {}, {}])
+    assert mock_bulk.call_args.kwargs["chunk_size"] == 2
+    assert result["success"] == 2
+    assert result["failed"] == 1
+    assert result["errors"] == [failure]
+    assert result["chunks"] == [
+        {"success": 2, "failed": 0},
+        {"success": 0, "failed": 1},
+    ]
+
+
+def test_bulk_index_chunks_follow_requests(mocker: MockerFixture):
+    """Test for ElasticSearchIndexer: chunks split by max_chunk_bytes are counted as
+    the bulk requests actually sent, not as chunk_size actions
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+    """
+    requests = []
+
+    def bulk(operations, **kwargs):
+        ids = [json.loads(line)["create"]["_id"] for line in operations[::2]]
+        requests.append(ids)
+        items = [{"create": {"_id": doc_id, "status": 201}} for doc_id in ids]
+        return ObjectApiResponse(body={"errors": False, "items": items}, meta=None)
+
+    mocker.patch("index.elasticsearch_indexer.Elasticsearch.bulk", side_effect=bulk)
+    indexer = ElasticSearchIndexer(
+        "http://localhost:9200", "test", chunk_size=3, max_chunk_bytes=200
+    )
+    sizes = [10, 10, 150, 10, 10, 10, 10]
+    actions = [
+        indexer.index_data({"text": "x" * size}, str(doc_id), "create")
+        for doc_id, size in enumerate(sizes)
+    ]
+
+    result = indexer.bulk_index(actions)
+    assert [len(ids) for ids in requests] == [2, 1, 3, 1]
+    assert result["chunks"] == [
+        {"success": len(ids), "failed": 0} for ids in requests
+    ]
+    assert result["success"] == 7 and result["errors"] == []
+
+
+def test_bulk_index_parallel(mocker: MockerFixture):
+    """Test for ElasticSearchIndexer: bulk_index in parallel mode
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+    """
+    indexer = ElasticSearchIndexer(
+        "http://localhost:9200", "test", bulk_mode="parallel", thread_count=8
+    )
+    mock_bulk = mocker.patch(
+        "index.elasticsearch_indexer.parallel_bulk",
+        return_value=iter([(True, {"index": {"_id": "1"}})]),
+    )
+
+    result = indexer.bulk_index([{}])
+    assert mock_bulk.call_args.kwargs["thread_count"] == 8
+    assert result["success"] == 1
+
+
+def test_unsupported_bulk_mode():
+    """Test for ElasticSearchIndexer with an unknown bulk mode"""
+    with pytest.raises(ValueError):
+        ElasticSearchIndexer("http://localhost:9200", "test", bulk_mode="async")
+
+
+def test_async_unsupported_options(tmp_path):
+    """Test for AsyncElasticSearchIndexer: the options of the threaded indexer are
+    rejected instead of being dropped
+
+    Args:
+        tmp_path: Temporary directory
+    """
+    with pytest.raises(ValueError, match="dead_letter_dir"):
+        AsyncElasticSearchIndexer(
+            "http://localhost:9200", "test", dead_letter_dir=str(tmp_path)
+        )
+    with pytest.raises(ValueError, match="bulk_mode, thread_count"):
+        AsyncElasticSearchIndexer(
+            "http://localhost:9200", "test", bulk_mode="parallel", thread_count=8
+        )
+
+
+def test_async_bulk_index_summary(mocker: MockerFixture):
+    """Test for AsyncElasticSearchIndexer: bulk_index consumes the actions ahead of
+    the bulk requests and keeps the same accounting
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+    """
+    failure = {"create": {"_id": "2", "status": 409}}
+
+    async def bulk(client, actions, **kwargs):
+        async for action in actions:
+            ok = action["_id"] != "2"
+            yield ok, {"create": {"_id": action["_id"]}} if ok else failure
+
+    mocker.patch(
+        "index.async_elasticsearch_indexer.async_streaming_bulk", side_effect=bulk
+    )
+    indexer = AsyncElasticSearchIndexer("http://localhost:9200", "test", chunk_size=2)
+
+    async def actions():
+        for doc_id in "123":
+            yield indexer.index_data({}, doc_id, "create")
+
+    async def index():
+        try:
+            return await indexer.bulk_index(actions())
+        finally:
+            await indexer.close()
+
+    result = asyncio.run(index())
+    assert result["success"] == 2
+    assert result["errors"] == [failure]
+    assert result["chunks"] == [
+        {"success": 1, "failed": 1},
+        {"success": 1, "failed": 0},
+    ]
+
+
+def test_bulk_index_delete_missing(mocker: MockerFixture, indexer: ElasticSearchIndexer):
+    """Test for ElasticSearchIndexer: deleting a missing document counts as a success
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        indexer (ElasticSearchIndexer): ElasticSearchIndexer class
+    """
+    mocker.patch(
+        "index.elasticsearch_indexer.streaming_bulk",
+        return_value=iter(
+            [
+                (True, {"delete": {"_id": "1", "status": 200}}),
+                (False, {"delete": {"_id": "2", "status": 404}}),
+            ]
+        ),
+    )
+
+    result = indexer.bulk_index([indexer.delete_data("1"), indexer.delete_data("2")])
+    assert indexer.delete_data("1")["_op_type"] == "delete"
+    assert result["success"] == 2
+    assert result["failed"] == 0
+
+
+def test_rebuild_index(mocker: MockerFixture):
+    """Test for ElasticSearchIndexer: rebuild_index loads a new generation, swaps the
+    alias away from a legacy index and keeps keep_generations previous indices
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+    """
+    indexer = ElasticSearchIndexer("http://localhost:9200", "sample", keep_generations=1)
+    client = mocker.patch.object(indexer, "client")
+    mocker.patch.object(indexer, "generation_name", return_value="sample_20260102000000")
+    client.count.return_value = {"count": 2}
+    client.indices.exists_alias.return_value = False
+    client.indices.exists.return_value = True
+    client.indices.get.return_value = {
+        "sample_20250101000000": {},
+        "sample_20260101000000": {},
+        "sample_20260102000000": {},
+        "sample_backup": {},
+    }
+    targets = []
+
+    def load():
+        targets.append(indexer.index_data({}, "HG00096", "rebuild")["_index"])
+        return {"success": 2, "failed": 0, "errors": [], "chunks": []}
+
+    result = indexer.rebuild_index({}, {}, load)
+
+    assert targets == ["sample_20260102000000"]
+    assert indexer.index_name == "sample"
+    assert result["rebuild"]["swapped"] is True
+    client.indices.update_aliases.assert_called_once_with(
+        actions=[
+            {"remove_index": {"index": "sample"}},
+            {"add": {"index": "sample_20260102000000", "alias": "sample"}},
+        ]
+    )
+    assert result["rebuild"]["deleted"] == ["sample_20250101000000"]
+
+
+def test_rebuild_index_validation_failed(mocker: MockerFixture):
+    """Test for ElasticSearchIndexer: the alias is not moved when the count differs
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+    """
+    indexer = ElasticSearchIndexer("http://localhost:9200", "sample")
+    client = mocker.patch.object(indexer, "client")
+    client.count.return_value = {"count": 1}
+
+    result = indexer.rebuild_index(
+        {}, {}, lambda: {"success": 2, "failed": 0, "errors": [], "chunks": []}
+    )
+
+    assert result["rebuild"]["swapped"] is False
+    client.indices.update_aliases.assert_not_called()
+
+
+def test_create_index_ingest_profile(
+    mocker: MockerFixture, indexer: ElasticSearchIndexer
+):
+    """Test for ElasticSearchIndexer: a new index is loaded with the ingest profile and
+    gets the JSON settings back once load_index is done, not after every bulk_index
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        indexer (ElasticSearchIndexer): ElasticSearchIndexer class
+    """
+    client = mocker.patch.object(indexer, "client")
+    client.indices.exists.return_value = False
+    mocker.patch("index.elasticsearch_indexer.streaming_bulk", return_value=iter([]))
+    indexer.force_merge = 1
+
+    assert indexer.create_index(
+        {"number_of_shards": 2, "number_of_replicas": 1, "refresh_interval": "30s"}, {}
+    )
+    settings = client.indices.create.call_args.kwargs["body"]["settings"]
+    assert settings["number_of_shards"] == 2
+    assert settings["number_of_replicas"] == 0
+    assert settings["refresh_interval"] == "-1"
+
+    indexer.bulk_index([])
+    client.indices.put_settings.assert_not_called()
+    indexer.load_index(lambda: {**indexer.bulk_index([]), **indexer.bulk_index([])})
+    client.indices.put_settings.assert_called_once_with(
+        index="test",
+        settings={
+            "refresh_interval": "30s",
+            "number_of_replicas": 1,
+            "translog.durability": None,
+        },
+    )
+    client.indices.refresh.assert_called_once_with(index="test")
+    client.indices.forcemerge.assert_called_once_with(index="test", max_num_segments=1)
+    client.cluster.health.assert_called_once()
+
+    indexer.load_index(lambda: indexer.bulk_index([]))
+    client.indices.put_settings.assert_called_once()
+
+
+def test_bulk_retry_rejected_items(mocker: MockerFixture):
+    """Test for BulkRetry: send retries only the items rejected with 429
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+    """
+    mocker.patch("index.elasticsearch_indexer.time.sleep")
+    responses = [
+        {
+            "errors": True,
+            "items": [
+                {"create": {"_id": "1", "status": 201}},
+                {"delete": {"_id": "2", "status": 429}},
+                {"create": {"_id": "3", "status": 429}},
+            ],
+        },
+        {
+            "errors": True,
+            "items": [
+                {"delete": {"_id": "2", "status": 200}},
+                {"create": {"_id": "3", "status": 429}},
+            ],
+        },
+        {"errors": False, "items": [{"create": {"_id": "3", "status": 201}}]},
+    ]
+    send = mocker.Mock(side_effect=responses)
+    retry = BulkRetry(max_retries=3)
+
+    body = b'{"create":{"_id":"1"}}\n{}\n{"delete":{"_id":"2"}}\n{"create":{"_id":"3"}}\n{}\n'
+    response = retry.send(send, operations=body, index="test")
+
+    assert send.call_args_list[1].kwargs["operations"] == [
+        b'{"delete":{"_id":"2"}}',
+        b'{"create":{"_id":"3"}}',
+        b"{}",
+    ]
+    assert send.call_args_list[2].kwargs == {
+        "operations": [b'{"create":{"_id":"3"}}', b"{}"],
+        "index": "test",
+    }
+    assert [next(iter(item.values()))["status"] for item in response["items"]] == [
+        201,
+        200,
+        201,
+    ]
+    assert response["errors"] is False
+    assert (retry.requests, retry.actions) == (2, 3)
+
+
+def test_bulk_retry_budget(mocker: MockerFixture):
+    """Test for BulkRetry: send retries connection errors until the budget is spent
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+    """
+    sleep = mocker.patch("index.elasticsearch_indexer.time.sleep")
+    send = mocker.Mock(side_effect=elasticsearch.ConnectionError("refused"))
+    retry = BulkRetry(max_retries=5, initial_backoff=1, max_backoff=3, budget=3)
+
+    with pytest.raises(elasticsearch.ConnectionError):
+        retry.send(send, operations=[b"{}"])
+
+    assert send.call_count == 4
+    assert retry.exhausted
+    delays = [call.args[0] for call in sleep.call_args_list]
+    assert 0.5 <= delays[0] <= 1 and 1 <= delays[1] <= 2 and 1.5 <= delays[2] <= 3
@@ -0,0 +1,102 @@
+from index.elasticsearch_indexer import ElasticSearchIndexer
+from index.hash_store import HashStore, default_hash_store_path, document_hash
+from pytest_mock import MockerFixture
+
+
+def test_document_hash_is_stable():
+    """Test for document_hash: the key order does not change the hash"""
+    assert document_hash({"a": 1, "b": [1, 2]}) == document_hash({"b": [1, 2], "a": 1})
+    assert document_hash({"a": 1}) != document_hash({"a": 2})
+
+
+def test_hash_store(tmp_path):
+    """Test for HashStore: save, load and clear
+
+    Args:
+        tmp_path: Temporary directory
+    """
+    store = HashStore(str(tmp_path / "hashes.sqlite"))
+    store.save("sample", {"HG00096": "abc", "HG00097": "def"})
+    store.save("sample", {"HG00097": None})
+
+    assert store.load("sample") == {"HG00096": "abc"}
+    assert store.load("file") == {}
+    store.clear("sample")
+    assert store.load("sample") == {}
+    assert default_hash_store_path("/etc/es/config.ini") == "/etc/es/doc_hashes.sqlite"
+
+
+def test_indexer_skips_unchanged(mocker: MockerFixture, tmp_path):
+    """Test for ElasticSearchIndexer: updates of unchanged documents are skipped once
+    their hash was accepted
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        tmp_path: Temporary directory
+    """
+    mocker.patch(
+        "index.elasticsearch_indexer.streaming_bulk",
+        side_effect=lambda client, actions, **kwargs: (
+            (True, {"update": {"_id": action["_id"], "status": 200}})
+            for action in actions
+        ),
+    )
+    path = str(tmp_path / "hashes.sqlite")
+    first = ElasticSearchIndexer("http://localhost:9200", "sample", hash_store=path)
+    result = first.bulk_index(
+        [
+            first.index_data({"name": "HG00096"}, "HG00096", "update"),
+            first.index_data({"name": "HG00097"}, "HG00097", "update"),
+        ]
+    )
+    assert result["skipped"] == 0
+    assert result["changed"] == 2
+
+    second = ElasticSearchIndexer("http://localhost:9200", "sample", hash_store=path)
+    actions = [
+        second.index_data({"name": "HG00096"}, "HG00096", "update"),
+        second.index_data({"name": "HG00097", "sex": "male"}, "HG00097", "update"),
+    ]
+    assert actions[0] is None
+    result = second.bulk_index(action for action in actions if action)
+    assert result["skipped"] == 1
+    assert result["changed"] == 1
+
+
+def test_rebuild_hashes_follow_the_alias(mocker: MockerFixture, tmp_path):
+    """Test for ElasticSearchIndexer: the hashes of a rebuild only replace the ones of
+    the alias once it is swapped, a failed validation drops them
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        tmp_path: Temporary directory
+    """
+    mocker.patch(
+        "index.elasticsearch_indexer.streaming_bulk",
+        side_effect=lambda client, actions, **kwargs: (
+            (True, {action["_op_type"]: {"_id": action["_id"], "status": 200}})
+            for action in actions
+        ),
+    )
+    path = str(tmp_path / "hashes.sqlite")
+    indexer = ElasticSearchIndexer("http://localhost:9200", "sample", hash_store=path)
+    client = mocker.patch.object(indexer, "client")
+    indexer.bulk_index([indexer.index_data({"name": "old"}, "HG00096", "update")])
+
+    def load():
+        return indexer.bulk_index(
+            [indexer.index_data({"name": "new"}, "HG00096", "rebuild")]
+        )
+
+    client.count.return_value = {"count": 0}
+    result = indexer.rebuild_index({}, {}, load)
+    assert result["rebuild"]["swapped"] is False
+    # the live index still holds the old document, the update is sent
+    assert indexer.index_data({"name": "new"}, "HG00096", "update") is not None
+    assert HashStore(path).load(result["rebuild"]["index"]) == {}
+
+    client.count.return_value = {"count": 1}
+    result = indexer.rebuild_index({}, {}, load)
+    assert result["rebuild"]["swapped"] is True
+    assert indexer.index_data({"name": "new"}, "HG00096", "update") is None
+    assert HashStore(path).load("sample") == {"HG00096": document_hash({"name": "new"})}
@@ -0,0 +1,153 @@
+import pytest
+from unittest.mock import MagicMock
+from pytest_mock import MockerFixture
+from index.data_collection_index.fetch_information_from_db import DCDetailsFetcher
+from index.join_staging import (
+    STAGE_COLLECTION_ANALYSIS_SQL,
+    STAGE_SAMPLE_COLLECTIONS_SQL,
+    JoinStaging,
+)
+from index.population_index.fetch_information_from_db import PopulationDetailsFetcher
+from index.reference_cache import ReferenceData
+
+
+@pytest.fixture
+def db_config() -> dict:
+    """Fixture for DB Configuration
+
+    Returns:
+        dict: Dictionary configuration
+    """
+    return {
+        "host": "localhost",
+        "port": 3306,
+        "user": "user",
+        "password": "pass",
+        "database": "staging_db",
+    }
+
+
+@pytest.fixture
+def staging() -> JoinStaging:
+    """Fixture for a JoinStaging loaded from a mocked provider
+
+    Returns:
+        JoinStaging: Staged join of two collections, three samples and a file
+        without samples in collection 3
+    """
+    rows = {
+        STAGE_SAMPLE_COLLECTIONS_SQL: [
+            (10, 1, 1, 1),
+            (10, 2, 1, 2),
+            (11, 1, 1, 1),
+            (12, 1, 2, 1),
+        ],
+        STAGE_COLLECTION_ANALYSIS_SQL: [
+            (1, 1, 1),
+            (1, 1, 2),
+            (2, 2, 1),
+            (3, 2, 2),
+        ],
+    }
+    provider = MagicMock()
+    provider.fetchall.side_effect = lambda sql: rows[sql]
+
+    return JoinStaging.load(provider)
+
+
+def test_join_staging_lookups(staging: JoinStaging):
+    """Test for JoinStaging: the rows keep the shape of the queries they replace
+
+    Args:
+        staging (JoinStaging): JoinStaging
+    """
+    assert staging.sample_collections([11, 10, 13, 10]) == [
+        (10, 1, 1, 1),
+        (10, 2, 1, 2),
+        (11, 1, 1, 1),
+    ]
+    # samples 10 and 11 share the (1, 1, 1) combination, it is returned once
+    assert staging.population_collections({5: [11, 10], 6: [12]}) == [
+        (5, 1, 1, 1),
+        (5, 2, 1, 2),
+        (6, 1, 2, 1),
+    ]
+    assert (staging.samples_count(1), staging.samples_count(3)) == (3, 0)
+    assert staging.collection_analysis(3) == [(2, 2)]
+
+
+def test_fetchers_read_the_staging(
+    mocker: MockerFixture, db_config: dict, staging: JoinStaging
+):
+    """Test for the stage_joins fetchers: the data collection preload only runs the
+    queries the staging does not cover, and the population details are resolved
+    from the staged rows
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        db_config (dict): Dictionary configuration
+        staging (JoinStaging): JoinStaging
+    """
+    columns = {
+        "population": ["population_id", "code"],
+        "data_type": ["data_type_id", "code"],
+        "analysis_group": ["analysis_group_id", "description"],
+        "data_collection": ["data_collection_id", "title", "reuse_policy"],
+    }
+    reference = ReferenceData(
+        columns,
+        {
+            "population": [(5, "GBR")],
+            "data_type": [(1, "alignment"), (2, "sequence")],
+            "analysis_group": [(1, "Exome"), (2, "Low coverage WGS")],
+            "data_collection": [(1, "1000 Genomes", "open"), (2, "HGDP", "fort")],
+        },
+        {},
+    )
+    for module in ("data_collection_index", "population_index"):
+        path = f"index.{module}.fetch_information_from_db"
+        mocker.patch(f"{path}.get_reference_data", return_value=reference)
+        mocker.patch(f"{path}.get_join_staging", return_value=staging)
+
+    with pytest.raises(ValueError):
+        DCDetailsFetcher(db_config, stage_joins=True)
+
+    fetcher = DCDetailsFetcher(db_config, join_reference=True, stage_joins=True)
+    mock_cursor = MagicMock()
+    mock_cursor.fetchall.side_effect = [[(1, 2)], []]
+    mock_db = MagicMock()
+    mock_db.cursor.return_value = mock_cursor
+    mocker.patch.object(
+        fetcher.connection_provider, "get_connection", return_value=mock_db
+    )
+    samples_count_map, population_count_map, _, analysis_map = fetcher.preload_data()
+    assert mock_cursor.execute.call_count == 2
+    assert samples_count_map == {1: 3, 2: 1}
+    assert population_count_map == {1: 2}
+    assert analysis_map[1] == [("alignment", "Exome"), ("alignment", "Low coverage WGS")]
+    assert fetcher.fetch_analysis_information(3) == [("sequence", "Low coverage WGS")]
+
+    population_fetcher = PopulationDetailsFetcher(
+        db_config, join_reference=True, stage_joins=True
+    )
+    mocker.patch.object(
+        population_fetcher.connection_provider, "get_connection", return_value=mock_db
+    )
+    expected = {
+        5: [
+            ("alignment", "Exome", "1000 Genomes", 1, "open"),
+            ("sequence", "Exome", "HGDP", 2, "fort"),
+        ]
+    }
+    # the samples scanned for the overlaps are reused, no query is sent
+    mock_cursor.execute.reset_mock()
+    population_samples = {5: {10, 11}, 6: {12}}
+    assert (
+        population_fetcher.fetch_data_collection_details([5], population_samples)
+        == expected
+    )
+    mock_cursor.execute.assert_not_called()
+
+    mock_cursor.fetchall.side_effect = [[(5, 10), (5, 11), (6, 12)]]
+    assert population_fetcher.fetch_data_collection_details([5]) == expected
+    mock_cursor.execute.assert_called_once()
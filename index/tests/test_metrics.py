@@ -0,0 +1,94 @@
+import json
+from unittest.mock import MagicMock
+from pytest_mock import MockerFixture
+from index.elasticsearch_indexer import BoundedElasticsearch
+from index.metrics import (
+    MeteredConnection,
+    MetricsRegistry,
+    collect_metrics,
+    get_metrics,
+    metered_connection,
+)
+
+
+def test_registry_exposition():
+    """Test for MetricsRegistry: prometheus and summary"""
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry.inc("es_py_documents_total", 3, index="file", outcome="success")
+    assert registry.counters == {}
+
+    registry.enable()
+    registry.inc("es_py_documents_total", 3, index="file", outcome="success")
+    registry.inc("es_py_documents_total", 2, index="file", outcome="success")
+    for value in (0.05, 0.5, 5.0):
+        registry.observe("es_py_bulk_request_seconds", value, index="file")
+
+    text = registry.prometheus()
+    assert "# TYPE es_py_documents_total counter" in text
+    assert 'es_py_documents_total{index="file",outcome="success"} 5' in text
+    assert 'es_py_bulk_request_seconds_bucket{index="file",le="0.1"} 1' in text
+    assert 'es_py_bulk_request_seconds_bucket{index="file",le="1.0"} 2' in text
+    assert 'es_py_bulk_request_seconds_bucket{index="file",le="+Inf"} 3' in text
+    assert 'es_py_bulk_request_seconds_count{index="file"} 3' in text
+
+    worker = MetricsRegistry(buckets=(0.1, 1.0))
+    worker.enable()
+    worker.observe("es_py_bulk_request_seconds", 0.05, index="file")
+    registry.merge(worker.state())
+
+    latency = registry.summary()["es_py_bulk_request_seconds"][0]
+    assert latency["labels"] == {"index": "file"}
+    assert latency["count"] == 4
+    assert latency["p50"] == 0.1
+    assert latency["max"] == 5.0
+
+
+def test_metered_connection():
+    """Test for metered_connection: the cursors are timed only when enabled"""
+    mock_db = MagicMock()
+    mock_db.cursor.return_value.fetchall.return_value = [(1,), (2,)]
+    assert metered_connection(mock_db) is mock_db
+
+    with collect_metrics(json_file=None, textfile=None):
+        assert not get_metrics().enabled
+
+    registry = get_metrics()
+    registry.enable()
+    try:
+        db = metered_connection(mock_db)
+        assert isinstance(db, MeteredConnection)
+        cursor = db.cursor(buffered=False)
+        cursor.execute("SELECT 1")
+        assert cursor.fetchall() == [(1,), (2,)]
+        mock_db.cursor.assert_called_once_with(buffered=False)
+        summary = registry.summary()
+    finally:
+        registry.reset()
+
+    assert summary["es_py_sql_rows_total"][0]["value"] == 2
+    assert summary["es_py_sql_execute_seconds"][0]["count"] == 1
+    assert summary["es_py_sql_fetch_seconds"][0]["count"] == 1
+
+
+def test_collect_metrics_files(mocker: MockerFixture, tmp_path):
+    """Test for collect_metrics: bulk requests are recorded and written at the end
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        tmp_path: Temporary directory
+    """
+    mocker.patch(
+        "index.elasticsearch_indexer.Elasticsearch.bulk",
+        return_value={"items": []},
+    )
+    textfile = tmp_path / "es_py.prom"
+    json_file = tmp_path / "metrics.json"
+
+    with collect_metrics(str(textfile), str(json_file)):
+        client = BoundedElasticsearch("http://localhost:9200", index_label="sample")
+        client.options(request_timeout=10).bulk(operations=[b'{"a":1}', b'{"b":2}'])
+
+    assert not get_metrics().enabled
+    assert 'es_py_bulk_request_bytes_total{index="sample"} 16' in textfile.read_text()
+    summary = json.loads(json_file.read_text())
+    assert summary["es_py_bulk_request_seconds"][0]["count"] == 1
@@ -0,0 +1,59 @@
+import pytest
+from index.orchestrator import IndexOrchestrator
+from pytest_mock import MockerFixture
+
+
+@pytest.fixture
+def db_config() -> dict:
+    """DB configuration
+
+    Returns:
+        dict: Dictionary containing the test db configuration
+    """
+    return {
+        "host": "localhost",
+        "port": 3306,
+        "user": "user",
+        "password": "pass",
+        "database": "orchestrator_db",
+    }
+
+
+def test_orchestrator_run(mocker: MockerFixture, db_config: dict):
+    """Test for IndexOrchestrator: a failed indexer does not stop the others, every
+    indexer is timed and the failures are listed
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+        db_config (dict): DB configuration
+    """
+    mocker.patch("index.orchestrator.read_from_config_file", return_value=db_config)
+    started = []
+
+    def load_runner(index_type):
+        def run(config_file, es_host, type_of, **options):
+            started.append(index_type)
+            assert options == {"chunk_size": 10}
+            if index_type == "sample_index":
+                raise RuntimeError("DB connection lost")
+            return {"success": 1}
+
+        return run
+
+    mocker.patch("index.orchestrator.load_runner", side_effect=load_runner)
+    orchestrator = IndexOrchestrator(
+        "config.ini",
+        "http://localhost:9200",
+        "update",
+        index_types=["file_index", "sample_index"],
+        max_parallel=2,
+        chunk_size=10,
+    )
+
+    result = orchestrator.run()
+    assert sorted(started) == ["file_index", "sample_index"]
+    assert result["failed"] == ["sample_index"]
+    assert result["results"] == {"file_index": {"success": 1}}
+    assert result["timings"]["sample_index"]["status"] == "failed"
+    assert "RuntimeError" in result["timings"]["sample_index"]["error"]
+    assert result["timings"]["file_index"]["status"] == "ok"
@@ -0,0 +1,57 @@
+import pytest
+from index.pipeline import IndexingPipeline
+
+
+def test_pipeline_run():
+    """Test for IndexingPipeline: run keeps the order and skips None actions"""
+    sent = []
+
+    def sender(actions):
+        sent.extend(actions)
+        return {"success": len(sent)}
+
+    pipeline = IndexingPipeline(
+        lambda: range(10),
+        lambda row: None if row % 3 == 0 else {"_id": row},
+        sender,
+        queue_size=2,
+    )
+
+    result = pipeline.run()
+    assert result == {"success": 6}
+    assert [action["_id"] for action in sent] == [1, 2, 4, 5, 7, 8]
+
+    stats = pipeline.stats()
+    assert stats["stages"]["read"]["count"] == 10
+    assert stats["stages"]["build"]["count"] == 6
+    assert stats["stages"]["send"]["count"] == 6
+    assert stats["queues"]["rows"]["max_depth"] <= 2
+
+
+def test_pipeline_reader_error():
+    """Test for IndexingPipeline: run raises the error of the reader stage"""
+
+    def reader():
+        yield 1
+        raise RuntimeError("DB connection lost")
+
+    pipeline = IndexingPipeline(reader, lambda row: {"_id": row}, list)
+
+    with pytest.raises(RuntimeError, match="DB connection lost"):
+        pipeline.run()
+
+
+def test_pipeline_sender_error():
+    """Test for IndexingPipeline: run stops the other stages when the sender fails"""
+
+    def sender(actions):
+        next(iter(actions))
+        raise RuntimeError("cluster unavailable")
+
+    pipeline = IndexingPipeline(
+        lambda: range(100000), lambda row: {"_id": row}, sender, queue_size=1
+    )
+
+    with pytest.raises(RuntimeError, match="cluster unavailable"):
+        pipeline.run()
+    assert pipeline.stats()["stages"]["read"]["count"] < 100000
@@ -0,0 +1,70 @@
+import pickle
+from decimal import Decimal
+from pytest_mock import MockerFixture
+from index.reference_cache import ReferenceData, get_reference_data
+
+
+def test_reference_data_snapshot(tmp_path):
+    """Test for ReferenceData: lookups and the snapshot fingerprint
+
+    Args:
+        tmp_path: Temporary directory from pytest
+    """
+    columns = {"data_type": ["data_type_id", "code"], "population": []}
+    rows = {"data_type": [(1, "alignment"), (2, "sequence")]}
+    reference = ReferenceData(columns, rows, {"data_type": 10})
+
+    assert reference.get("data_type", 2) == {"data_type_id": 2, "code": "sequence"}
+    assert reference.value("data_type", 1, "code") == "alignment"
+    assert reference.value("data_type", None, "code") is None
+    assert reference.get("population", 1) is None
+
+    path = str(tmp_path / "reference.json")
+    reference.save(path)
+    loaded = ReferenceData.from_snapshot(path, {"data_type": 10})
+    assert loaded.rows("data_type") == rows["data_type"]
+    assert ReferenceData.from_snapshot(path, {"data_type": 11}) is None
+    assert ReferenceData.from_snapshot(str(tmp_path / "missing"), {}) is None
+
+
+def test_reference_data_json_snapshot(tmp_path):
+    """Test for ReferenceData: the snapshot is JSON, DECIMAL values come back as
+    Decimal, and a pickle snapshot is ignored instead of loaded
+
+    Args:
+        tmp_path: Temporary directory from pytest
+    """
+    columns = {"population": ["population_id", "code", "latitude"]}
+    rows = {"population": [(1, "GBR", Decimal("51.5072178")), (2, "FIN", None)]}
+    path = tmp_path / "reference.json"
+    ReferenceData(columns, rows, {"population": 7}).save(str(path))
+
+    loaded = ReferenceData.from_snapshot(str(path), {"population": 7})
+    assert loaded.rows("population") == rows["population"]
+    assert loaded.value("population", 1, "latitude") == Decimal("51.5072178")
+
+    path.write_bytes(pickle.dumps({"version": 2, "rows": rows}))
+    assert ReferenceData.from_snapshot(str(path), {"population": 7}) is None
+
+
+def test_get_reference_data_without_snapshot(mocker: MockerFixture):
+    """Test for get_reference_data: the tables are only checksummed for a snapshot,
+    and the data is shared by the fetchers of one database
+
+    Args:
+        mocker (MockerFixture): Mocker from the Pytest_mock:MockerFixture
+    """
+    db_config = {
+        "host": "localhost",
+        "port": 3306,
+        "user": "user",
+        "password": "pass",
+        "database": "reference_db",
+    }
+    fingerprint = mocker.patch.object(ReferenceData, "table_fingerprint")
+    load = mocker.patch.object(ReferenceData, "load")
+
+    reference = get_reference_data(db_config)
+    assert get_reference_data(dict(db_config)) is reference
+    load.assert_called_once_with(mocker.ANY, None)
+    fingerprint.assert_not_called()
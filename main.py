@@ -1,39 +1,244 @@
 import argparse
 import sys
+from index.elasticsearch_indexer import (
+    BULK_MODES,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_INITIAL_BACKOFF,
+    DEFAULT_KEEP_GENERATIONS,
+    DEFAULT_MAX_BACKOFF,
+    DEFAULT_MAX_CHUNK_BYTES,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_RETRY_BUDGET,
+    DEFAULT_THREAD_COUNT,
+    HEALTH_STATUSES,
+)
+from index.pipeline import DEFAULT_QUEUE_SIZE
+from index.hash_store import default_hash_store_path
+from index.orchestrator import DEFAULT_MAX_PARALLEL, INDEX_MODULES
+from index.bulk_export import COMPRESSIONS, DEFAULT_MAX_FILE_BYTES
+from index.bulk_loader import DEFAULT_LOAD_WORKERS, run as load_exported
+from index.file_index.fetch_information_from_db import PRELOAD_STRATEGIES
+from index.metrics import collect_metrics
+from index.replay_dead_letters import run as replay_dead_letters
 
 def main():
     parser = argparse.ArgumentParser(description="ElasticSearch Indexing CLI")
     parser.add_argument("index_type", choices=[
         "population_index", "sample_index", "file_index",
-        "data_collection_index", "super_population_index", "analysis_group_index"
-    ], help="Type of indexer to run")
+        "data_collection_index", "super_population_index", "analysis_group_index",
+        "all", "replay"
+    ], help="Type of indexer to run, all runs every indexer in one process, replay sends the actions of a --replay_file again")
 
     # These will be passed to the underlying module
-    parser.add_argument("--config_file", required=True, help="Path to config.ini")
-    parser.add_argument("--es_host", required=True, help="Elasticsearch host URL")
-    parser.add_argument("--type_of", choices=["update", "create"], default="update", help="Indexing operation type")
+    parser.add_argument("--config_file", help="Path to config.ini, required unless --load_dir is set or with replay")
+    parser.add_argument("--es_host", help="Elasticsearch host URL, required unless --export_dir is set")
+    parser.add_argument("--type_of", choices=["update", "create", "rebuild"], default="update", help="Indexing operation type")
+    parser.add_argument("--bulk_mode", choices=BULK_MODES, default="streaming", help="Send bulk chunks sequentially or from a thread pool")
+    parser.add_argument("--thread_count", type=int, default=DEFAULT_THREAD_COUNT, help="Number of sender threads in parallel mode")
+    parser.add_argument("--chunk_size", type=int, default=DEFAULT_CHUNK_SIZE, help="Number of actions per bulk request")
+    parser.add_argument("--queue_size", type=int, default=DEFAULT_QUEUE_SIZE, help="Maximum number of items waiting between two pipeline stages")
+    parser.add_argument("--max_chunk_bytes", type=int, default=DEFAULT_MAX_CHUNK_BYTES, help="Maximum size of a bulk request in bytes")
+    parser.add_argument("--keep_generations", type=int, default=DEFAULT_KEEP_GENERATIONS, help="Previous physical indices kept for rollback by --type_of rebuild")
+    parser.add_argument("--no_ingest_profile", action="store_true", help="Create new indices with the JSON settings instead of the ingest profile")
+    parser.add_argument("--force_merge", type=int, default=None, help="Force merge a new index to this number of segments after the load")
+    parser.add_argument("--wait_for_status", choices=HEALTH_STATUSES, default="green", help="Cluster health awaited after loading a new index")
+    parser.add_argument("--max_retries", type=int, default=DEFAULT_MAX_RETRIES, help="Retries of the bulk items rejected by a busy cluster, 0 disables them")
+    parser.add_argument("--initial_backoff", type=float, default=DEFAULT_INITIAL_BACKOFF, help="Seconds before the first retry, doubled for every following retry")
+    parser.add_argument("--max_backoff", type=float, default=DEFAULT_MAX_BACKOFF, help="Maximum seconds between two retries")
+    parser.add_argument("--retry_budget", type=int, default=DEFAULT_RETRY_BUDGET, help="Retry requests allowed for the whole run")
+    parser.add_argument("--incremental", action="store_true", help="Only index the new files of file_index and delete the files which left the current tree, with --type_of update")
+    parser.add_argument("--stream", action="store_true", help="Stream the files of file_index from the DB in windows of --batch_size rows")
+    parser.add_argument("--batch_size", type=int, default=None, help="Number of files per window of file_index with --stream")
+    parser.add_argument("--preload_strategy", choices=PRELOAD_STRATEGIES, default=None, help="How the preload queries of file_index select file ids")
+    parser.add_argument("--partitions", type=int, default=None, help="Number of worker processes of file_index, each indexing a range of file ids")
+    parser.add_argument("--preload_concurrency", type=int, default=None, help="Preload queries of file_index or population_index running at the same time on their own connections")
+    parser.add_argument("--stage_joins", action="store_true", help="Stage the sample to data collection join once for sample_index, population_index and data_collection_index")
+    parser.add_argument("--dead_letter_dir", default=None, help="Directory of the dead letter file keeping the actions which failed")
+    parser.add_argument("--replay_file", default=None, help="Dead letter file sent again with replay")
+    parser.add_argument("--replay_index", default=None, help="Target index of replay, the index recorded in the file by default")
+    parser.add_argument("--checkpoint_file", default=None, help="State file of the progress of file_index or sample_index, written as bulk chunks are confirmed")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted file_index or sample_index run from its --checkpoint_file")
+    parser.add_argument("--skip_unchanged", action="store_true", help="Skip updates of documents whose hash did not change, hashes are kept next to the config file")
+    parser.add_argument("--max_parallel", type=int, default=DEFAULT_MAX_PARALLEL, help="Number of indexers running at the same time with all")
+    parser.add_argument("--db_concurrency", type=int, default=None, help="Size of the connection pool shared by the indexers with all")
+    parser.add_argument("--es_concurrency", type=int, default=None, help="Maximum number of bulk requests in flight with all")
+    parser.add_argument("--engine", choices=["sync", "async"], default="sync", help="Run the indexer on threads or on an asyncio event loop")
+    parser.add_argument("--export_dir", default=None, help="Write the bulk actions to NDJSON files of this directory instead of Elasticsearch")
+    parser.add_argument("--export_compression", choices=COMPRESSIONS, default="gzip", help="Compression of the exported files")
+    parser.add_argument("--export_max_file_bytes", type=int, default=DEFAULT_MAX_FILE_BYTES, help="Uncompressed NDJSON bytes per exported file")
+    parser.add_argument("--load_dir", default=None, help="Load the files of a previous --export_dir into Elasticsearch, the database is not read")
+    parser.add_argument("--load_workers", type=int, default=DEFAULT_LOAD_WORKERS, help="Number of files loaded at the same time with --load_dir")
+    parser.add_argument("--metrics_textfile", default=None, help="Write the run metrics to this Prometheus textfile collector file")
+    parser.add_argument("--metrics_json", default=None, help="Write a JSON summary of the run metrics to this file")
 
     args = parser.parse_args()
 
+    if args.incremental and (
+        args.index_type != "file_index" or args.type_of != "update" or args.engine == "async"
+    ):
+        parser.error("--incremental is only available for file_index with --type_of update and --engine sync")
+    if args.incremental and args.export_dir:
+        parser.error("--incremental cannot be combined with --export_dir")
+    if (args.stream or args.batch_size or args.preload_strategy) and args.index_type != "file_index":
+        parser.error("--stream, --batch_size and --preload_strategy are only available for file_index")
+    if args.batch_size and not args.stream:
+        parser.error("--batch_size requires --stream")
+    if args.preload_strategy == "temp_table" and args.engine == "async":
+        parser.error("--preload_strategy temp_table is not available with --engine async")
+    if args.partitions and (args.index_type != "file_index" or args.engine == "async"):
+        parser.error("--partitions is only available for file_index with --engine sync")
+    if args.checkpoint_file and (
+        args.index_type not in ("file_index", "sample_index") or args.engine == "async"
+    ):
+        parser.error("--checkpoint_file is only available for file_index and sample_index with --engine sync")
+    if args.preload_concurrency and (
+        args.index_type not in ("file_index", "population_index") or args.engine == "async"
+    ):
+        parser.error("--preload_concurrency is only available for file_index and population_index with --engine sync")
+    if args.stage_joins and (
+        args.index_type not in ("sample_index", "population_index", "data_collection_index", "all")
+        or args.engine == "async"
+    ):
+        parser.error("--stage_joins is only available for sample_index, population_index, data_collection_index and all with --engine sync")
+    if args.resume and not args.checkpoint_file:
+        parser.error("--resume requires the --checkpoint_file of the interrupted run")
+    if args.index_type == "replay":
+        if not args.replay_file or not args.es_host:
+            parser.error("replay requires --replay_file and --es_host")
+    elif not args.config_file and not args.load_dir:
+        parser.error("--config_file is required unless --load_dir is set")
+    if not args.es_host and not args.export_dir:
+        parser.error("--es_host is required unless --export_dir is set")
+    if args.export_dir and args.load_dir:
+        parser.error("--export_dir and --load_dir cannot be combined")
+    if args.export_dir and (args.skip_unchanged or args.engine == "async"):
+        parser.error("--export_dir does not support --skip_unchanged or --engine async")
+
     # Mapping index types to module paths
-    module_map = {
-        "population_index": "index.population_index.indexing",
-        "sample_index": "index.sample_index.indexing",
-        "file_index": "index.file_index.indexing",
-        "data_collection_index": "index.data_collection_index.indexing",
-        "super_population_index": "index.super_population_index.indexing",
-        "analysis_group_index": "index.analysis_group_index.indexing"
+    module_map = {**INDEX_MODULES, "all": "index.orchestrator"}
+
+    # Mapping index types to index names, the sub directories of an export
+    index_names = {
+        "file_index": "file",
+        "sample_index": "sample",
+        "population_index": "population",
+        "data_collection_index": "data_collections",
+        "super_population_index": "superpopulation",
+        "analysis_group_index": "analysis_group",
+    }
+
+    # Indexers with an asyncio implementation
+    async_module_map = {
+        "file_index": "index.file_index.async_indexing",
+        "data_collection_index": "index.data_collection_index.async_indexing",
     }
 
+    if args.engine == "async":
+        if args.index_type not in async_module_map:
+            parser.error(f"--engine async is not available for {args.index_type}")
+        if args.type_of == "rebuild":
+            parser.error("--type_of rebuild is not available with --engine async")
+        if (
+            args.bulk_mode != "streaming"
+            or args.thread_count != DEFAULT_THREAD_COUNT
+            or args.retry_budget != DEFAULT_RETRY_BUDGET
+            or args.dead_letter_dir
+        ):
+            parser.error(
+                "--bulk_mode, --thread_count, --retry_budget and --dead_letter_dir "
+                "are not available with --engine async"
+            )
+        module_map.update(async_module_map)
+
     # Add the current directory to sys.path so that `index.` can be resolved
     sys.path.insert(0, ".")
 
+    bulk_settings = dict(
+        bulk_mode=args.bulk_mode,
+        thread_count=args.thread_count,
+        chunk_size=args.chunk_size,
+        max_chunk_bytes=args.max_chunk_bytes,
+        keep_generations=args.keep_generations,
+        ingest_profile=not args.no_ingest_profile,
+        force_merge=args.force_merge,
+        wait_for_status=args.wait_for_status,
+        max_retries=args.max_retries,
+        initial_backoff=args.initial_backoff,
+        max_backoff=args.max_backoff,
+        retry_budget=args.retry_budget,
+        dead_letter_dir=args.dead_letter_dir,
+    )
+
+    with collect_metrics(args.metrics_textfile, args.metrics_json):
+        result = run_module(args, module_map, index_names, bulk_settings)
+
+    # the orchestrator of all keeps going when an indexer fails
+    if args.index_type == "all" and not args.load_dir and result["failed"]:
+        sys.exit(f"Indexers failed: {', '.join(result['failed'])}")
+
+
+def run_module(args, module_map, index_names, bulk_settings):
+    """Runs the indexer module, the loader of exported files or the replay of a dead
+    letter file, selected by the arguments, and returns its result"""
+    if args.index_type == "replay":
+        return replay_dead_letters(
+            args.replay_file, args.es_host, args.replay_index, **bulk_settings
+        )
+
+    if args.load_dir:
+        return load_exported(
+            args.load_dir,
+            args.es_host,
+            args.type_of,
+            None if args.index_type == "all" else [index_names[args.index_type]],
+            args.load_workers,
+            **bulk_settings,
+        )
+
     # Import and run the corresponding module
     module_path = module_map[args.index_type]
     module = __import__(module_path, fromlist=['run'])
 
+    options = {}
+    if args.export_dir:
+        options = {
+            "export_dir": args.export_dir,
+            "export_compression": args.export_compression,
+            "export_max_file_bytes": args.export_max_file_bytes,
+        }
+    if args.incremental:
+        options["incremental"] = True
+    if args.stream:
+        options["stream"] = True
+    if args.batch_size:
+        options["batch_size"] = args.batch_size
+    if args.preload_strategy:
+        options["preload_strategy"] = args.preload_strategy
+    if args.partitions:
+        options["partitions"] = args.partitions
+    if args.preload_concurrency:
+        options["preload_concurrency"] = args.preload_concurrency
+    if args.stage_joins:
+        options["stage_joins"] = True
+    if args.checkpoint_file:
+        options |= {"checkpoint_file": args.checkpoint_file, "resume": args.resume}
+    if args.index_type == "all":
+        options |= {
+            "max_parallel": args.max_parallel,
+            "db_concurrency": args.db_concurrency,
+            "es_concurrency": args.es_concurrency,
+        }
+
     # Convention: each module should expose a `run()` function
-    module.run(args.config_file, args.es_host, args.type_of)
+    return module.run(
+        args.config_file,
+        args.es_host,
+        args.type_of,
+        **options,
+        **bulk_settings,
+        queue_size=args.queue_size,
+        hash_store=default_hash_store_path(args.config_file) if args.skip_unchanged else None,
+    )
 
 if __name__ == "__main__":
     main()